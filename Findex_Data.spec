@@ -5,7 +5,7 @@ a = Analysis(
     pathex=['/Users/shulei/PycharmProjects/Findex/src'],  # 这里添加源代码路径
     binaries=[],
     datas=[],
-    hiddenimports=['loader','numpy','numpy.core.multiarray'],  # 确保 loader 是隐藏导入的模块
+    hiddenimports=['loader','numpy','numpy.core.multiarray','data_gui'],  # 确保 loader 及延迟导入的 GUI 模块被打包
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
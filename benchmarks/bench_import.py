@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_import.py
+
+测量 Findex 命令行入口的启动耗时：对每个入口重复运行 `python <script> --help`，
+取墙钟时间的中位数，并用 `python -X importtime` 列出累计耗时最多的顶层模块，
+以及 --help 路径上是否加载了 tkinter / matplotlib / cv2 / pandas。
+
+用法：
+    python benchmarks/bench_import.py [--repeat 5] [--top 8]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+ENTRY_POINTS = ['Findex_Data.py', 'Findex_Heatmap.py']
+HEAVY_MODULES = ['tkinter', 'matplotlib', 'cv2', 'pandas', 'numpy']
+
+
+def time_help(script, repeat):
+    """返回多次运行 `script --help` 的墙钟时间（秒）列表"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, '--help'], cwd=SRC_DIR,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_profile(script):
+    """用 -X importtime 运行 --help，返回 {顶层包名: 最大累计微秒}"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', script, '--help'], cwd=SRC_DIR,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [p.strip() for p in line[len('import time:'):].split('|')]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        top = parts[2].split('.')[0]
+        cumulative[top] = max(cumulative.get(top, 0), int(parts[1]))
+    return cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Findex 命令行启动耗时基准")
+    parser.add_argument('--repeat', type=int, default=5, help='每个入口的重复次数')
+    parser.add_argument('--top', type=int, default=8, help='列出耗时最多的模块数')
+    args = parser.parse_args()
+
+    for script in ENTRY_POINTS:
+        timings = time_help(script, args.repeat)
+        profile = import_profile(script)
+        loaded = [m for m in HEAVY_MODULES if m in profile]
+        print(f"{script} --help: median {statistics.median(timings) * 1000:.0f} ms "
+              f"(min {min(timings) * 1000:.0f} ms, n={args.repeat})")
+        print(f"  heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+        for name, us in sorted(profile.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+            print(f"    {name:<24}{us / 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_pipeline.py
+
+Findex 热点路径的基准测试：在合成数据集（make_dataset.py）上分别计时
+resolve_folders、BehaviorLoader、load_many、HeatmapLoader、load_heatmap_data、collect_stats 与 merge_heatmaps，
+每个阶段重复 --repeat 次取中位数，结果（含每样本耗时与环境信息）写入 JSON，
+并可与之前保存的结果对比，超过 --threshold 的变慢会被标记为回归。
+
+用法：
+    python benchmarks/bench_pipeline.py --fish 1000                      # 在临时目录生成数据集并计时
+    python benchmarks/bench_pipeline.py --root /tmp/findex_bench         # 使用已有数据集
+        [--stages resolve_folders collect_stats ...] [--repeat 3] [--warmup 1] [--jobs 1] [--render_jobs 1] [--fast_render]
+        [--output benchmarks/results/<时间戳>.json] [--compare benchmarks/results/baseline.json] [--threshold 0.1]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+
+def stage_resolve_folders(ctx):
+    import Findex_Data
+    return len(Findex_Data.resolve_folders([ctx['root']]))
+
+
+def stage_behavior_loader(ctx):
+    from loader import BehaviorLoader
+    for npy_file in ctx['behavior_files']:
+        BehaviorLoader(npy_file).get_processed()
+    return len(ctx['behavior_files'])
+
+
+def stage_behavior_loader_scalars(ctx):
+    from loader import BehaviorLoader
+    for npy_file in ctx['behavior_files']:
+        BehaviorLoader(npy_file, scalars_only=True).get_processed()
+    return len(ctx['behavior_files'])
+
+
+def stage_load_many(ctx):
+    from loader import load_many
+    return len(load_many(ctx['behavior_files']))
+
+
+def stage_heatmap_loader(ctx):
+    from loader import HeatmapLoader
+    for npy_file in ctx['heatmap_files']:
+        HeatmapLoader(npy_file).get_processed()
+    return len(ctx['heatmap_files'])
+
+
+def stage_load_heatmap_data(ctx):
+    import Findex_Heatmap
+    for folder in ctx['folders']:
+        Findex_Heatmap.load_heatmap_data(folder)
+    return len(ctx['folders'])
+
+
+def stage_collect_stats(ctx):
+    import Findex_Data
+    Findex_Data.collect_stats(ctx['folders'], jobs=ctx['jobs'], cache=None)
+    return len(ctx['folders'])
+
+
+def stage_merge_heatmaps(ctx):
+    import Findex_Heatmap
+    output_dir = os.path.join(ctx['scratch'], 'heatmaps')
+    Findex_Heatmap.merge_heatmaps(ctx['folders'], output_dir, render_jobs=ctx['render_jobs'],
+                                  fast_render=ctx['fast_render'])
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return len(ctx['folders'])
+
+
+# 阶段名 -> 计时函数（返回处理的样本数）
+STAGES = {
+    'resolve_folders': stage_resolve_folders,
+    'behavior_loader': stage_behavior_loader,
+    'behavior_loader_scalars': stage_behavior_loader_scalars,
+    'load_many': stage_load_many,
+    'heatmap_loader': stage_heatmap_loader,
+    'load_heatmap_data': stage_load_heatmap_data,
+    'collect_stats': stage_collect_stats,
+    'merge_heatmaps': stage_merge_heatmaps,
+}
+
+
+def time_stage(func, ctx, repeat, warmup=1):
+    """先预热 warmup 次（排除模块导入等一次性开销），再运行 repeat 次，返回 (耗时列表, 样本数)"""
+    for _ in range(warmup):
+        func(ctx)
+    timings, items = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = func(ctx)
+        timings.append(time.perf_counter() - start)
+    return timings, items
+
+
+def environment():
+    """记录可复现性相关的环境信息"""
+    import numpy as np
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+    }
+
+
+def compare(results, baseline, threshold):
+    """打印与基准结果的对比，返回回归的阶段名列表"""
+    regressions = []
+    print(f"\n{'stage':<26}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, stage in results['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if base is None:
+            continue
+        ratio = stage['median_s'] / base['median_s'] if base['median_s'] > 0 else float('inf')
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<26}{base['median_s']:>11.3f}s{stage['median_s']:>11.3f}s{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Findex 热点路径基准测试")
+    parser.add_argument('--root', help='已有的数据集母文件夹（不指定时在临时目录生成）')
+    parser.add_argument('--fish', type=int, default=200, help='生成数据集时的鱼数量')
+    parser.add_argument('--seed', type=int, default=0, help='生成数据集时的随机种子')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES), help='要计时的阶段')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段的重复次数')
+    parser.add_argument('--warmup', type=int, default=1, help='每个阶段计时前的预热次数')
+    parser.add_argument('--jobs', type=int, default=1, help='collect_stats 的进程数')
+    parser.add_argument('--render_jobs', type=int, default=1, help='merge_heatmaps 的渲染进程数')
+    parser.add_argument('--fast_render', action='store_true', help='merge_heatmaps 使用快速渲染')
+    parser.add_argument('--output', help='结果 JSON 路径（默认 benchmarks/results/<时间戳>.json）')
+    parser.add_argument('--compare', help='与之前保存的结果 JSON 对比')
+    parser.add_argument('--threshold', type=float, default=0.1, help='判定为回归的相对变慢比例')
+    args = parser.parse_args()
+
+    # 基准只关心耗时，屏蔽逐文件日志
+    logging.disable(logging.CRITICAL)
+
+    scratch = tempfile.mkdtemp(prefix='findex_bench_')
+    try:
+        root = args.root
+        if root is None:
+            from make_dataset import make_dataset
+            root = os.path.join(scratch, 'dataset')
+            start = time.perf_counter()
+            make_dataset(root, args.fish, seed=args.seed, jobs=os.cpu_count() or 1)
+            print(f"已生成 {args.fish} 条鱼的数据集（{time.perf_counter() - start:.1f} s）")
+
+        from loader import discover_samples
+        samples = discover_samples([root])
+        folders = list(samples)
+        ctx = {
+            'root': root,
+            'scratch': scratch,
+            'folders': folders,
+            'behavior_files': [f for files in samples.values() for f in files if 'behavior' in os.path.basename(f)],
+            'heatmap_files': [f for files in samples.values() for f in files if 'heatmap' in os.path.basename(f)],
+            'jobs': args.jobs,
+            'render_jobs': args.render_jobs,
+            'fast_render': args.fast_render,
+        }
+
+        results = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'dataset': {'root': os.path.abspath(root), 'samples': len(folders),
+                        'generated': args.root is None, 'seed': args.seed if args.root is None else None},
+            'options': {'repeat': args.repeat, 'warmup': args.warmup, 'jobs': args.jobs, 'render_jobs': args.render_jobs,
+                        'fast_render': args.fast_render},
+            'environment': environment(),
+            'stages': {},
+        }
+        print(f"{'stage':<26}{'median':>10}{'min':>10}{'per sample':>14}")
+        for name in args.stages:
+            timings, items = time_stage(STAGES[name], ctx, args.repeat, args.warmup)
+            median = statistics.median(timings)
+            results['stages'][name] = {
+                'median_s': median,
+                'min_s': min(timings),
+                'runs_s': timings,
+                'items': items,
+                'per_item_ms': median / items * 1000 if items else None,
+            }
+            per_item = f"{median / items * 1000:.3f} ms" if items else '-'
+            print(f"{name:<26}{median:>9.3f}s{min(timings):>9.3f}s{per_item:>14}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n结果已保存至: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"回归: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+make_dataset.py
+
+生成 zebrAI_fish 风格的合成样本文件夹，用于基准测试与回归测试：
+每条鱼一个 <group>_<index> 文件夹，内含 behavior_data.npy 与 heatmap_data.npy（pickle 字典）。
+
+轨迹为鱼缸内的反射随机游走，活动 / 静止状态交替，因此各字段彼此一致：
+- speeds_mm_s 由每帧位移换算，avg_speed_mm_s / total_displacement_mm 由其汇总；
+- top_times 为位于上 1/3 区域的时间段，freeze_times 为速度持续低于阈值的时间段（秒）；
+- heatmap_data 为每个像素的停留时间（秒），尺寸由鱼缸类型与 scale_factor 决定，梯形缸外为 0。
+鱼缸类型与 scale_factor 按鱼随机选择（可混合），同一 --seed 生成的数据完全相同。
+
+用法：
+    python benchmarks/make_dataset.py --root /tmp/findex_bench --fish 1000
+        [--groups control drug caffeine] [--tank_shapes rectangle trapezoid] [--scale_factors 4 5]
+        [--duration 300] [--fps 30] [--seed 0] [--jobs 4] [--sidecar]
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from tank_geometry import tank_size, tank_mask  # noqa: E402
+
+FREEZE_SPEED_MM_S = 2.0    # 低于该速度视为静止
+MIN_FREEZE_S = 1.0         # 静止持续时间下限
+
+
+def _runs(mask, fps, min_frames=1):
+    """返回布尔序列中连续 True 段的 [[开始秒, 结束秒], ...]（float64，形状 (n, 2)）"""
+    padded = np.concatenate(([0], mask.view(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) >= min_frames
+    return np.column_stack([starts[keep], ends[keep]]).astype(np.float64) / fps
+
+
+def _reflect(values, upper):
+    """将游走坐标反射回 [0, upper]"""
+    period = 2.0 * upper
+    return upper - np.abs(np.mod(values, period) - upper)
+
+
+def _activity(rng, n_frames, fps):
+    """活动 / 静止交替的速度系数（静止段为 0.02，活动段为 1）"""
+    bouts = []
+    total, active = 0, bool(rng.random() < 0.8)
+    while total < n_frames:
+        length = int(rng.exponential(8.0 if active else 2.5) * fps) + 1
+        bouts.append((active, length))
+        total += length
+        active = not active
+    levels = np.array([1.0 if a else 0.02 for a, _ in bouts])
+    return np.repeat(levels, [n for _, n in bouts])[:n_frames]
+
+
+def make_sample(rng, tank_shape, scale_factor, duration, fps):
+    """生成一条鱼的 (behavior_data, heatmap_data) 字典"""
+    n_frames = int(duration * fps)
+    height, width = tank_size(tank_shape, scale_factor)
+    inside = tank_mask(tank_shape, scale_factor, (height, width))
+
+    # 在单位正方形内游走（步长单位：缸高），再映射到鱼缸像素
+    step = rng.normal(0.0, 0.004, size=(n_frames, 2)) * _activity(rng, n_frames, fps)[:, None]
+    start = rng.random(2)
+    walk = _reflect(start + np.cumsum(step, axis=0), 1.0)
+    rows = np.minimum((walk[:, 1] * height).astype(np.int64), height - 1)
+    if inside is None:
+        cols = np.minimum((walk[:, 0] * width).astype(np.int64), width - 1)
+    else:  # 按每行缸内宽度放置 x，保证轨迹在梯形 / 多边形内
+        row_width = inside.sum(axis=1)
+        row_offset = inside.argmax(axis=1)
+        cols = row_offset[rows] + np.minimum((walk[:, 0] * row_width[rows]).astype(np.int64),
+                                             np.maximum(row_width[rows] - 1, 0))
+
+    heatmap = np.bincount(rows * width + cols, minlength=height * width).reshape(height, width) / fps
+
+    # 速度由连续坐标计算，避免像素量化
+    step_mm = np.hypot(np.diff(walk[:, 0]) * width, np.diff(walk[:, 1]) * height) * scale_factor
+    speeds = np.concatenate(([0.0], step_mm * fps))
+    top_times = _runs(rows < height / 3, fps)
+    freeze_times = _runs(speeds < FREEZE_SPEED_MM_S, fps, int(MIN_FREEZE_S * fps))
+
+    behavior = {
+        'speeds_mm_s': speeds,
+        'avg_speed_mm_s': float(speeds.mean()),
+        'total_displacement_mm': float(step_mm.sum()),
+        'top_time': float((top_times[:, 1] - top_times[:, 0]).sum()),
+        'top_times': top_times,
+        'top_frequency': len(top_times),
+        'freeze_time': float((freeze_times[:, 1] - freeze_times[:, 0]).sum()),
+        'freeze_times': freeze_times,
+        'freeze_frequency': len(freeze_times),
+        'tank_shape': tank_shape,
+        'trapezoid_side': 'left' if tank_shape == 'trapezoid' else None,
+        'scale_factor': scale_factor,
+    }
+    heat = {
+        'heatmap_data': heatmap,
+        'tank_shape': tank_shape,
+        'scale_factor': scale_factor,
+        'total_duration': float(duration),
+        'trapezoid_side': behavior['trapezoid_side'],
+    }
+    return behavior, heat
+
+
+def write_fish(root, index, group, tank_shape, scale_factor, duration, fps, seed, sidecar=False):
+    """生成并写出第 index 条鱼的样本文件夹，返回文件夹路径"""
+    rng = np.random.default_rng([seed, index])
+    behavior, heat = make_sample(rng, tank_shape, scale_factor, duration, fps)
+    folder = os.path.join(root, f"{group}_{index:05d}")
+    os.makedirs(folder, exist_ok=True)
+    np.save(os.path.join(folder, 'behavior_data.npy'), behavior)
+    np.save(os.path.join(folder, 'heatmap_data.npy'), heat)
+    if sidecar:
+        from loader import convert_folder
+        convert_folder(folder, force=True)
+    return folder
+
+
+def _write_chunk(args):
+    return [write_fish(*item) for item in args]
+
+
+def plan_dataset(root, n_fish, groups, tank_shapes, scale_factors, duration, fps, seed, sidecar=False):
+    """返回每条鱼的 write_fish 参数（鱼缸类型与 scale_factor 由种子决定，与并行方式无关）"""
+    rng = np.random.default_rng(seed)
+    shapes = rng.choice(len(tank_shapes), size=n_fish)
+    scales = rng.choice(len(scale_factors), size=n_fish)
+    return [(root, i, groups[i % len(groups)], tank_shapes[shapes[i]], scale_factors[scales[i]],
+             duration, fps, seed, sidecar) for i in range(n_fish)]
+
+
+def make_dataset(root, n_fish, groups=('control', 'drug', 'caffeine'), tank_shapes=('rectangle', 'trapezoid'),
+                 scale_factors=(4, 5), duration=300.0, fps=30, seed=0, jobs=1, sidecar=False):
+    """生成 n_fish 个样本文件夹，返回文件夹列表（按序号排序）"""
+    plan = plan_dataset(root, n_fish, list(groups), list(tank_shapes), list(scale_factors),
+                        duration, fps, seed, sidecar)
+    if jobs <= 1:
+        return [write_fish(*item) for item in plan]
+    chunk = max(1, len(plan) // (jobs * 8))
+    chunks = [plan[i:i + chunk] for i in range(0, len(plan), chunk)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return [folder for part in executor.map(_write_chunk, chunks) for folder in part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 zebrAI_fish 风格的合成样本数据集")
+    parser.add_argument('--root', required=True, help='输出的母文件夹')
+    parser.add_argument('--fish', type=int, default=100, help='鱼（样本文件夹）的数量，10 ~ 100000')
+    parser.add_argument('--groups', nargs='+', default=['control', 'drug', 'caffeine'], help='组名（轮流分配）')
+    parser.add_argument('--tank_shapes', nargs='+', default=['rectangle', 'trapezoid'], help='随机选用的鱼缸类型')
+    parser.add_argument('--scale_factors', nargs='+', type=int, default=[4, 5], help='随机选用的 scale_factor')
+    parser.add_argument('--duration', type=float, default=300.0, help='每条鱼的记录时长（秒）')
+    parser.add_argument('--fps', type=int, default=30, help='帧率')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--jobs', type=int, default=1, help='并行写出的进程数（0 = 全部 CPU 核心）')
+    parser.add_argument('--sidecar', action='store_true', help='同时写出无 pickle 格式（sample_format）')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    start = time.perf_counter()
+    folders = make_dataset(args.root, args.fish, args.groups, args.tank_shapes, args.scale_factors,
+                           args.duration, args.fps, args.seed, jobs, args.sidecar)
+    print(f"已生成 {len(folders)} 个样本文件夹至 {args.root}（{time.perf_counter() - start:.1f} s）")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,22 +9,58 @@ extract behavioral metrics from .npy files in subdirectories, and generate an Ex
 Output columns: Group, Top Duration, Top Frequency, Freeze Duration, Freeze Frequency,
                Latency to the Top, Total Displacement, Average Speed, Tank Shape, Folder Name
 
-Features: Sort by Group with group means (including sample size), add blank rows between groups,
-          optional fuzzy matching for group names. Supports English/Chinese UI switching.
+Features: Sort by Group with group means (including sample size), optional SD/SEM/median rows,
+          add blank rows between groups, optional fuzzy matching for group names.
+          Supports English/Chinese UI switching.
+
+With --timecourse SECONDS, speed and top/freeze occupancy are also binned into SECONDS-long windows for every
+sample (vectorized across samples, see timecourse.py) and per-group mean/SEM curves are written as a long-format
+table to <output>.timecourse.xlsx/.csv. Frame times use --fps (default 30), since samples do not store it.
+
+With --stats-control GROUP, every other group is compared with GROUP on each numeric column (difference of means,
+bootstrap confidence interval and permutation p-value, see comparisons.py). The results go to a second
+"Statistics" sheet of the .xlsx output, or to <output>.statistics.csv.
+
+With --zones, each sample's heatmap is also split into named tank zones (top/bottom and left/right halves,
+center/periphery, plus any zones added in the tank config, see tank_geometry.py) and the fraction of time spent in
+each zone is written per sample with group means, in the same layout as the summary table, to
+<output>.zones.xlsx/.csv. All samples and zones are computed with one matrix product per tank type and heatmap size
+(see zone_occupancy.py).
+
+Output format follows the --output extension: .xlsx, .csv, .parquet or .feather (the last two need pyarrow).
+Excel output is written row by row with column widths tracked during the write; --stream-xlsx additionally
+uses xlsxwriter's constant_memory mode so memory stays flat for very large tables (see table_writers.py).
+
+On network shares (SMB/NFS), --prefetch K reads the next K sample files in background threads while the current
+one is decoded (bounded read-ahead, see loader/prefetch.py); it applies to single-process loading and --zones.
+
+Per-sample records are cached in ~/.findex/record_cache.json (keyed by file path, size and mtime),
+so re-runs only load samples that were added or modified since the last run.
 
 Dependencies: pandas, tkinter, beh_loader, fuzzywuzzy (optional for fuzzy matching)
+The GUI lives in data_gui.py; tkinter and pandas are imported only on the code paths that use them,
+so CLI runs (and --help) start quickly and work on headless machines without Tk.
 
 Usage:
     python Findex_Data.py                # Open GUI
-    python Findex_Data.py --folders <paths> --output summary.xlsx [--fuzzy]
+    python Findex_Data.py --folders <paths> --output summary.xlsx|.csv|.parquet|.feather [--fuzzy] [--jobs N]
+                          [--stream-xlsx]
+                          [--summary-stats sd sem median] [--no-cache | --rebuild-cache] [--cache-file PATH]
+                          [--timecourse SECONDS [--fps FPS]]
+                          [--stats-control GROUP [--stats-resamples N] [--stats-confidence 0.95] [--stats-seed N]]
+                          [--zones [ZONE ...]] [--tank-config tank_shapes.json]
+                          [--depth N] [--include PATTERN ...] [--exclude PATTERN ...] [--scan-threads N] [--prefetch K]
+                          [--profile [--profile-top N] [--profile-no-trace]]
+                          [--watch [--watch-interval SECONDS] [--watch-settle SECONDS]]
 """
 import os
-import glob
+import time
 import argparse
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-from loader import BehaviorLoader
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from record_cache import RecordCache, DEFAULT_CACHE_FILE
+from profiler import Profiler, NULL_PROFILER, stop_worker_tracing
+from table_writers import write_table
 
 try:
     from fuzzywuzzy import process, fuzz
@@ -32,80 +68,21 @@ try:
 except ImportError:
     FUZZY_AVAILABLE = False
 
-# 语言字典
-LANGUAGES = {
-    '简中': {
-        'title': 'Findex_Data_1.0.1',
-        'folder_label': '请选择文件夹（支持主文件夹或子文件夹）：',
-        'add_button': '添加文件夹',
-        'remove_button': '删除选中',
-        'fuzzy_check': '启用自动模糊匹配',
-        'fuzzy_tip': '提示：模糊匹配需要安装 fuzzywuzzy',
-        'fuzzy_info': '模糊检索文件夹的组命名，将名称相近的样本\n自动分为一组（如 "Caffiene" 和 "caffeine"）',
-        'output_label': '输出路径：',
-        'browse_button': '浏览',
-        'generate_button': '生成统计表',
-        'no_folders': '警告',
-        'no_folders_msg': '请先添加文件夹',
-        'no_output': '警告',
-        'no_output_msg': '请选择输出路径',
-        'no_fuzzy': '警告',
-        'no_fuzzy_msg': '模糊匹配需要安装 fuzzywuzzy',
-        'no_data': '提示',
-        'no_data_msg': '未找到有效 .npy 文件',
-        'success': '✅ 已保存: ',
-        'error': '错误'
-    },
-    'EN': {
-        'title': 'Findex_Data_1.0.1',
-        'folder_label': 'Please select folders (supports parent or subfolders):',
-        'add_button': 'Add Folder',
-        'remove_button': 'Remove Selected',
-        'fuzzy_check': 'Enable Fuzzy Matching',
-        'fuzzy_tip': 'Note: Fuzzy matching requires fuzzywuzzy',
-        'fuzzy_info': 'Fuzzy search the group naming of the folder,'
-                      '\n and automatically group the samples with similar'
-                      '\n names into one group. (e.g., "Caffiene" and "caffeine")',
-        'output_label': 'Output Path:',
-        'browse_button': 'Browse',
-        'generate_button': 'Generate Stats Table',
-        'no_folders': 'Warning',
-        'no_folders_msg': 'Please add folders first',
-        'no_output': 'Warning',
-        'no_output_msg': 'Please select an output path',
-        'no_fuzzy': 'Warning',
-        'no_fuzzy_msg': 'Fuzzy matching requires fuzzywuzzy',
-        'no_data': 'Info',
-        'no_data_msg': 'No valid .npy files found',
-        'success': '✅ Saved: ',
-        'error': 'Error'
-    }
-}
+NUMERIC_COLS = ['Top Duration', 'Top Frequency', 'Freeze Duration', 'Freeze Frequency',
+                'Latency to the Top', 'Total Displacement', 'Average Speed']
 
-# ToolTip 类
-class ToolTip:
-    def __init__(self, widget, text):
-        self.widget = widget
-        self.text = text
-        self.tip_window = None
-        self.widget.bind("<Enter>", self.show_tip)
-        self.widget.bind("<Leave>", self.hide_tip)
-
-    def show_tip(self, event):
-        if self.tip_window or not self.text:
-            return
-        x = self.widget.winfo_rootx() + 20
-        y = self.widget.winfo_rooty() + self.widget.winfo_height()
-        self.tip_window = tw = tk.Toplevel(self.widget)
-        tw.wm_overrideredirect(True)
-        tw.wm_geometry(f"+{x}+{y}")
-        label = tk.Label(tw, text=self.text, justify='left', background="#ffffe0", relief='solid', borderwidth=1)
-        label.pack()
-
-    def hide_tip(self, event):
-        if self.tip_window:
-            self.tip_window.destroy()
-            self.tip_window = None
+# load_sample_record 返回的字段（持久化缓存按此校验，字段变化时旧缓存失效）
+RECORD_FIELDS = [*NUMERIC_COLS, 'Tank Shape', 'Folder Name']
+
+# 区域停留分析每次加载的样本数（限制同时驻留的热图数量）
+ZONE_CHUNK = 256
+
+# 可选的组统计行：选项名 -> (行标签, pandas 聚合函数)
+SUMMARY_STATS = {
+    'sd': ('SD', 'std'),
+    'sem': ('SEM', 'sem'),
+    'median': ('Median', 'median'),
+}
 
 def extract_group(folder_name: str, fuzzy_match=False, group_map=None) -> str:
     """Extract Group name from folder name, case-insensitive, with optional fuzzy matching"""
@@ -139,222 +116,424 @@ def build_group_map(folders):
 
     return group_map
 
-def resolve_folders(paths):
-    """Resolve folder paths to find subdirectories containing .npy files"""
-    valid = []
-    for p in paths:
-        if not os.path.isdir(p):
-            continue
-        if glob.glob(os.path.join(p, '*.npy')):
-            valid.append(p)
-            continue
-        for sub in os.listdir(p):
-            subp = os.path.join(p, sub)
-            if os.path.isdir(subp) and glob.glob(os.path.join(subp, '*.npy')):
-                valid.append(subp)
-    return sorted(set(valid))
-
-def collect_stats(folders, fuzzy_match=False):
-    """Collect stats from folders, sort by Group, add group means and blank rows"""
+def resolve_folders(paths, max_depth=1, include=None, exclude=None, threads=0):
+    """Resolve folder paths to the sorted list of sample folders containing .npy files"""
+    from loader import discover_samples
+    return list(discover_samples(paths, max_depth, include, exclude, threads))
+
+def find_sample_file(folder, sample_files=None):
+    """Return the .npy file read for a sample folder, or None if there is none"""
+    npy_files = sample_files.get(folder) if sample_files else None
+    if npy_files is None:
+        from loader import discover_samples
+        npy_files = discover_samples([folder], max_depth=0).get(folder, [])
+    return npy_files[0] if npy_files else None
+
+def load_sample_record(folder, npy_file=None, data=None):
+    """Load the .npy file of a sample folder and return its per-sample record (without Group).
+
+    data is the file content already read by a PrefetchReader; when given the file is not read again.
+    """
+    base = os.path.basename(os.path.normpath(folder))
+    npy_file = npy_file or find_sample_file(folder)
+    if npy_file is None:
+        return None
+    from loader import BehaviorLoader, read_sample
+    loader = BehaviorLoader.from_dict(read_sample(npy_file, data=data), npy_file, scalars_only=True)
+
+    return {
+        'Top Duration': loader.top_time or 0.0,
+        'Top Frequency': loader.top_frequency if loader.top_frequency is not None else 0,
+        'Freeze Duration': loader.freeze_time or 0.0,
+        'Freeze Frequency': loader.freeze_frequency or loader.freeze_count,
+        'Latency to the Top': loader.first_top_time,
+        'Total Displacement': loader.total_displacement if loader.total_displacement is not None else 0.0,
+        'Average Speed': loader.avg_speed if loader.avg_speed is not None else 0.0,
+        'Tank Shape': loader.tank_info.get('tank_shape', 'Unknown'),
+        'Folder Name': base
+    }
+
+def _timed_load_sample_record(folder, npy_file=None, data=None):
+    """load_sample_record plus its wall time, for --profile (top-level so worker processes can pickle it)"""
+    start = time.perf_counter()
+    record = load_sample_record(folder, npy_file, data)
+    return record, time.perf_counter() - start
+
+def resolve_jobs(jobs):
+    """Normalize the number of worker processes (<= 0 means all CPU cores)"""
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+def _load_records(folders, npy_files, jobs=1, profiler=NULL_PROFILER, prefetch=0):
+    """Load records for the given folders, optionally in a process pool, preserving order.
+
+    In a single process, prefetch > 0 reads the next files in background threads while the current one is decoded;
+    worker processes already overlap their reads, so prefetch is not used with jobs > 1.
+    """
+    jobs = min(resolve_jobs(jobs), len(folders))
+    loader = _timed_load_sample_record if profiler.enabled else load_sample_record
+    if jobs <= 1:
+        from loader import PrefetchReader
+        results = [loader(f, n, data) for f, (n, data) in zip(folders, PrefetchReader(npy_files, prefetch))]
+    else:
+        # executor.map 按提交顺序返回结果，保证与串行运行的行顺序一致
+        chunksize = max(1, len(folders) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=stop_worker_tracing) as executor:
+            results = list(executor.map(loader, folders, npy_files, chunksize=chunksize))
+    if not profiler.enabled:
+        return results
+    for folder, (_, seconds) in zip(folders, results):
+        profiler.record_sample(folder, seconds)
+    return [record for record, _ in results]
+
+def load_sample_records(folders, jobs=1, cache=None, sample_files=None, profiler=NULL_PROFILER, prefetch=0):
+    """Return per-sample records in folder order; unchanged samples are served from the cache.
+
+    sample_files maps folders to their .npy files (as returned by discover_samples) to skip re-listing them.
+    prefetch is the number of files read ahead in background threads (see _load_records).
+    """
+    with profiler.stage('scan'):
+        npy_files = [find_sample_file(folder, sample_files) for folder in folders]
+    records = [None] * len(folders)
+    pending = []
+    with profiler.stage('cache_lookup'):
+        for i, npy_file in enumerate(npy_files):
+            if npy_file is None:
+                continue
+            cached = cache.lookup(npy_file) if cache is not None else None
+            if cached is not None:
+                records[i] = cached
+            else:
+                pending.append(i)
+
+    with profiler.stage('load'):
+        loaded = _load_records([folders[i] for i in pending], [npy_files[i] for i in pending], jobs, profiler,
+                               prefetch)
+    for i, record in zip(pending, loaded):
+        records[i] = record
+        if cache is not None and record is not None:
+            cache.store(npy_files[i], record)
+    if cache is not None:
+        with profiler.stage('cache_save'):
+            cache.save()
+    return records
+
+def collect_stats(folders, fuzzy_match=False, jobs=1, cache=None, extra_stats=(), sample_files=None,
+                  profiler=NULL_PROFILER, prefetch=0):
+    """Collect stats from folders, sort by Group, add group means (optionally SD/SEM/median) and blank rows"""
+    records = load_sample_records(folders, jobs, cache, sample_files, profiler, prefetch)
+    with profiler.stage('summarize'):
+        return build_stats_table(folders, records, fuzzy_match, extra_stats)
+
+def build_sample_table(folders, records, fuzzy_match=False):
+    """Assign groups to already loaded per-sample records (None entries are skipped), one row per sample"""
+    import pandas as pd
     group_map = build_group_map(folders) if fuzzy_match and FUZZY_AVAILABLE else None
-    records = []
-    for folder in folders:
-        base = os.path.basename(os.path.normpath(folder))
-        group = extract_group(base, fuzzy_match, group_map)
-        npy_files = glob.glob(os.path.join(folder, '*.npy'))
-        if not npy_files:
+    rows = []
+    for record in records:
+        if record is None:
             continue
-        loader = BehaviorLoader(npy_files[0])
-        data = loader.get_processed()
-
-        first_top_time = loader.top_times[0][0] if loader.top_times is not None and len(loader.top_times) > 0 else None
-
-        records.append({
-            'Group': group,
-            'Top Duration': loader.top_time or 0.0,
-            'Top Frequency': data.get('top_frequency', 0),
-            'Freeze Duration': loader.freeze_time or 0.0,
-            'Freeze Frequency': data.get('freeze_frequency', 0) or len(data.get('freeze_times', [])),
-            'Latency to the Top': first_top_time,
-            'Total Displacement': loader.total_displacement if loader.total_displacement is not None else 0.0,
-            'Average Speed': loader.avg_speed if loader.avg_speed is not None else 0.0,
-            'Tank Shape': loader.tank_info.get('tank_shape', 'Unknown'),
-            'Folder Name': base
-        })
-
-    df = pd.DataFrame(records)
+        group = extract_group(record['Folder Name'], fuzzy_match, group_map)
+        rows.append({'Group': group, **record})
+    return pd.DataFrame(rows)
+
+def build_stats_table(folders, records, fuzzy_match=False, extra_stats=()):
+    """Assign groups to already loaded per-sample records (None entries are skipped) and summarize them"""
+    df = build_sample_table(folders, records, fuzzy_match)
     if df.empty:
         return df
+    return summarize_groups(df, NUMERIC_COLS, extra_stats)
 
-    df = df.sort_values('Group')
-
-    numeric_cols = ['Top Duration', 'Top Frequency', 'Freeze Duration', 'Freeze Frequency',
-                    'Latency to the Top', 'Total Displacement', 'Average Speed']
-    grouped = df.groupby('Group')
-
-    final_df = pd.DataFrame()
-    for group, group_df in grouped:
-        final_df = pd.concat([final_df, group_df], ignore_index=True)
-
-        sample_size = len(group_df)
-        mean_row = {'Group': f'Mean (n={sample_size})'}
-        for col in numeric_cols:
-            mean_row[col] = group_df[col].mean() if group_df[col].notna().any() else 0.0
-        mean_row['Tank Shape'] = ''
-        mean_row['Folder Name'] = ''
-
-        final_df = pd.concat([final_df, pd.DataFrame([mean_row])], ignore_index=True)
-        final_df = pd.concat([final_df, pd.DataFrame([{}])], ignore_index=True)
-
-    return final_df
-
-class StatsGUI(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.language = 'EN'  # 默认英文
-        self.texts = LANGUAGES[self.language]
-        self.title(self.texts['title'])
-        self.geometry('600x450')
-        self.folders = []
-        self.fuzzy_match = tk.BooleanVar(value=False)
-        self.build_ui()
-
-    def build_ui(self):
-        # 第一行：文件夹标签和语言选择
-        top_frame = tk.Frame(self)
-        top_frame.pack(fill='x', padx=10, pady=5)
-        self.folder_label = tk.Label(top_frame, text=self.texts['folder_label'])
-        self.folder_label.pack(side='left', anchor='w')
-        lang_frame = tk.Frame(top_frame)
-        lang_frame.pack(side='right')
-        tk.Label(lang_frame, text='Language:').pack(side='left')
-        self.lang_var = tk.StringVar(value=self.language)
-        self.lang_menu = ttk.Combobox(lang_frame, textvariable=self.lang_var, values=['简中', 'EN'], state='readonly', width=5)
-        self.lang_menu.pack(side='left')
-        self.lang_menu.bind('<<ComboboxSelected>>', self.switch_language)
-
-        self.lb = tk.Listbox(self, selectmode=tk.EXTENDED)
-        self.lb.pack(fill='both', expand=True, padx=10)
-
-        frame = tk.Frame(self)
-        frame.pack(fill='x', padx=10, pady=5)
-        self.add_button = tk.Button(frame, text=self.texts['add_button'], command=self.add_folder)
-        self.add_button.pack(side='left')
-        self.remove_button = tk.Button(frame, text=self.texts['remove_button'], command=self.remove_selected)
-        self.remove_button.pack(side='left', padx=5)
-        self.fuzzy_check = tk.Checkbutton(frame, text=self.texts['fuzzy_check'], variable=self.fuzzy_match,
-                                         state='disabled' if not FUZZY_AVAILABLE else 'normal')
-        self.fuzzy_check.pack(side='left', padx=5)
-        self.fuzzy_info = tk.Label(frame, text='ⓘ', font=('Arial', 8), fg='black')
-        self.fuzzy_info.pack(side='left', padx=2)
-        ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])
-
-        out_frame = tk.Frame(self)
-        out_frame.pack(fill='x', padx=10, pady=5)
-        self.output_label = tk.Label(out_frame, text=self.texts['output_label'])
-        self.output_label.pack(side='left')
-        self.out_entry = tk.Entry(out_frame)
-        self.out_entry.pack(side='left', fill='x', expand=True, padx=5)
-        self.browse_button = tk.Button(out_frame, text=self.texts['browse_button'], command=self.choose_output)
-        self.browse_button.pack(side='left')
-
-        self.generate_button = tk.Button(self, text=self.texts['generate_button'], command=self.generate)
-        self.generate_button.pack(pady=10)
-        self.status = tk.Label(self, text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
-        self.status.pack()
-
-    def switch_language(self, event=None):
-        """Switch language and update UI"""
-        self.language = self.lang_var.get()
-        self.texts = LANGUAGES[self.language]
-        self.title(self.texts['title'])
-        self.folder_label.config(text=self.texts['folder_label'])
-        self.add_button.config(text=self.texts['add_button'])
-        self.remove_button.config(text=self.texts['remove_button'])
-        self.fuzzy_check.config(text=self.texts['fuzzy_check'])
-        self.fuzzy_info_tip = ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])  # 更新提示文本
-        self.output_label.config(text=self.texts['output_label'])
-        self.browse_button.config(text=self.texts['browse_button'])
-        self.generate_button.config(text=self.texts['generate_button'])
-        self.status.config(text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
-
-    def add_folder(self):
-        path = filedialog.askdirectory(title='选择文件夹' if self.language == 'zh' else 'Select Folder')
-        if not path:
-            return
-        for folder in resolve_folders([path]):
-            if folder not in self.folders:
-                self.folders.append(folder)
-                self.lb.insert('end', folder)
-
-    def remove_selected(self):
-        for i in reversed(self.lb.curselection()):
-            self.folders.pop(i)
-            self.lb.delete(i)
-
-    def choose_output(self):
-        path = filedialog.asksaveasfilename(defaultextension='.xlsx',
-                                           filetypes=[('Excel', '*.xlsx'), ('CSV', '*.csv')],
-                                           title='选择输出路径' if self.language == 'zh' else 'Select Output Path')
-        if path:
-            self.out_entry.delete(0, 'end')
-            self.out_entry.insert(0, path)
-
-    def generate(self):
-        out = self.out_entry.get().strip()
-        if not self.folders:
-            return messagebox.showwarning(self.texts['no_folders'], self.texts['no_folders_msg'])
-        if not out:
-            return messagebox.showwarning(self.texts['no_output'], self.texts['no_output_msg'])
-
-        fuzzy = self.fuzzy_match.get()
-        if fuzzy and not FUZZY_AVAILABLE:
-            return messagebox.showwarning(self.texts['no_fuzzy'], self.texts['no_fuzzy_msg'])
-
-        df = collect_stats(self.folders, fuzzy_match=fuzzy)
-
-        if df.empty:
-            return messagebox.showinfo(self.texts['no_data'], self.texts['no_data_msg'])
-        try:
-            if out.lower().endswith('.xlsx'):
-                writer = pd.ExcelWriter(out, engine='xlsxwriter')
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-                worksheet = writer.sheets['Sheet1']
-                for i, col in enumerate(df.columns):
-                    max_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                    worksheet.set_column(i, i, max_len)
-                writer.close()
+def compare_to_control(folders, records, control, fuzzy_match=False, n_resamples=10000, confidence=0.95, seed=0):
+    """Compare every group with the control group on each numeric column (bootstrap CI and permutation p-value).
+
+    control is resolved like a folder's group name (lowercased, and mapped through the fuzzy group map when
+    fuzzy_match is on), so e.g. 'Caffiene' finds the merged 'caffeine' group.
+    """
+    from comparisons import compare_groups
+    group_map = build_group_map(folders) if fuzzy_match and FUZZY_AVAILABLE else None
+    control = extract_group(control, fuzzy_match, group_map)
+    df = build_sample_table(folders, records, fuzzy_match)
+    if df.empty or control not in set(df['Group']):
+        raise ValueError(f"Control group '{control}' not found")
+    return compare_groups(df, NUMERIC_COLS, control, n_resamples, confidence, seed)
+
+def summarize_groups(df, numeric_cols, extra_stats=()):
+    """Sort samples by Group and append group mean rows (plus optional SD/SEM/median rows) and blank rows.
+
+    All group statistics come from a single groupby().agg() pass and the table is assembled with one concat.
+    """
+    import pandas as pd
+    extra_stats = list(dict.fromkeys(extra_stats))  # 重复的选项（如 sd sd）只保留一次，groupby().agg 要求函数名唯一
+    df = df.astype({col: 'float64' for col in numeric_cols})
+    df = df.sort_values('Group', kind='stable', ignore_index=True)
+    grouped = df.groupby('Group', sort=True)
+    funcs = ['mean'] + [SUMMARY_STATS[s][1] for s in extra_stats]
+    agg = grouped[numeric_cols].agg(funcs)
+    counts = grouped.size()
+    n_groups = len(counts)
+
+    # _g: 组序号，_k: 组内行类型（0 样本，1.. 统计行，最后为空行）
+    blocks = [df.assign(_g=grouped.ngroup(), _k=0)]
+    for k, func in enumerate(funcs, start=1):
+        stat = agg.xs(func, axis=1, level=1).reset_index(drop=True)
+        if func == 'mean':
+            stat = stat.fillna(0.0)
+            labels = [f'Mean (n={n})' for n in counts]
+        else:
+            labels = [SUMMARY_STATS[extra_stats[k - 2]][0]] * n_groups
+        stat.insert(0, 'Group', labels)
+        stat['Tank Shape'] = ''
+        stat['Folder Name'] = ''
+        blocks.append(stat.assign(_g=range(n_groups), _k=k))
+    blocks.append(pd.DataFrame({'_g': range(n_groups), '_k': len(funcs) + 1}))
+
+    final_df = pd.concat(blocks, ignore_index=True)
+    final_df = final_df.sort_values(['_g', '_k'], kind='stable', ignore_index=True)
+    return final_df.drop(columns=['_g', '_k'])
+
+def collect_timecourse(folders, bin_seconds, fps=30.0, fuzzy_match=False, sample_files=None,
+                       profiler=NULL_PROFILER):
+    """Bin every sample's speed and top/freeze occupancy into time windows and return per-group mean/SEM curves
+    as a long-format table (Group, Metric, Bin, Start (s), End (s), Mean, SEM, N)."""
+    from timecourse import sample_curves, group_curves
+    group_map = build_group_map(folders) if fuzzy_match and FUZZY_AVAILABLE else None
+    npy_files, groups = [], []
+    for folder in folders:
+        npy_file = find_sample_file(folder, sample_files)
+        if npy_file is not None:
+            npy_files.append(npy_file)
+            groups.append(extract_group(os.path.basename(os.path.normpath(folder)), fuzzy_match, group_map))
+    with profiler.stage('timecourse_bin'):
+        curves, bin_seconds = sample_curves(npy_files, bin_seconds, fps)
+    with profiler.stage('timecourse_summarize'):
+        return group_curves(curves, groups, bin_seconds)
+
+def timecourse_output(output):
+    """Path of the time-course table written next to the summary table"""
+    base, ext = os.path.splitext(output)
+    return f"{base}.timecourse{ext}"
+
+def collect_zones(folders, fuzzy_match=False, zones=None, extra_stats=(), sample_files=None,
+                  profiler=NULL_PROFILER, prefetch=0):
+    """Compute every sample's occupancy fraction of each named tank zone from its heatmap and summarize it like
+    collect_stats (Group, <zone columns>, Tank Shape, Folder Name, with group means and blank rows).
+
+    zones restricts the output to these zone names; samples of unknown tank shapes get empty zone values.
+    prefetch is the number of files read ahead in background threads.
+    """
+    import pandas as pd
+    from loader import discover_samples, prefetch_samples
+    from Findex_Heatmap import load_heatmap_data
+    from tank_geometry import TANK_PRESETS
+    from zone_occupancy import zone_table
+    group_map = build_group_map(folders) if fuzzy_match and FUZZY_AVAILABLE else None
+    blocks = []
+    # 分块加载，同时驻留的热图不超过 ZONE_CHUNK 个；各块的区域列由 concat 按列名对齐
+    for start in range(0, len(folders), ZONE_CHUNK):
+        rows, heatmaps = [], []
+        with profiler.stage('zone_load'):
+            chunk = folders[start:start + ZONE_CHUNK]
+            if sample_files:
+                chunk_files = {folder: sample_files.get(folder, []) for folder in chunk}
+            else:
+                chunk_files = {folder: discover_samples([folder], max_depth=0).get(folder, []) for folder in chunk}
+            for folder, npy_files, contents in prefetch_samples(chunk_files, prefetch):
+                heatmap, tank_shape, scale_factor, folder_name, _ = load_heatmap_data(folder, npy_files, contents)
+                if heatmap is None:
+                    continue
+                rows.append({'Group': extract_group(folder_name, fuzzy_match, group_map),
+                             'Tank Shape': tank_shape, 'Folder Name': folder_name})
+                heatmaps.append((heatmap, tank_shape, scale_factor))
+        if not rows:
+            continue
+        with profiler.stage('zone_occupancy'):
+            known = [i for i, (_, tank_shape, _) in enumerate(heatmaps) if tank_shape in TANK_PRESETS]
+            columns, values = zone_table(*zip(*[heatmaps[i] for i in known]), zones) if known else ([], None)
+        block = pd.DataFrame(rows)
+        zone_df = pd.DataFrame(values, columns=columns, index=known).reindex(range(len(rows)))
+        blocks.append(pd.concat([block[['Group']], zone_df, block[['Tank Shape', 'Folder Name']]], axis=1))
+    if not blocks:
+        return pd.DataFrame()
+    df = pd.concat(blocks, ignore_index=True)
+    zone_cols = [col for col in df.columns if col not in ('Group', 'Tank Shape', 'Folder Name')]
+    df = df[['Group', *zone_cols, 'Tank Shape', 'Folder Name']]
+    with profiler.stage('zone_summarize'):
+        return summarize_groups(df, zone_cols, extra_stats)
+
+def zones_output(output):
+    """Path of the zone-occupancy table written next to the summary table"""
+    base, ext = os.path.splitext(output)
+    return f"{base}.zones{ext}"
+
+def watch_stats(paths, output, fuzzy_match=False, jobs=1, cache=None, extra_stats=(), interval=5.0, settle=2.0,
+                discover_options=None, max_polls=None, prefetch=0, streaming=False, stats_control=None,
+                stats_options=None):
+    """Keep the summary table up to date: only new or modified samples are loaded, then the table is rewritten.
+
+    Per-sample records stay in memory, so an update costs one load per changed sample plus one groupby over
+    the records; samples whose files are still being written are picked up once they settle.
+    With stats_control, the Statistics sheet is recomputed from the in-memory records on every update
+    (stats_options are the n_resamples/confidence/seed keyword arguments of compare_to_control); it is left out
+    until the control group has samples.
+    """
+    from watcher import SampleWatcher
+    records = {}
+
+    def update(changed, removed):
+        for folder in removed:
+            records.pop(folder, None)
+        folders = list(changed)
+        for folder, record in zip(folders, load_sample_records(folders, jobs, cache, changed, prefetch=prefetch)):
+            if record is None:
+                records.pop(folder, None)
             else:
-                df.to_csv(out, index=False)
-            self.status.config(text=f"{self.texts['success']}{os.path.basename(out)}")
-        except Exception as e:
-            messagebox.showerror(self.texts['error'], str(e))
+                records[folder] = record
+        folders = sorted(records)
+        current = [records[f] for f in folders]
+        sheets = {}
+        if stats_control:
+            try:
+                sheets['Statistics'] = compare_to_control(folders, current, stats_control, fuzzy_match,
+                                                          **(stats_options or {}))
+            except ValueError as e:
+                print(f'Statistics skipped: {e}')
+        write_table(build_stats_table(folders, current, fuzzy_match, extra_stats), output, sheets, streaming)
+        print(f'[{time.strftime("%H:%M:%S")}] {len(changed)} new/modified, {len(removed)} removed, '
+              f'{len(records)} samples -> {output}')
+
+    watcher = SampleWatcher(paths, settle=settle, **(discover_options or {}))
+    watcher.watch(update, interval=interval, max_polls=max_polls)
 
 def main():
     parser = argparse.ArgumentParser(description="Statistics aggregation tool with optional fuzzy matching")
     parser.add_argument('--folders', nargs='+', help='List of folder paths')
-    parser.add_argument('--output', help='Output file path (.xlsx or .csv)')
+    parser.add_argument('--output', help='Output file path (.xlsx, .csv, .parquet or .feather)')
+    parser.add_argument('--stream-xlsx', action='store_true',
+                        help='Write .xlsx output in constant-memory mode (for very large tables)')
     parser.add_argument('--fuzzy', action='store_true', help='Enable fuzzy matching')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of worker processes for loading samples (0 = all CPU cores)')
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--no-cache', action='store_true', help='Do not read or write the per-sample cache')
+    cache_group.add_argument('--rebuild-cache', action='store_true', help='Discard the per-sample cache and rebuild it')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE, help='Per-sample cache file path')
+    parser.add_argument('--summary-stats', nargs='+', choices=list(SUMMARY_STATS), default=[],
+                        help='Extra group rows to add after each group mean')
+    parser.add_argument('--timecourse', type=float, metavar='SECONDS',
+                        help='Also write per-group mean/SEM curves binned into windows of this many seconds')
+    parser.add_argument('--fps', type=float, default=30.0, help='Frame rate of the speed series (for --timecourse)')
+    parser.add_argument('--stats-control', metavar='GROUP',
+                        help='Compare every group with this control group (bootstrap CI and permutation test)')
+    parser.add_argument('--stats-resamples', type=int, default=10000,
+                        help='Number of bootstrap resamples and permutations for --stats-control')
+    parser.add_argument('--stats-confidence', type=float, default=0.95, help='Confidence level of the bootstrap CI')
+    parser.add_argument('--stats-seed', type=int, default=0, help='Random seed for --stats-control resampling')
+    parser.add_argument('--zones', nargs='*', metavar='ZONE',
+                        help='Also write per-sample and group-mean occupancy of named tank zones computed from the '
+                             'heatmaps (all zones if no names are given)')
+    parser.add_argument('--tank-config',
+                        help='Custom tank shapes and zones JSON for --zones (default ~/.findex/tank_shapes.json, '
+                             'loaded if present)')
+    parser.add_argument('--depth', type=int, default=1,
+                        help='How many directory levels below a parent folder to search for samples')
+    parser.add_argument('--include', nargs='+', default=[], help='Only use sample folders matching these patterns')
+    parser.add_argument('--exclude', nargs='+', default=[], help='Skip folders matching these patterns')
+    parser.add_argument('--scan-threads', type=int, default=0,
+                        help='Threads for listing directories (useful on network storage, 0 = single thread)')
+    parser.add_argument('--prefetch', type=int, default=0, metavar='K',
+                        help='Read the next K sample files ahead in background threads while the current one is '
+                             'decoded (useful on network storage, 0 = off)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and update the output when sample folders are added or modified')
+    parser.add_argument('--watch-interval', type=float, default=5.0, help='Seconds between scans in --watch mode')
+    parser.add_argument('--watch-settle', type=float, default=2.0,
+                        help='Ignore samples whose .npy files were modified less than this many seconds ago')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage time and memory and write <output>.profile.json')
+    parser.add_argument('--profile-top', type=int, default=10, help='Number of slowest sample folders to report')
+    parser.add_argument('--profile-no-trace', action='store_true',
+                        help='With --profile, skip tracemalloc (more accurate wall times, RSS only)')
     args = parser.parse_args()
 
+    if args.watch:
+        # 这些输出需要每次更新时重新读取全部样本，监视模式不支持，明确报错而不是静默忽略
+        unsupported = [flag for flag, value in (('--timecourse', args.timecourse), ('--zones', args.zones),
+                                                ('--profile', args.profile)) if value not in (None, False)]
+        if unsupported:
+            parser.error(f"--watch cannot be combined with {', '.join(unsupported)}")
+
     if args.folders and args.output:
         if args.fuzzy and not FUZZY_AVAILABLE:
             print("Error: Fuzzy matching requires fuzzywuzzy")
             return
-        df = collect_stats(resolve_folders(args.folders), fuzzy_match=args.fuzzy)
-        if args.output.lower().endswith('.xlsx'):
-            writer = pd.ExcelWriter(args.output, engine='xlsxwriter')
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-            worksheet = writer.sheets['Sheet1']
-            for i, col in enumerate(df.columns):
-                max_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                worksheet.set_column(i, i, max_len)
-            writer.close()
-        else:
-            df.to_csv(args.output, index=False)
+        cache = None if args.no_cache else RecordCache(args.cache_file, rebuild=args.rebuild_cache,
+                                                          fields=RECORD_FIELDS)
+        if args.watch:
+            discover_options = {'max_depth': args.depth, 'include': args.include, 'exclude': args.exclude,
+                                'threads': args.scan_threads}
+            print(f'Watching {", ".join(args.folders)} (Ctrl+C to stop)')
+            watch_stats(args.folders, args.output, fuzzy_match=args.fuzzy, jobs=args.jobs, cache=cache,
+                        extra_stats=args.summary_stats, interval=args.watch_interval, settle=args.watch_settle,
+                        discover_options=discover_options, prefetch=args.prefetch, streaming=args.stream_xlsx,
+                        stats_control=args.stats_control,
+                        stats_options={'n_resamples': args.stats_resamples, 'confidence': args.stats_confidence,
+                                       'seed': args.stats_seed})
+            return
+        profiler = NULL_PROFILER
+        if args.profile:
+            profiler = Profiler(top_n=args.profile_top, trace_memory=not args.profile_no_trace)
+        from loader import discover_samples
+        with profiler.stage('discover'):
+            samples = discover_samples(args.folders, args.depth, args.include, args.exclude, args.scan_threads)
+        folders = list(samples)
+        records = load_sample_records(folders, args.jobs, cache, samples, profiler, args.prefetch)
+        with profiler.stage('summarize'):
+            df = build_stats_table(folders, records, args.fuzzy, args.summary_stats)
+        sheets = {}
+        if args.stats_control:
+            with profiler.stage('statistics'):
+                try:
+                    sheets['Statistics'] = compare_to_control(folders, records, args.stats_control, args.fuzzy,
+                                                              args.stats_resamples, args.stats_confidence,
+                                                              args.stats_seed)
+                except ValueError as e:
+                    # 统计表失败时仍写出汇总表，与 watch_stats 一致
+                    print(f'Statistics skipped: {e}')
+        try:
+            with profiler.stage('write'):
+                write_table(df, args.output, sheets, streaming=args.stream_xlsx)
+        except ImportError as e:
+            print(f"Error: {e}")
+            return
         print(f'Saved to {args.output}')
+        if args.timecourse:
+            curves = collect_timecourse(folders, args.timecourse, args.fps, fuzzy_match=args.fuzzy,
+                                        sample_files=samples, profiler=profiler)
+            with profiler.stage('write'):
+                write_table(curves, timecourse_output(args.output), streaming=args.stream_xlsx)
+            print(f'Saved to {timecourse_output(args.output)}')
+        if args.zones is not None:
+            from tank_geometry import DEFAULT_TANK_CONFIG, load_tank_config
+            tank_config = args.tank_config or (DEFAULT_TANK_CONFIG if os.path.exists(DEFAULT_TANK_CONFIG) else None)
+            if tank_config:
+                load_tank_config(tank_config)
+            zone_df = collect_zones(folders, args.fuzzy, args.zones or None, args.summary_stats, samples, profiler,
+                                    args.prefetch)
+            with profiler.stage('write'):
+                write_table(zone_df, zones_output(args.output), streaming=args.stream_xlsx)
+            print(f'Saved to {zones_output(args.output)}')
+        if profiler.enabled:
+            report = profiler.write(os.path.splitext(args.output)[0] + '.profile.json')
+            print(f'Profile: {profiler.summary()} -> {report}')
     else:
+        # GUI 依赖（tkinter）只在打开界面时导入，命令行运行不需要 Tk
+        from data_gui import StatsGUI
         StatsGUI().mainloop()
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # PyInstaller 打包后子进程需要
     main()
\ No newline at end of file
@@ -6,27 +6,52 @@ Findex_Heatmap.py
 从样本文件夹或母文件夹（GroupName_Index 子目录结构）读取 .npy 文件中的 heatmap_data，
 按组合并相同类型鱼缸的热图，生成平滑热图，保存为 <group_name> (n=x).png。
 热图标准化为每秒停留概率，矩形热图添加顶部判定线。
+图形界面位于 heatmap_gui.py；tkinter、matplotlib、cv2 只在实际使用的代码路径中导入，
+命令行运行（及 --help）启动更快，且可在无 Tk 的服务器上运行。
 
-预设：
+每次合并后，各组未平滑的合并热图写入 <输出文件夹>/merged_heatmaps.npz（见 heatmap_cache.py）：
+只修改平滑核大小、透明度或渲染方式时，--render_only 直接从缓存重新平滑与渲染，不再读取样本；
+--from_cache 在样本文件未变化（输入指纹一致）时使用缓存，否则重新合并。
+
+平滑由 smoothing.py 完成（float32）：--smoothing auto 按核大小在 GaussianBlur 与缩小后平滑之间选择，
+相同尺寸的组在一次批量调用中平滑；--mask_aware 使用归一化卷积，缸外的 0 值不会拉低缸壁附近的数值。
+
+参数扫描：--kernel_sizes 15 31 61 只读取、合并一次样本，由同一合并结果生成每个平滑核的热图，
+写入 <输出文件夹>/kernel_<k>/（所有核的渲染任务一起交给 --render_jobs 并行渲染）；
+--contact_sheet 另把每组各核的热图横向拼成 <输出文件夹>/<组名> (n=x) contact.png。
+
+预设（见 tank_geometry.py，可通过 --tank_config 注册自定义多边形鱼缸）：
 - Rectangle: width=200mm, height=200mm, scale_factor=5
 - Trapezoid: top_width=270mm, bottom_width=220mm, height=145mm, scale_factor=5
 
 用法：
     python Findex_Heatmap.py                # 打开 GUI
     python Findex_Heatmap.py --folders <path1> <path2> ... --output_dir output_folder [--fuzzy] [--kernel_size 15] [--heatmap_alpha 0.8]
+                            [--duration_weighted] [--smoothing auto|gaussian|fft|downsample] [--mask_aware]
+                            [--kernel_sizes 15 31 61 [--contact_sheet]]
+                            [--render_jobs N] [--fast_render [--no_colorbar]]
+                            [--tank_config tank_shapes.json]
+                            [--from_cache] [--cache_file PATH] [--no_cache]
+                            [--depth N] [--include PATTERN ...] [--exclude PATTERN ...] [--scan_threads N] [--prefetch K]
+                            [--profile [--profile_top N] [--profile_no_trace]]
+                            [--log_level DEBUG|INFO|WARNING|ERROR] [--log_file run.jsonl]
+                            [--watch [--watch_interval SECONDS] [--watch_settle SECONDS]]
+    python Findex_Heatmap.py --render_only --output_dir output_folder [--kernel_size 31] [--heatmap_alpha 0.6] ...
 """
 import os
-import glob
+import time
 import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.colors import Normalize
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-import cv2
-from loader import HeatmapLoader, BehaviorLoader
+from loader import HeatmapLoader, BehaviorLoader, read_sample, discover_samples, prefetch_samples
+from profiler import Profiler, NULL_PROFILER, stop_worker_tracing
+from tank_geometry import TANK_PRESETS, DEFAULT_TANK_CONFIG, load_tank_config, tank_size, tank_mask, apply_tank_mask
+from heatmap_cache import CachedGroup, cache_path, input_fingerprint, load_merged, save_merged
+from smoothing import STRATEGIES, smooth_batch
 from datetime import datetime
-import logging  # 引入 logging 模块
+import logging
+from diagnostics import LOG_LEVELS, SampleSummary, configure_logging
 
 try:
     from fuzzywuzzy import process, fuzz
@@ -34,97 +59,17 @@ try:
 except ImportError:
     FUZZY_AVAILABLE = False
 
-# 设置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# 鱼缸预设
-TANK_PRESETS = {
-    "rectangle": {"real_width_mm": 200, "real_height_mm": 200, "scale_factor": 5},
-    "trapezoid": {"real_width_top_mm": 270, "real_width_bottom_mm": 220, "real_height_mm": 145, "scale_factor": 5}
-}
-
-# 语言字典（保持不变）
-LANGUAGES = {
-    '简中': {
-        'title': 'Findex_Heatmap_1.0.1',
-        'folder_label': '请选择样本文件夹（支持母文件夹，显示子文件夹）：',
-        'add_button': '添加文件夹',
-        'remove_button': '删除选中',
-        'fuzzy_check': '启用自动模糊匹配',
-        'fuzzy_tip': '提示：模糊匹配需要安装 fuzzywuzzy',
-        'fuzzy_info': '模糊检索文件夹的组命名，将名称相近的样本\n自动分为一组（如 "Caffiene" 和 "caffeine"）',
-        'kernel_label': '平滑核大小:',
-        'alpha_label': '热图透明度:',
-        'output_label': '输出文件夹：',
-        'browse_button': '浏览',
-        'generate_button': '生成合并热图',
-        'no_folders': '警告',
-        'no_folders_msg': '请先添加文件夹',
-        'no_output': '警告',
-        'no_output_msg': '请选择输出文件夹',
-        'no_fuzzy': '警告',
-        'no_fuzzy_msg': '模糊匹配需要安装 fuzzywuzzy',
-        'no_data': '提示',
-        'no_data_msg': '未找到有效 heatmap_data 或合并失败',
-        'success': '✅ 已保存 '
-    },
-    'EN': {
-        'title': 'Findex_Heatmap_1.0.1',
-        'folder_label': 'Please select sample folders (supports parent folders with subfolders):',
-        'add_button': 'Add Folder',
-        'remove_button': 'Remove Selected',
-        'fuzzy_check': 'Enable Fuzzy Matching',
-        'fuzzy_tip': 'Note: Fuzzy matching requires fuzzywuzzy',
-        'fuzzy_info': 'Fuzzy search the group naming of the folder,'
-                      '\n and automatically group the samples with similar'
-                      '\n names into one group. (e.g., "Caffiene" and "caffeine")',
-        'kernel_label': 'Kernel Size:',
-        'alpha_label': 'Heatmap Alpha:',
-        'output_label': 'Output Folder:',
-        'browse_button': 'Browse',
-        'generate_button': 'Generate Merged Heatmaps',
-        'no_folders': 'Warning',
-        'no_folders_msg': 'Please add folders first',
-        'no_output': 'Warning',
-        'no_output_msg': 'Please select an output folder',
-        'no_fuzzy': 'Warning',
-        'no_fuzzy_msg': 'Fuzzy matching requires fuzzywuzzy',
-        'no_data': 'Info',
-        'no_data_msg': 'No valid heatmap_data found or merging failed',
-        'success': '✅ Saved '
-    }
-}
-
-# ToolTip 类（保持不变）
-class ToolTip:
-    def __init__(self, widget, text):
-        self.widget = widget
-        self.text = text
-        self.tip_window = None
-        self.widget.bind("<Enter>", self.show_tip)
-        self.widget.bind("<Leave>", self.hide_tip)
-
-    def show_tip(self, event):
-        if self.tip_window or not self.text:
-            return
-        x = self.widget.winfo_rootx() + 20
-        y = self.widget.winfo_rooty() + self.widget.winfo_height()
-        self.tip_window = tw = tk.Toplevel(self.widget)
-        tw.wm_overrideredirect(True)
-        tw.wm_geometry(f"+{x}+{y}")
-        label = tk.Label(tw, text=self.text, justify='left', background="#ffffe0", relief='solid', borderwidth=1)
-        label.pack()
-
-    def hide_tip(self, event):
-        if self.tip_window:
-            self.tip_window.destroy()
-            self.tip_window = None
-
-def load_heatmap_data(folder):
-    """从文件夹加载 heatmap_data 和其他元数据，遍历所有 .npy 文件以确保兼容性"""
-    npy_files = glob.glob(os.path.join(folder, '*.npy'))
+# 日志在 main() 中按 --log_level 配置；热路径只使用惰性 %-style 格式化
+logger = logging.getLogger('findex.heatmap')
+
+def load_heatmap_data(folder, npy_files=None, contents=None):
+    """从文件夹加载 heatmap_data 和其他元数据，遍历所有 .npy 文件以确保兼容性；
+    npy_files 为 discover_samples 已列出的文件，给定时不再重新列举目录；
+    contents 为 prefetch_samples 预读的 {文件: 内容}，给定时直接反序列化内存中的内容"""
+    if npy_files is None:
+        npy_files = discover_samples([folder], max_depth=0).get(folder, [])
     if not npy_files:
-        logging.info(f"No .npy files found in {folder}")
+        logger.info("No .npy files found in %s", folder)
         return None, None, None, None, None
 
     heatmap = None
@@ -133,119 +78,67 @@ def load_heatmap_data(folder):
     total_duration = None
     folder_name = os.path.basename(os.path.normpath(folder))
 
-    # 遍历所有 .npy 文件，尝试加载热图和元数据
+    # 遍历所有 .npy 文件，尝试加载热图和元数据；每个文件只读取、反序列化一次，
+    # 由 HeatmapLoader / BehaviorLoader 共享同一份样本字典
     for npy_file in npy_files:
         try:
-            # 尝试用 HeatmapLoader 加载
-            heatmap_loader = HeatmapLoader(npy_file)
-            heatmap_data = np.load(npy_file, allow_pickle=True)
-            logging.info(f"Keys in {npy_file}: {list(heatmap_data.item().keys()) if isinstance(heatmap_data, np.ndarray) and heatmap_data.ndim == 0 else 'Not a dict'}")
+            payload = read_sample(npy_file, data=contents.get(npy_file) if contents else None)
+            logger.debug("Read %s: %s", npy_file, SampleSummary(payload))
+            if 'heatmap_data' not in payload:
+                # 行为数据文件等不含热图，与 HeatmapLoader 抛出 ValueError 时一样跳过
+                logger.debug("No heatmap_data in %s, skipped", npy_file)
+                continue
+            heatmap_loader = HeatmapLoader.from_dict(payload)
             if heatmap_loader.heatmap is not None and np.any(heatmap_loader.heatmap):
                 heatmap = heatmap_loader.heatmap
                 # 如果是新版本，热图文件中包含元数据
                 data = heatmap_loader.get_processed()
-                logging.info(f"Processed data from HeatmapLoader {npy_file}: {data}")
+                logger.debug("Processed data from HeatmapLoader %s: %s", npy_file, SampleSummary(data))
                 if 'tank_shape' in data:
                     tank_shape = data.get('tank_shape', 'unknown')
                     scale_factor = data.get('scale_factor', TANK_PRESETS.get(tank_shape, {}).get('scale_factor', 5))
                     total_duration = data.get('total_duration', None)
-                    logging.info(f"Loaded heatmap and metadata from {npy_file}: shape={heatmap.shape}, tank_shape={tank_shape}")
+                    logger.info("Loaded heatmap and metadata from %s: shape=%s, tank_shape=%s",
+                                npy_file, heatmap.shape, tank_shape)
                     return heatmap, tank_shape, scale_factor, folder_name, total_duration
                 # 如果没有元数据，继续寻找
 
             # 尝试用 BehaviorLoader 加载元数据（老版本或分离存储）
-            beh_loader = BehaviorLoader(npy_file)
+            beh_loader = BehaviorLoader.from_dict(payload, npy_file)
             beh_data = beh_loader.get_processed()
-            logging.info(f"Processed data from BehaviorLoader {npy_file}: {beh_data}")
+            logger.debug("Processed data from BehaviorLoader %s: %s", npy_file, SampleSummary(beh_data))
             if beh_data:
                 tank_shape = beh_data.get('tank_shape', 'unknown')
                 scale_factor = beh_data.get('scale_factor', TANK_PRESETS.get(tank_shape, {}).get('scale_factor', 5))
                 total_duration = beh_data.get('total_duration', None)
-                logging.info(f"Loaded metadata from {npy_file}: tank_shape={tank_shape}")
+                logger.info("Loaded metadata from %s: tank_shape=%s", npy_file, tank_shape)
 
         except Exception as e:
-            logging.error(f"Error processing {npy_file}: {e}")
+            logger.error("Error processing %s: %s", npy_file, e)
             continue
 
-    # 如果找到元数据但缺少热图，再次遍历寻找热图
-    if tank_shape != 'unknown' and heatmap is None:
-        for npy_file in npy_files:
-            try:
-                heatmap_loader = HeatmapLoader(npy_file)
-                if heatmap_loader.heatmap is not None and np.any(heatmap_loader.heatmap):
-                    heatmap = heatmap_loader.heatmap
-                    logging.info(f"Loaded heatmap from {npy_file}: shape={heatmap.shape}")
-                    return heatmap, tank_shape, scale_factor, folder_name, total_duration
-            except Exception as e:
-                logging.error(f"Error loading heatmap from {npy_file}: {e}")
-                continue
-
-    # 如果仍未找到有效热图
+    # 热图在第一次遍历中已保留（找到有效热图即返回），无需再次加载文件
     if heatmap is None or not np.any(heatmap):
-        logging.info(f"No valid heatmap data found in {folder}")
+        logger.info("No valid heatmap data found in %s", folder)
         return None, None, None, None, None
 
     return heatmap, tank_shape, scale_factor, folder_name, total_duration
 
-def resolve_folders(paths):
-    """解析文件夹路径，找到包含 .npy 文件的子目录"""
-    valid = []
-    for p in paths:
-        if not os.path.isdir(p):
-            continue
-        if glob.glob(os.path.join(p, '*.npy')):
-            valid.append(p)
-            continue
-        for sub in os.listdir(p):
-            subp = os.path.join(p, sub)
-            if os.path.isdir(subp) and glob.glob(os.path.join(subp, '*.npy')):
-                valid.append(subp)
-    return sorted(set(valid))
+def resolve_folders(paths, max_depth=1, include=None, exclude=None, threads=0):
+    """解析文件夹路径，返回包含 .npy 文件的样本文件夹（已排序）"""
+    return list(discover_samples(paths, max_depth, include, exclude, threads))
 
 def resize_heatmap(heatmap, current_scale, target_scale, tank_shape):
-    """根据 scale_factor 调整热图大小"""
+    """根据 scale_factor 调整热图大小（最近邻），目标尺寸由鱼缸几何决定"""
+    import cv2
     if current_scale == target_scale:
         return heatmap
+    target_height, target_width = tank_size(tank_shape, target_scale)
+    return cv2.resize(heatmap, (target_width, target_height), interpolation=cv2.INTER_NEAREST)
 
-    preset = TANK_PRESETS.get(tank_shape)
-    if not preset:
-        raise ValueError(f"未知的鱼缸类型: {tank_shape}")
-
-    if tank_shape == "rectangle":
-        target_width = int(preset["real_width_mm"] / target_scale)
-        target_height = int(preset["real_height_mm"] / target_scale)
-    else:  # trapezoid
-        target_width = int(max(preset["real_width_top_mm"], preset["real_width_bottom_mm"]) / target_scale)
-        target_height = int(preset["real_height_mm"] / target_scale)
-
-    scale_ratio = current_scale / target_scale
-    if scale_ratio >= 1:
-        resized = np.zeros((target_height, target_width), dtype=np.float32)
-        h, w = min(int(heatmap.shape[0] * scale_ratio), target_height), min(int(heatmap.shape[1] * scale_ratio), target_width)
-        resized[:h, :w] = heatmap[:h, :w]
-    else:
-        resized = cv2.resize(heatmap, (target_width, target_height), interpolation=cv2.INTER_NEAREST)
-    return resized
-
-def normalize_heatmap(heatmap, tank_shape):
-    """梯形鱼缸填充黑色"""
-    preset = TANK_PRESETS.get(tank_shape)
-    if tank_shape == "trapezoid":
-        expected_width = int(max(preset["real_width_top_mm"], preset["real_width_bottom_mm"]) / TANK_PRESETS[tank_shape]["scale_factor"])
-        expected_height = int(preset["real_height_mm"] / TANK_PRESETS[tank_shape]["scale_factor"])
-        mask = np.ones_like(heatmap, dtype=bool)
-        top_width = int(preset["real_width_top_mm"] / TANK_PRESETS[tank_shape]["scale_factor"])
-        bottom_width = int(preset["real_width_bottom_mm"] / TANK_PRESETS[tank_shape]["scale_factor"])
-        for y in range(expected_height):
-            width_at_y = int(custom_map(y, 0, expected_height - 1, top_width, bottom_width))
-            offset = (expected_width - width_at_y) // 2
-            mask[y, offset:offset + width_at_y] = False
-        heatmap[mask] = 0
-    return heatmap
-
-def custom_map(value, in_min, in_max, out_min, out_max):
-    """线性映射函数"""
-    return out_min + (value - in_min) * (out_max - out_min) / (in_max - in_min)
+def normalize_heatmap(heatmap, tank_shape, scale_factor=None):
+    """将鱼缸外区域（如梯形两侧）原地填充为 0，掩膜按 (鱼缸, scale_factor, 尺寸) 缓存"""
+    return apply_tank_mask(heatmap, tank_shape, scale_factor)
 
 def build_group_map(folders):
     """自动构建组名映射表"""
@@ -266,267 +159,498 @@ def build_group_map(folders):
             group_map[group] = group
     return group_map
 
-def merge_heatmaps(folders, output_dir, fuzzy_match=False, kernel_size=15, heatmap_alpha=0.8):
-    """按组合并热图并保存"""
-    heatmaps = []
-    tank_shapes = []
-    scale_factors = []
-    folder_names = []
-    total_durations = []
-
-    sub_folders = resolve_folders(folders)
-    for folder in sub_folders:
-        heatmap, tank_shape, scale_factor, folder_name, total_duration = load_heatmap_data(folder)
-        if heatmap is not None and np.any(heatmap):  # 确保热图非空
-            heatmaps.append(heatmap)
-            tank_shapes.append(tank_shape)
-            scale_factors.append(scale_factor)
-            folder_names.append(folder_name)
-            total_durations.append(total_duration)
-
-    if not heatmaps:
-        logging.info("未找到有效的 heatmap_data")
-        return []
-
-    # 模糊匹配组名
-    group_map = build_group_map(sub_folders) if fuzzy_match and FUZZY_AVAILABLE else None
+class HeatmapAccumulator:
+    """
+    按组流式累加热图：样本加载后立即累加进运行和并丢弃，内存只与组数（及组内不同
+    scale_factor 数）有关，与样本数无关。
+
+    缩放（最近邻 / 裁剪补零）与鱼缸掩膜都是逐像素的线性操作，因此按原始 scale_factor
+    分桶累加、在 merged() 中对每个桶的和统一缩放并掩膜，与逐个样本处理后再求平均等价。
+    duration_weighted=True 时每个样本先除以自身 total_duration（无时长的样本除以组平均时长），
+    使每条鱼对概率图的贡献相同。
+    """
+    def __init__(self, tank_shape, duration_weighted=False):
+        self.tank_shape = tank_shape
+        self.duration_weighted = duration_weighted
+        self.count = 0
+        self.duration_sum = 0.0
+        self.duration_count = 0
+        self._sums = {}  # (scale_factor, heatmap.shape) -> [加权和, 无时长样本之和]
+
+    def add(self, heatmap, scale_factor, total_duration):
+        """累加一个样本热图"""
+        key = (scale_factor, heatmap.shape)
+        bucket = self._sums.get(key)
+        if bucket is None:
+            bucket = self._sums[key] = [np.zeros(heatmap.shape, dtype=np.float64),
+                                        np.zeros(heatmap.shape, dtype=np.float64)]
+        if self.duration_weighted and total_duration:
+            bucket[0] += heatmap / total_duration
+        elif self.duration_weighted:
+            bucket[1] += heatmap
+        else:
+            bucket[0] += heatmap
+        self.count += 1
+        if total_duration is not None:
+            self.duration_sum += total_duration
+            self.duration_count += 1
+
+    @property
+    def scale_factor(self):
+        """合并结果的 scale_factor（组内最小的 scale_factor）"""
+        return min(scale for scale, _ in self._sums)
+
+    @property
+    def avg_total_duration(self):
+        """组内有时长记录样本的平均总时长，全部缺失时为 1.0"""
+        return self.duration_sum / self.duration_count if self.duration_count else 1.0
+
+    def merged(self):
+        """返回统一到最小 scale_factor、应用鱼缸掩膜后的平均热图（float32，未平滑）"""
+        target_scale = self.scale_factor
+        total = None
+        for (scale, _), (weighted_sum, undated_sum) in self._sums.items():
+            part = weighted_sum
+            if self.duration_weighted and np.any(undated_sum):
+                part = part + undated_sum / self.avg_total_duration
+            resized = resize_heatmap(part, scale, target_scale, self.tank_shape)
+            total = resized if total is None else total + resized
+        merged = (total / self.count).astype(np.float32)
+        return normalize_heatmap(merged, self.tank_shape, target_scale)
+
+def accumulate_heatmaps(folders, fuzzy_match=False, duration_weighted=False, sample_files=None,
+                        profiler=NULL_PROFILER, prefetch=0):
+    """逐个加载样本并累加到所属组，返回 {组名: HeatmapAccumulator}（按首个有效样本出现顺序）；
+    sample_files 为 discover_samples 的结果，给定时直接使用其中的样本文件夹与文件列表；
+    prefetch > 0 时后台线程提前读取后续 prefetch 个文件（适用于网络存储）"""
+    samples = sample_files if sample_files is not None else discover_samples(folders)
+    group_map = build_group_map(list(samples)) if fuzzy_match and FUZZY_AVAILABLE else None
     groups = {}
-    for i, folder_name in enumerate(folder_names):
-        group_name = extract_group(folder_name, fuzzy_match, group_map)
-        if group_name not in groups:
-            groups[group_name] = {'heatmaps': [], 'tank_shapes': [], 'scale_factors': [], 'total_durations': []}
-        groups[group_name]['heatmaps'].append(heatmaps[i])
-        groups[group_name]['tank_shapes'].append(tank_shapes[i])
-        groups[group_name]['scale_factors'].append(scale_factors[i])
-        groups[group_name]['total_durations'].append(total_durations[i])
+    for folder, npy_files, contents in prefetch_samples(samples, prefetch):
+        add_sample(groups, folder, npy_files, fuzzy_match, group_map, duration_weighted, profiler, contents)
+    return groups
+
+def add_sample(groups, folder, npy_files=None, fuzzy_match=False, group_map=None, duration_weighted=False,
+               profiler=NULL_PROFILER, contents=None):
+    """加载一个样本文件夹并累加到 groups 中所属组的 HeatmapAccumulator，返回组名；未累加时返回 None"""
+    with profiler.stage('load'):
+        start = time.perf_counter()
+        heatmap, tank_shape, scale_factor, folder_name, total_duration = load_heatmap_data(folder, npy_files,
+                                                                                           contents)
+        profiler.record_sample(folder, time.perf_counter() - start)
+    if heatmap is None or not np.any(heatmap):  # 确保热图非空
+        return None
+    group_name = extract_group(folder_name, fuzzy_match, group_map)
+    accumulator = groups.get(group_name)
+    if accumulator is None:
+        accumulator = groups[group_name] = HeatmapAccumulator(tank_shape, duration_weighted)
+    # 组内只合并与首个样本相同类型的鱼缸
+    if tank_shape != accumulator.tank_shape:
+        return None
+    with profiler.stage('accumulate'):
+        accumulator.add(heatmap, scale_factor, total_duration)
+    return group_name
+
+def save_group_heatmap(output_file, heatmap_prob, group_name, sample_size, tank_shape, heatmap_alpha=0.8):
+    """绘制单组概率热图并保存为 PNG（面向对象 Figure API + Agg 画布，不使用全局 pyplot 状态，可在子进程中运行）"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import Normalize
+
+    fig = Figure(figsize=(10, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    norm = Normalize(vmin=heatmap_prob.min(), vmax=heatmap_prob.max())
+    im = ax.imshow(heatmap_prob, cmap='jet', norm=norm, alpha=heatmap_alpha, zorder=1)
+
+    # 添加矩形中间判定线，确保线条不超出热图
+    if tank_shape == "rectangle":
+        top_line_y = heatmap_prob.shape[0] // 2  # 中间位置
+        heatmap_width = heatmap_prob.shape[1]    # 热图宽度
+        ax.plot([0, heatmap_width - 1], [top_line_y, top_line_y], color='red', linestyle='--', linewidth=2,
+                label='Center Line', zorder=50)
+
+    # 添加比例尺
+    cbar = fig.colorbar(im, ax=ax)
+    cbar.set_label('Stay Probability (per second)', rotation=270, labelpad=15)
+    cbar.set_ticks(np.linspace(heatmap_prob.min(), heatmap_prob.max(), 5))
+
+    # 添加组名和样本数
+    ax.text(heatmap_prob.shape[1] - 10, heatmap_prob.shape[0] - 10,
+            f"{group_name} (n={sample_size})",
+            color='white', fontsize=12, ha='right', va='bottom',
+            bbox=dict(facecolor='black', alpha=0.5), zorder=100)
+
+    # 显示图例（可选）
+    if tank_shape == "rectangle":
+        ax.legend(loc='upper right')
+
+    ax.axis('off')
+    fig.savefig(output_file, dpi=300, bbox_inches='tight')
+    return output_file
+
+def render_heatmaps(tasks, render_jobs=1, renderer=None):
+    """渲染所有组的热图；render_jobs > 1 时使用进程池并行，每张图完成即写出，返回路径按组顺序排列"""
+    renderer = renderer or save_group_heatmap
+    if render_jobs is not None and render_jobs <= 0:
+        render_jobs = os.cpu_count() or 1
+    render_jobs = min(render_jobs or 1, len(tasks))
+    if render_jobs <= 1:
+        return [renderer(**task) for task in tasks]
+    results = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=render_jobs, initializer=stop_worker_tracing) as executor:
+        futures = {executor.submit(renderer, **task): i for i, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            logger.info("Rendered %s", results[futures[future]])
+    return results
 
+def merge_heatmaps(folders, output_dir, fuzzy_match=False, kernel_size=15, heatmap_alpha=0.8,
+                   duration_weighted=False, render_jobs=1, fast_render=False, colorbar=True, sample_files=None,
+                   profiler=NULL_PROFILER, cache_file=None, use_cache=False, save_cache=True,
+                   smoothing='auto', mask_aware=False, kernel_sizes=None, contact_sheet=False, prefetch=0):
+    """按组合并热图并保存；fast_render=True 时使用不依赖 matplotlib 的 OpenCV 快速渲染。
+    prefetch > 0 时读取样本的同时在后台预读后续 prefetch 个文件（见 loader/prefetch.py）。
+    smoothing 为平滑策略（见 smoothing.py），mask_aware=True 时按鱼缸掩膜做归一化卷积。
+    kernel_sizes 非空时为参数扫描模式（见 render_merged），忽略 kernel_size。
+    合并结果写入缓存（cache_file，默认 <output_dir>/merged_heatmaps.npz，save_cache=False 时不写）；
+    use_cache=True 且缓存的输入指纹与当前样本一致时跳过读取样本，只重新平滑与渲染"""
+    samples = sample_files if sample_files is not None else discover_samples(folders)
+    path = cache_path(output_dir, cache_file)
+    fingerprint = input_fingerprint(samples, fuzzy_match, duration_weighted) if use_cache or save_cache else None
+    groups = None
+    if use_cache:
+        with profiler.stage('cache_load'):
+            cache = load_merged(path)
+        if cache is not None and cache.fingerprint == fingerprint:
+            logger.info("Using merged heatmap cache %s", path)
+            groups = cache.groups
+        else:
+            logger.info("Merged heatmap cache %s is missing or out of date, merging samples", path)
+
+    if groups is None:
+        accumulators = accumulate_heatmaps(folders, fuzzy_match, duration_weighted, samples, profiler, prefetch)
+        if not accumulators:
+            logger.warning("未找到有效的 heatmap_data")
+            return []
+        with profiler.stage('resize_mask'):
+            groups = {name: CachedGroup.from_accumulator(acc) for name, acc in accumulators.items()}
+        if save_cache:
+            with profiler.stage('cache_save'):
+                save_merged(path, groups, fingerprint, duration_weighted)
+    return render_merged(groups, output_dir, kernel_size, heatmap_alpha, duration_weighted, render_jobs,
+                         fast_render, colorbar, profiler, smoothing, mask_aware, kernel_sizes, contact_sheet)
+
+def render_from_cache(output_dir, kernel_size=15, heatmap_alpha=0.8, render_jobs=1, fast_render=False,
+                      colorbar=True, cache_file=None, profiler=NULL_PROFILER, smoothing='auto', mask_aware=False,
+                      kernel_sizes=None, contact_sheet=False):
+    """只重新平滑与渲染：从合并缓存读取各组热图（不检查输入样本），缓存不存在时返回 []"""
+    path = cache_path(output_dir, cache_file)
+    with profiler.stage('cache_load'):
+        cache = load_merged(path)
+    if cache is None:
+        logger.warning("未找到合并热图缓存: %s", path)
+        return []
+    return render_merged(cache.groups, output_dir, kernel_size, heatmap_alpha, cache.duration_weighted,
+                         render_jobs, fast_render, colorbar, profiler, smoothing, mask_aware, kernel_sizes,
+                         contact_sheet)
+
+def render_merged(groups, output_dir, kernel_size=15, heatmap_alpha=0.8, duration_weighted=False, render_jobs=1,
+                  fast_render=False, colorbar=True, profiler=NULL_PROFILER, smoothing='auto', mask_aware=False,
+                  kernel_sizes=None, contact_sheet=False):
+    """
+    平滑并渲染 {组名: 合并结果}（HeatmapAccumulator 或 CachedGroup），返回输出路径。
+    kernel_sizes 非空时每个核的热图写入 <output_dir>/kernel_<k>/，所有核的任务一起并行渲染；
+    contact_sheet=True 时另为每组写出各核横向拼接的对比图
+    """
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
-    results = []
-
-    for group_name, data in groups.items():
-        heatmaps = data['heatmaps']
-        tank_shapes = data['tank_shapes']
-        scale_factors = data['scale_factors']
-        total_durations = data['total_durations']
-
-        unique_shapes = set(tank_shapes)
-        if len(unique_shapes) > 1:
-            target_shape = tank_shapes[0]
-            heatmaps = [h for h, t in zip(heatmaps, tank_shapes) if t == target_shape]
-            scale_factors = [s for s, t in zip(scale_factors, tank_shapes) if t == target_shape]
-            total_durations = [d for d, t in zip(total_durations, tank_shapes) if t == target_shape]
-        else:
-            target_shape = tank_shapes[0]
-
-        # 统一 scale_factor
-        target_scale = min(scale_factors)
-        resized_heatmaps = [resize_heatmap(h, s, target_scale, target_shape) for h, s in zip(heatmaps, scale_factors)]
-        normalized_heatmaps = [normalize_heatmap(h, target_shape) for h in resized_heatmaps]
-        merged_heatmap = np.mean(normalized_heatmaps, axis=0)
-
-        # 平滑热图
-        kernel_size = kernel_size if kernel_size % 2 == 1 else kernel_size + 1
-        heatmap_smoothed = cv2.GaussianBlur(merged_heatmap, (kernel_size, kernel_size), 0)
-
-        # 标准化为每秒停留概率
-        avg_total_duration = np.mean([d for d in total_durations if d is not None]) if any(
-            d is not None for d in total_durations) else 1.0
-        heatmap_prob = heatmap_smoothed / avg_total_duration if avg_total_duration > 0 else heatmap_smoothed
-
-        # 可视化
-        plt.figure(figsize=(10, 8))
-        norm = Normalize(vmin=heatmap_prob.min(), vmax=heatmap_prob.max())
-        im = plt.imshow(heatmap_prob, cmap='jet', norm=norm, alpha=heatmap_alpha, zorder=1)
-
-        # 添加矩形中间判定线，确保线条不超出热图
-        if target_shape == "rectangle":
-            top_line_y = heatmap_prob.shape[0] // 2  # 中间位置
-            heatmap_width = heatmap_prob.shape[1]    # 热图宽度
-            plt.plot([0, heatmap_width - 1], [top_line_y, top_line_y], color='red', linestyle='--', linewidth=2,
-                     label='Center Line', zorder=50)
-
-        # 添加比例尺
-        cbar = plt.colorbar(im)
-        cbar.set_label('Stay Probability (per second)', rotation=270, labelpad=15)
-        cbar.set_ticks(np.linspace(heatmap_prob.min(), heatmap_prob.max(), 5))
-
-        # 添加组名和样本数
-        sample_size = len(heatmaps)
-        plt.text(heatmap_prob.shape[1] - 10, heatmap_prob.shape[0] - 10,
-                 f"{group_name} (n={sample_size})",
-                 color='white', fontsize=12, ha='right', va='bottom',
-                 bbox=dict(facecolor='black', alpha=0.5), zorder=100)
-
-        # 显示图例（可选）
-        if target_shape == "rectangle":
-            plt.legend(loc='upper right')
-
-        plt.axis('off')
-        output_file = os.path.join(output_dir, f"{group_name} (n={sample_size}).png")
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        plt.close()
-        results.append(output_file)
-
+    if not kernel_sizes:
+        tasks = group_render_tasks(groups, output_dir, kernel_size, heatmap_alpha, duration_weighted, profiler,
+                                   smoothing, mask_aware)
+        with profiler.stage('render'):
+            return render_group_tasks(tasks, render_jobs, fast_render, colorbar)
+
+    kernel_sizes = list(dict.fromkeys(kernel_sizes))  # 去重并保持顺序
+    tasks = []
+    for k in kernel_sizes:
+        kernel_dir = os.path.join(output_dir, f"kernel_{k}")
+        os.makedirs(kernel_dir, exist_ok=True)
+        tasks.extend(group_render_tasks(groups, kernel_dir, k, heatmap_alpha, duration_weighted, profiler,
+                                        smoothing, mask_aware))
+    with profiler.stage('render'):
+        results = render_group_tasks(tasks, render_jobs, fast_render, colorbar)
+    if contact_sheet:
+        from fast_render import write_contact_sheet
+        with profiler.stage('contact_sheet'):
+            # tasks 按核、组的顺序排列，每个核包含相同的组
+            n_groups = len(results) // len(kernel_sizes)
+            for i, task in enumerate(tasks[:n_groups]):
+                image_files = results[i::n_groups]
+                output_file = os.path.join(output_dir, f"{task['group_name']} (n={task['sample_size']}) contact.png")
+                results.append(write_contact_sheet(output_file, image_files,
+                                                   [f"kernel_size={k}" for k in kernel_sizes]))
     return results
 
+def group_render_tasks(groups, output_dir, kernel_size=15, heatmap_alpha=0.8, duration_weighted=False,
+                       profiler=NULL_PROFILER, smoothing='auto', mask_aware=False):
+    """合并、平滑并标准化各组热图，返回渲染任务字典列表（save_group_heatmap 的参数，按组顺序）；
+    groups 为 {组名: HeatmapAccumulator 或 CachedGroup}，相同尺寸的组在一次批量调用中平滑"""
+    names = list(groups)
+    with profiler.stage('resize_mask'):
+        merged = [groups[name].merged() for name in names]
+    masks = None
+    if mask_aware:
+        # 旧缓存中没有 scale_factor 时取预设值；矩形或未知鱼缸的掩膜为 None，直接平滑
+        masks = []
+        for name, heatmap in zip(names, merged):
+            group = groups[name]
+            scale_factor = group.scale_factor
+            if scale_factor is None:
+                scale_factor = TANK_PRESETS.get(group.tank_shape, {}).get('scale_factor')
+            masks.append(tank_mask(group.tank_shape, scale_factor, heatmap.shape) if scale_factor else None)
+
+    # 平滑热图
+    with profiler.stage('blur'):
+        smoothed = smooth_batch(merged, kernel_size, smoothing, masks)
+
+    tasks = []
+    for name, heatmap_smoothed in zip(names, smoothed):
+        group = groups[name]
+        # 标准化为每秒停留概率（按样本时长加权时已在累加阶段完成）
+        avg_total_duration = group.avg_total_duration
+        if duration_weighted or avg_total_duration <= 0:
+            heatmap_prob = heatmap_smoothed
+        else:
+            heatmap_prob = heatmap_smoothed / avg_total_duration
+        tasks.append({
+            'output_file': os.path.join(output_dir, f"{name} (n={group.count}).png"),
+            'heatmap_prob': heatmap_prob,
+            'group_name': name,
+            'sample_size': group.count,
+            'tank_shape': group.tank_shape,
+            'heatmap_alpha': heatmap_alpha,
+        })
+    return tasks
+
+def render_group_tasks(tasks, render_jobs=1, fast_render=False, colorbar=True):
+    """用 matplotlib 或快速渲染模式渲染任务列表，返回输出路径"""
+    if fast_render:
+        from fast_render import render_fast
+        for task in tasks:
+            task['colorbar'] = colorbar
+        return render_heatmaps(tasks, render_jobs, renderer=render_fast)
+    return render_heatmaps(tasks, render_jobs)
+
+def watch_heatmaps(folders, output_dir, fuzzy_match=False, kernel_size=15, heatmap_alpha=0.8,
+                   duration_weighted=False, render_jobs=1, fast_render=False, colorbar=True,
+                   interval=5.0, settle=2.0, discover_options=None, max_polls=None, smoothing='auto',
+                   mask_aware=False, prefetch=0):
+    """
+    持续监视样本文件夹并增量更新热图：只有新增样本的组直接累加新样本，
+    有样本被修改、删除或改变分组的组从其样本重新累加；只重新渲染受影响的组，其余组不重新计算。
+    prefetch > 0 时每次更新需要读取的样本文件在后台预读（见 loader/prefetch.py）。
+    """
+    from watcher import SampleWatcher
+    os.makedirs(output_dir, exist_ok=True)
+    samples = {}    # 文件夹 -> .npy 文件
+    group_of = {}   # 文件夹 -> 组名
+    groups = {}     # 组名 -> HeatmapAccumulator
+    rendered = {}   # 组名 -> 已写出的 PNG
+
+    def update(changed, removed):
+        for folder in removed:
+            samples.pop(folder, None)
+        samples.update(changed)
+        group_map = build_group_map(list(samples)) if fuzzy_match and FUZZY_AVAILABLE else None
+        new_group_of = {folder: extract_group(os.path.basename(os.path.normpath(folder)), fuzzy_match, group_map)
+                        for folder in samples}
+
+        rebuild, added = set(), {}
+        for folder in removed:
+            if folder in group_of:
+                rebuild.add(group_of[folder])
+        for folder, group_name in new_group_of.items():
+            old_group = group_of.get(folder)
+            if old_group is not None and old_group != group_name:
+                rebuild.update((old_group, group_name))
+            elif folder in changed:
+                if old_group is None:
+                    added.setdefault(group_name, []).append(folder)
+                else:
+                    rebuild.add(group_name)
+        group_of.clear()
+        group_of.update(new_group_of)
+
+        # 需要读取的样本（重新累加的组的全部样本 + 其余组的新增样本），按累加顺序一起预读
+        to_load = []
+        for group_name in rebuild:
+            groups.pop(group_name, None)
+            to_load.extend(sorted(f for f, g in group_of.items() if g == group_name))
+        for group_name, new_folders in added.items():
+            if group_name not in rebuild:
+                to_load.extend(new_folders)
+        for folder, npy_files, contents in prefetch_samples({f: samples[f] for f in to_load}, prefetch):
+            add_sample(groups, folder, npy_files, fuzzy_match, group_map, duration_weighted, contents=contents)
+
+        affected = sorted(rebuild | set(added))
+        tasks = group_render_tasks({g: groups[g] for g in affected if g in groups and groups[g].count}, output_dir,
+                                   kernel_size, heatmap_alpha, duration_weighted, smoothing=smoothing,
+                                   mask_aware=mask_aware)
+        outputs = render_group_tasks(tasks, render_jobs, fast_render, colorbar) if tasks else []
+        new_files = {task['group_name']: path for task, path in zip(tasks, outputs)}
+        # 样本数变化时文件名（n=x）随之变化，删除旧文件；组已无样本时同样删除
+        for group_name in affected:
+            old_file = rendered.pop(group_name, None)
+            if old_file and old_file != new_files.get(group_name) and os.path.exists(old_file):
+                os.remove(old_file)
+        rendered.update(new_files)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {len(changed)} 个新增/修改，{len(removed)} 个删除，"
+              f"更新 {len(new_files)} 张热图")
+        for path in new_files.values():
+            print(f"  - {path}")
+
+    watcher = SampleWatcher(folders, settle=settle, **(discover_options or {}))
+    watcher.watch(update, interval=interval, max_polls=max_polls)
+
 def extract_group(folder_name: str, fuzzy_match=False, group_map=None) -> str:
     base_group = folder_name.split('_')[0].lower()
     if fuzzy_match and FUZZY_AVAILABLE and group_map:
         return group_map.get(base_group, base_group)
     return base_group
 
-class HeatmapGUI(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.language = 'EN'  # 默认英文
-        self.texts = LANGUAGES[self.language]
-        self.title(self.texts['title'])
-        self.geometry('600x500')
-        self.folders = []
-        self.fuzzy_match = tk.BooleanVar(value=False)
-        self.kernel_size = tk.IntVar(value=61)
-        self.heatmap_alpha = tk.DoubleVar(value=0.8)
-        self.build_ui()
-
-    def build_ui(self):
-        # 第一行：文件夹标签和语言选择
-        top_frame = tk.Frame(self)
-        top_frame.pack(fill='x', padx=10, pady=5)
-        self.folder_label = tk.Label(top_frame, text=self.texts['folder_label'])
-        self.folder_label.pack(side='left', anchor='w')
-        lang_frame = tk.Frame(top_frame)
-        lang_frame.pack(side='right')
-        tk.Label(lang_frame, text='Language:').pack(side='left')
-        self.lang_var = tk.StringVar(value=self.language)
-        self.lang_menu = ttk.Combobox(lang_frame, textvariable=self.lang_var, values=['简中', 'EN'], state='readonly', width=5)
-        self.lang_menu.pack(side='left')
-        self.lang_menu.bind('<<ComboboxSelected>>', self.switch_language)
-
-        self.lb = tk.Listbox(self, selectmode=tk.EXTENDED)
-        self.lb.pack(fill='both', expand=True, padx=10)
-
-        frame = tk.Frame(self)
-        frame.pack(fill='x', padx=10, pady=5)
-        self.add_button = tk.Button(frame, text=self.texts['add_button'], command=self.add_folder)
-        self.add_button.pack(side='left')
-        self.remove_button = tk.Button(frame, text=self.texts['remove_button'], command=self.remove_selected)
-        self.remove_button.pack(side='left', padx=5)
-        self.fuzzy_check = tk.Checkbutton(frame, text=self.texts['fuzzy_check'], variable=self.fuzzy_match,
-                                         state='disabled' if not FUZZY_AVAILABLE else 'normal')
-        self.fuzzy_check.pack(side='left', padx=5)
-        self.fuzzy_info = tk.Label(frame, text='ⓘ', font=('Arial', 8), fg='black')
-        self.fuzzy_info.pack(side='left', padx=2)
-        ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])
-
-        param_frame = tk.Frame(self)
-        param_frame.pack(fill='x', padx=10, pady=5)
-        self.kernel_label = tk.Label(param_frame, text=self.texts['kernel_label'])
-        self.kernel_label.pack(side='left')
-        tk.Entry(param_frame, textvariable=self.kernel_size, width=5).pack(side='left', padx=5)
-        self.alpha_label = tk.Label(param_frame, text=self.texts['alpha_label'])
-        self.alpha_label.pack(side='left')
-        tk.Entry(param_frame, textvariable=self.heatmap_alpha, width=5).pack(side='left', padx=5)
-
-        out_frame = tk.Frame(self)
-        out_frame.pack(fill='x', padx=10, pady=5)
-        self.output_label = tk.Label(out_frame, text=self.texts['output_label'])
-        self.output_label.pack(side='left')
-        self.out_entry = tk.Entry(out_frame)
-        self.out_entry.pack(side='left', fill='x', expand=True, padx=5)
-        self.browse_button = tk.Button(out_frame, text=self.texts['browse_button'], command=self.choose_output)
-        self.browse_button.pack(side='left')
-
-        self.generate_button = tk.Button(self, text=self.texts['generate_button'], command=self.generate)
-        self.generate_button.pack(pady=10)
-        self.status = tk.Label(self, text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
-        self.status.pack()
-
-    def switch_language(self, event=None):
-        """Switch language and update UI"""
-        self.language = self.lang_var.get()
-        self.texts = LANGUAGES[self.language]
-        self.title(self.texts['title'])
-        self.folder_label.config(text=self.texts['folder_label'])
-        self.add_button.config(text=self.texts['add_button'])
-        self.remove_button.config(text=self.texts['remove_button'])
-        self.fuzzy_check.config(text=self.texts['fuzzy_check'])
-        self.fuzzy_info_tip = ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])  # 更新提示文本
-        self.kernel_label.config(text=self.texts['kernel_label'])
-        self.alpha_label.config(text=self.texts['alpha_label'])
-        self.output_label.config(text=self.texts['output_label'])
-        self.browse_button.config(text=self.texts['browse_button'])
-        self.generate_button.config(text=self.texts['generate_button'])
-        self.status.config(text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
-
-    def add_folder(self):
-        path = filedialog.askdirectory(title='选择文件夹' if self.language == 'zh' else 'Select Folder')
-        if not path:
-            return
-        sub_folders = resolve_folders([path])
-        for folder in sub_folders:
-            if folder not in self.folders:
-                self.folders.append(folder)
-                self.lb.insert('end', folder)
-
-    def remove_selected(self):
-        for i in reversed(self.lb.curselection()):
-            self.folders.pop(i)
-            self.lb.delete(i)
-
-    def choose_output(self):
-        path = filedialog.askdirectory(title='选择输出文件夹' if self.language == 'zh' else 'Select Output Folder')
-        if path:
-            default_subfolder = f"Heatmaps_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            full_path = os.path.join(path, default_subfolder)
-            self.out_entry.delete(0, 'end')
-            self.out_entry.insert(0, full_path)
-
-    def generate(self):
-        out_dir = self.out_entry.get().strip()
-        if not self.folders:
-            return messagebox.showwarning(self.texts['no_folders'], self.texts['no_folders_msg'])
-        if not out_dir:
-            return messagebox.showwarning(self.texts['no_output'], self.texts['no_output_msg'])
-
-        fuzzy = self.fuzzy_match.get()
-        if fuzzy and not FUZZY_AVAILABLE:
-            return messagebox.showwarning(self.texts['no_fuzzy'], self.texts['no_fuzzy_msg'])
-
-        kernel = self.kernel_size.get()
-        heatmap_a = self.heatmap_alpha.get()
-
-        results = merge_heatmaps(self.folders, out_dir, fuzzy_match=fuzzy,
-                                 kernel_size=kernel, heatmap_alpha=heatmap_a)
-        if results:
-            self.status.config(text=f"{self.texts['success']}{len(results)} 张热图至: {out_dir}")
-        else:
-            messagebox.showinfo(self.texts['no_data'], self.texts['no_data_msg'])
-
 def main():
     parser = argparse.ArgumentParser(description="合并热图工具")
     parser.add_argument('--folders', nargs='+', help='样本文件夹路径或母文件夹')
     parser.add_argument('--output_dir', help='输出文件夹路径（默认使用时间戳）')
     parser.add_argument('--fuzzy', action='store_true', help='启用自动模糊匹配')
     parser.add_argument('--kernel_size', type=int, default=15, help='高斯核大小')
+    parser.add_argument('--kernel_sizes', '--kernel-sizes', type=int, nargs='+',
+                        help='参数扫描：只合并一次，为每个核大小生成热图，写入 <output_dir>/kernel_<k>/（忽略 --kernel_size）')
+    parser.add_argument('--contact_sheet', '--contact-sheet', action='store_true',
+                        help='配合 --kernel_sizes：为每组写出各核热图横向拼接的对比图')
+    parser.add_argument('--smoothing', choices=STRATEGIES, default='auto',
+                        help='平滑策略：auto 按核大小选择，gaussian 为 GaussianBlur，fft 为频域卷积，downsample 为缩小后平滑（近似）')
+    parser.add_argument('--mask_aware', '--mask-aware', action='store_true',
+                        help='按鱼缸掩膜做归一化卷积，缸外的 0 值不拉低缸壁附近的热图')
     parser.add_argument('--heatmap_alpha', type=float, default=0.8, help='热图透明度 (0-1)')
+    parser.add_argument('--duration_weighted', action='store_true',
+                        help='每个样本先按自身总时长归一化再合并（每条鱼权重相同）')
+    parser.add_argument('--render_jobs', '--render-jobs', type=int, default=1,
+                        help='并行渲染的进程数（0 = 全部 CPU 核心）')
+    parser.add_argument('--fast_render', '--fast-render', action='store_true',
+                        help='快速质检模式：用 jet 查找表 + OpenCV 渲染，不使用 matplotlib')
+    parser.add_argument('--no_colorbar', action='store_true', help='快速渲染模式下不附加色条')
+    parser.add_argument('--tank_config', help=f'自定义鱼缸多边形 JSON 配置（默认 {DEFAULT_TANK_CONFIG}，存在时自动加载）')
+    parser.add_argument('--from_cache', '--from-cache', action='store_true',
+                        help='样本文件未变化时使用合并热图缓存，只重新平滑与渲染')
+    parser.add_argument('--render_only', '--render-only', action='store_true',
+                        help='不读取样本，直接用 --output_dir 中的合并热图缓存重新平滑与渲染')
+    parser.add_argument('--cache_file', '--cache-file', help='合并热图缓存路径（默认 <output_dir>/merged_heatmaps.npz）')
+    parser.add_argument('--no_cache', '--no-cache', action='store_true', help='不写出合并热图缓存')
+    parser.add_argument('--prefetch', type=int, default=0, metavar='K',
+                        help='后台预读后续 K 个样本文件，读取网络存储（SMB/NFS）时与反序列化重叠（0 = 关闭）')
+    parser.add_argument('--depth', type=int, default=1, help='在母文件夹下搜索样本文件夹的最大层数')
+    parser.add_argument('--include', nargs='+', default=[], help='只使用名称匹配这些通配符的样本文件夹')
+    parser.add_argument('--exclude', nargs='+', default=[], help='跳过名称匹配这些通配符的文件夹')
+    parser.add_argument('--scan_threads', '--scan-threads', type=int, default=0,
+                        help='并行列举目录的线程数（适用于网络存储，0 = 单线程）')
+    parser.add_argument('--watch', action='store_true', help='持续运行，样本文件夹新增或修改时增量更新受影响组的热图')
+    parser.add_argument('--watch_interval', '--watch-interval', type=float, default=5.0,
+                        help='--watch 模式下两次扫描的间隔（秒）')
+    parser.add_argument('--watch_settle', '--watch-settle', type=float, default=2.0,
+                        help='.npy 文件最近修改不足该秒数时视为仍在写入，暂不读取')
+    parser.add_argument('--profile', action='store_true', help='记录各阶段耗时与内存，写出 <output_dir>/profile.json')
+    parser.add_argument('--profile_top', '--profile-top', type=int, default=10, help='报告中列出的最慢样本文件夹数')
+    parser.add_argument('--profile_no_trace', '--profile-no-trace', action='store_true',
+                        help='配合 --profile：不启用 tracemalloc（耗时更准确，只记录 RSS）')
+    parser.add_argument('--log_level', '--log-level', type=str.upper, choices=LOG_LEVELS, default='WARNING',
+                        help='日志级别（DEBUG 输出每个文件的键、数组形状与 dtype）')
+    parser.add_argument('--log_file', '--log-file', help='额外写出 JSON-lines 格式的日志文件')
     args = parser.parse_args()
-
-    if args.folders:
+    if args.watch:
+        # watch_heatmaps 只增量渲染单个核大小、不读写合并缓存也不记录性能，明确报错而不是静默忽略
+        unsupported = [flag for flag, value in (('--kernel_sizes', args.kernel_sizes),
+                                                ('--contact_sheet', args.contact_sheet),
+                                                ('--from_cache', args.from_cache),
+                                                ('--render_only', args.render_only),
+                                                ('--cache_file', args.cache_file),
+                                                ('--no_cache', args.no_cache),
+                                                ('--profile', args.profile)) if value not in (None, False)]
+        if unsupported:
+            parser.error(f"--watch cannot be combined with {', '.join(unsupported)}")
+    configure_logging(args.log_level, args.log_file)
+
+    tank_config = args.tank_config or (DEFAULT_TANK_CONFIG if os.path.exists(DEFAULT_TANK_CONFIG) else None)
+    if tank_config:
+        load_tank_config(tank_config)
+
+    if args.render_only:
+        if not args.output_dir and not args.cache_file:
+            print("错误：--render_only 需要 --output_dir 或 --cache_file")
+            return
+        output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.cache_file))
+        profiler = NULL_PROFILER
+        if args.profile:
+            profiler = Profiler(top_n=args.profile_top, trace_memory=not args.profile_no_trace)
+        results = render_from_cache(output_dir, kernel_size=args.kernel_size, heatmap_alpha=args.heatmap_alpha,
+                                    render_jobs=args.render_jobs, fast_render=args.fast_render,
+                                    colorbar=not args.no_colorbar, cache_file=args.cache_file, profiler=profiler,
+                                    smoothing=args.smoothing, mask_aware=args.mask_aware,
+                                    kernel_sizes=args.kernel_sizes, contact_sheet=args.contact_sheet)
+        if results:
+            print(f"已重新渲染 {len(results)} 张热图至: {output_dir}")
+            for r in results:
+                print(f"  - {r}")
+        else:
+            print("未找到合并热图缓存，未生成热图")
+        if profiler.enabled:
+            report = profiler.write(os.path.join(output_dir, 'profile.json'))
+            print(f"性能报告: {profiler.summary()} -> {report}")
+    elif args.folders:
         output_dir = args.output_dir if args.output_dir else f"Heatmaps_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         if args.fuzzy and not FUZZY_AVAILABLE:
             print("错误：模糊匹配需要安装 fuzzywuzzy")
             return
-        results = merge_heatmaps(args.folders, output_dir, fuzzy_match=args.fuzzy,
-                                 kernel_size=args.kernel_size, heatmap_alpha=args.heatmap_alpha)
+        if args.watch:
+            discover_options = {'max_depth': args.depth, 'include': args.include, 'exclude': args.exclude,
+                                'threads': args.scan_threads}
+            print(f"正在监视 {', '.join(args.folders)}，输出至 {output_dir}（Ctrl+C 停止）")
+            watch_heatmaps(args.folders, output_dir, fuzzy_match=args.fuzzy, kernel_size=args.kernel_size,
+                           heatmap_alpha=args.heatmap_alpha, duration_weighted=args.duration_weighted,
+                           render_jobs=args.render_jobs, fast_render=args.fast_render,
+                           colorbar=not args.no_colorbar, interval=args.watch_interval,
+                           settle=args.watch_settle, discover_options=discover_options,
+                           smoothing=args.smoothing, mask_aware=args.mask_aware, prefetch=args.prefetch)
+            return
+        profiler = NULL_PROFILER
+        if args.profile:
+            profiler = Profiler(top_n=args.profile_top, trace_memory=not args.profile_no_trace)
+        with profiler.stage('discover'):
+            samples = discover_samples(args.folders, args.depth, args.include, args.exclude, args.scan_threads)
+        results = merge_heatmaps(list(samples), output_dir, fuzzy_match=args.fuzzy,
+                                 kernel_size=args.kernel_size, heatmap_alpha=args.heatmap_alpha,
+                                 duration_weighted=args.duration_weighted, render_jobs=args.render_jobs,
+                                 fast_render=args.fast_render, colorbar=not args.no_colorbar,
+                                 sample_files=samples, profiler=profiler, cache_file=args.cache_file,
+                                 use_cache=args.from_cache, save_cache=not args.no_cache,
+                                 smoothing=args.smoothing, mask_aware=args.mask_aware,
+                                 kernel_sizes=args.kernel_sizes, contact_sheet=args.contact_sheet,
+                                 prefetch=args.prefetch)
         if results:
             print(f"已保存 {len(results)} 张热图至: {output_dir}")
             for r in results:
                 print(f"  - {r}")
         else:
             print("合并失败，未生成热图")
+        if profiler.enabled:
+            report = profiler.write(os.path.join(output_dir, 'profile.json'))
+            print(f"性能报告: {profiler.summary()} -> {report}")
     else:
+        # GUI 依赖（tkinter）只在打开界面时导入，命令行运行不需要 Tk
+        from heatmap_gui import HeatmapGUI
         HeatmapGUI().mainloop()
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # PyInstaller 打包后子进程需要
     main()
\ No newline at end of file
@@ -1,8 +1,21 @@
-# src/__init__.py
 __version__ = "1.0.0"
 __author__ = "Shulei.He"
 
-from loader.heat_loader import HeatmapLoader
-from loader.beh_loader import BehaviorLoader
-from .Findex_Data import  main as findex_data_main
-from .Findex_Heatmap import main as findex_heatmap_main
\ No newline at end of file
+# 入口与加载器按需导入（PEP 562），导入本包不会加载 tkinter / matplotlib / pandas
+_LAZY_ATTRS = {
+    'HeatmapLoader': ('loader.heat_loader', 'HeatmapLoader'),
+    'BehaviorLoader': ('loader.beh_loader', 'BehaviorLoader'),
+    'findex_data_main': ('.Findex_Data', 'main'),
+    'findex_heatmap_main': ('.Findex_Heatmap', 'main'),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    module_name, attr = _LAZY_ATTRS[name]
+    module = importlib.import_module(module_name, __name__ if module_name.startswith('.') else None)
+    value = getattr(module, attr)
+    globals()[name] = value
+    return value
\ No newline at end of file
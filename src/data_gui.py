@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+data_gui.py
+
+Findex_Data 的图形界面（StatsGUI）。单独成模块，使命令行运行无需导入 tkinter。
+
+用法：
+    python Findex_Data.py                # 打开 GUI
+"""
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from gui_common import ToolTip
+from record_cache import RecordCache
+from profiler import Profiler, NULL_PROFILER
+from table_writers import OUTPUT_FORMATS, write_table
+from Findex_Data import FUZZY_AVAILABLE, RECORD_FIELDS, SUMMARY_STATS, collect_stats, resolve_folders
+
+# 语言字典
+LANGUAGES = {
+    '简中': {
+        'title': 'Findex_Data_1.0.1',
+        'folder_label': '请选择文件夹（支持主文件夹或子文件夹）：',
+        'add_button': '添加文件夹',
+        'remove_button': '删除选中',
+        'fuzzy_check': '启用自动模糊匹配',
+        'fuzzy_tip': '提示：模糊匹配需要安装 fuzzywuzzy',
+        'fuzzy_info': '模糊检索文件夹的组命名，将名称相近的样本\n自动分为一组（如 "Caffiene" 和 "caffeine"）',
+        'output_label': '输出路径：',
+        'browse_button': '浏览',
+        'jobs_label': '并行进程数：',
+        'profile_check': '性能报告',
+        'profile_status': '耗时 ',
+        'generate_button': '生成统计表',
+        'no_folders': '警告',
+        'no_folders_msg': '请先添加文件夹',
+        'no_output': '警告',
+        'no_output_msg': '请选择输出路径',
+        'no_fuzzy': '警告',
+        'no_fuzzy_msg': '模糊匹配需要安装 fuzzywuzzy',
+        'no_data': '提示',
+        'no_data_msg': '未找到有效 .npy 文件',
+        'success': '✅ 已保存: ',
+        'error': '错误'
+    },
+    'EN': {
+        'title': 'Findex_Data_1.0.1',
+        'folder_label': 'Please select folders (supports parent or subfolders):',
+        'add_button': 'Add Folder',
+        'remove_button': 'Remove Selected',
+        'fuzzy_check': 'Enable Fuzzy Matching',
+        'fuzzy_tip': 'Note: Fuzzy matching requires fuzzywuzzy',
+        'fuzzy_info': 'Fuzzy search the group naming of the folder,'
+                      '\n and automatically group the samples with similar'
+                      '\n names into one group. (e.g., "Caffiene" and "caffeine")',
+        'output_label': 'Output Path:',
+        'browse_button': 'Browse',
+        'jobs_label': 'Jobs:',
+        'profile_check': 'Profile',
+        'profile_status': 'Time ',
+        'generate_button': 'Generate Stats Table',
+        'no_folders': 'Warning',
+        'no_folders_msg': 'Please add folders first',
+        'no_output': 'Warning',
+        'no_output_msg': 'Please select an output path',
+        'no_fuzzy': 'Warning',
+        'no_fuzzy_msg': 'Fuzzy matching requires fuzzywuzzy',
+        'no_data': 'Info',
+        'no_data_msg': 'No valid .npy files found',
+        'success': '✅ Saved: ',
+        'error': 'Error'
+    }
+}
+
+class StatsGUI(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.language = 'EN'  # 默认英文
+        self.texts = LANGUAGES[self.language]
+        self.title(self.texts['title'])
+        self.geometry('600x450')
+        self.folders = []
+        self.fuzzy_match = tk.BooleanVar(value=False)
+        self.jobs = tk.IntVar(value=1)
+        self.summary_stats = {name: tk.BooleanVar(value=False) for name in SUMMARY_STATS}
+        self.profile = tk.BooleanVar(value=False)
+        self.build_ui()
+
+    def build_ui(self):
+        # 第一行：文件夹标签和语言选择
+        top_frame = tk.Frame(self)
+        top_frame.pack(fill='x', padx=10, pady=5)
+        self.folder_label = tk.Label(top_frame, text=self.texts['folder_label'])
+        self.folder_label.pack(side='left', anchor='w')
+        lang_frame = tk.Frame(top_frame)
+        lang_frame.pack(side='right')
+        tk.Label(lang_frame, text='Language:').pack(side='left')
+        self.lang_var = tk.StringVar(value=self.language)
+        self.lang_menu = ttk.Combobox(lang_frame, textvariable=self.lang_var, values=['简中', 'EN'], state='readonly', width=5)
+        self.lang_menu.pack(side='left')
+        self.lang_menu.bind('<<ComboboxSelected>>', self.switch_language)
+
+        self.lb = tk.Listbox(self, selectmode=tk.EXTENDED)
+        self.lb.pack(fill='both', expand=True, padx=10)
+
+        frame = tk.Frame(self)
+        frame.pack(fill='x', padx=10, pady=5)
+        self.add_button = tk.Button(frame, text=self.texts['add_button'], command=self.add_folder)
+        self.add_button.pack(side='left')
+        self.remove_button = tk.Button(frame, text=self.texts['remove_button'], command=self.remove_selected)
+        self.remove_button.pack(side='left', padx=5)
+        self.fuzzy_check = tk.Checkbutton(frame, text=self.texts['fuzzy_check'], variable=self.fuzzy_match,
+                                         state='disabled' if not FUZZY_AVAILABLE else 'normal')
+        self.fuzzy_check.pack(side='left', padx=5)
+        self.fuzzy_info = tk.Label(frame, text='ⓘ', font=('Arial', 8), fg='black')
+        self.fuzzy_info.pack(side='left', padx=2)
+        ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])
+
+        param_frame = tk.Frame(self)
+        param_frame.pack(fill='x', padx=10, pady=5)
+        self.jobs_label = tk.Label(param_frame, text=self.texts['jobs_label'])
+        self.jobs_label.pack(side='left')
+        tk.Spinbox(param_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.jobs, width=5).pack(side='left', padx=5)
+        for name, (label, _) in SUMMARY_STATS.items():
+            tk.Checkbutton(param_frame, text=label, variable=self.summary_stats[name]).pack(side='left')
+        self.profile_check = tk.Checkbutton(param_frame, text=self.texts['profile_check'], variable=self.profile)
+        self.profile_check.pack(side='left', padx=5)
+
+        out_frame = tk.Frame(self)
+        out_frame.pack(fill='x', padx=10, pady=5)
+        self.output_label = tk.Label(out_frame, text=self.texts['output_label'])
+        self.output_label.pack(side='left')
+        self.out_entry = tk.Entry(out_frame)
+        self.out_entry.pack(side='left', fill='x', expand=True, padx=5)
+        self.browse_button = tk.Button(out_frame, text=self.texts['browse_button'], command=self.choose_output)
+        self.browse_button.pack(side='left')
+
+        self.generate_button = tk.Button(self, text=self.texts['generate_button'], command=self.generate)
+        self.generate_button.pack(pady=10)
+        self.status = tk.Label(self, text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
+        self.status.pack()
+
+    def switch_language(self, event=None):
+        """Switch language and update UI"""
+        self.language = self.lang_var.get()
+        self.texts = LANGUAGES[self.language]
+        self.title(self.texts['title'])
+        self.folder_label.config(text=self.texts['folder_label'])
+        self.add_button.config(text=self.texts['add_button'])
+        self.remove_button.config(text=self.texts['remove_button'])
+        self.fuzzy_check.config(text=self.texts['fuzzy_check'])
+        self.fuzzy_info_tip = ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])  # 更新提示文本
+        self.jobs_label.config(text=self.texts['jobs_label'])
+        self.profile_check.config(text=self.texts['profile_check'])
+        self.output_label.config(text=self.texts['output_label'])
+        self.browse_button.config(text=self.texts['browse_button'])
+        self.generate_button.config(text=self.texts['generate_button'])
+        self.status.config(text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
+
+    def add_folder(self):
+        path = filedialog.askdirectory(title='选择文件夹' if self.language == 'zh' else 'Select Folder')
+        if not path:
+            return
+        for folder in resolve_folders([path]):
+            if folder not in self.folders:
+                self.folders.append(folder)
+                self.lb.insert('end', folder)
+
+    def remove_selected(self):
+        for i in reversed(self.lb.curselection()):
+            self.folders.pop(i)
+            self.lb.delete(i)
+
+    def choose_output(self):
+        path = filedialog.asksaveasfilename(defaultextension='.xlsx',
+                                           filetypes=[(name, f'*{ext}') for ext, name in OUTPUT_FORMATS.items()],
+                                           title='选择输出路径' if self.language == 'zh' else 'Select Output Path')
+        if path:
+            self.out_entry.delete(0, 'end')
+            self.out_entry.insert(0, path)
+
+    def generate(self):
+        out = self.out_entry.get().strip()
+        if not self.folders:
+            return messagebox.showwarning(self.texts['no_folders'], self.texts['no_folders_msg'])
+        if not out:
+            return messagebox.showwarning(self.texts['no_output'], self.texts['no_output_msg'])
+
+        fuzzy = self.fuzzy_match.get()
+        if fuzzy and not FUZZY_AVAILABLE:
+            return messagebox.showwarning(self.texts['no_fuzzy'], self.texts['no_fuzzy_msg'])
+
+        extra_stats = [name for name, var in self.summary_stats.items() if var.get()]
+        # 界面中只记录耗时与 RSS：tracemalloc 会明显拖慢渲染
+        profiler = Profiler(trace_memory=False) if self.profile.get() else NULL_PROFILER
+        df = collect_stats(self.folders, fuzzy_match=fuzzy, jobs=self.jobs.get(),
+                           cache=RecordCache(fields=RECORD_FIELDS), extra_stats=extra_stats, profiler=profiler)
+
+        if df.empty:
+            return messagebox.showinfo(self.texts['no_data'], self.texts['no_data_msg'])
+        try:
+            with profiler.stage('write'):
+                write_table(df, out)
+            status = f"{self.texts['success']}{os.path.basename(out)}"
+            if profiler.enabled:
+                profiler.write(os.path.splitext(out)[0] + '.profile.json')
+                status += f"  |  {self.texts['profile_status']}{profiler.summary()}"
+            self.status.config(text=status)
+        except Exception as e:
+            messagebox.showerror(self.texts['error'], str(e))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+diagnostics.py
+
+Findex 的日志配置与诊断工具。模块导入时不配置日志（不调用 basicConfig），
+由命令行入口根据 --log_level / --log_file 调用 configure_logging()：
+- 控制台输出人类可读的文本，默认只显示 WARNING 及以上；
+- --log_file 额外写出 JSON-lines 日志（每行一个 JSON 对象），记录级别同 --log_level。
+
+热路径中的日志一律使用 %-style 惰性格式化，并用 SampleSummary 只描述样本字典的
+键、数组形状与 dtype，日志级别未开启时不会对数组做任何字符串化。
+
+用法（模块调用）：
+    import logging
+    from diagnostics import configure_logging, SampleSummary
+    configure_logging('DEBUG', 'run.jsonl')
+    logging.getLogger('findex.heatmap').debug("Loaded %s: %s", path, SampleSummary(data))
+"""
+
+import json
+import logging
+from datetime import datetime
+
+LOG_LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord 的标准属性，其余属性（logging 调用时的 extra=）写入 JSON-lines 日志
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class SampleSummary:
+    """样本字典的惰性摘要：只在日志真正输出时才计算，数组只显示 dtype 与形状"""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        parts = []
+        for key, value in self.data.items():
+            shape = getattr(value, 'shape', None)
+            if shape is not None and getattr(value, 'ndim', 0) > 0:
+                parts.append(f"{key}={value.dtype}{tuple(shape)}")
+            else:
+                parts.append(f"{key}={value!r}" if not isinstance(value, (list, tuple, dict))
+                             else f"{key}={type(value).__name__}[{len(value)}]")
+        return '{' + ', '.join(parts) + '}'
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON：time、level、logger、message 及 extra 字段"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(level='WARNING', log_file=None):
+    """配置根日志：控制台文本输出，可选 JSON-lines 文件；重复调用会替换之前的处理器"""
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if getattr(h, '_findex', False)]:
+        root.removeHandler(handler)
+        handler.close()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handlers = [console]
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+    for handler in handlers:
+        handler._findex = True
+        root.addHandler(handler)
+    # 级别只作用于 findex.* 日志，第三方库（matplotlib、PIL 等）保持 WARNING，避免 DEBUG 时刷屏
+    findex_level = getattr(logging, str(level).upper(), logging.WARNING)
+    logging.getLogger('findex').setLevel(findex_level)
+    root.setLevel(max(findex_level, logging.WARNING))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fast_render.py
+
+合并热图的快速渲染模式（不依赖 matplotlib），用于快速质检：
+概率热图经预先计算的 256 色 'jet' 查找表映射为颜色，与白色背景按 heatmap_alpha 混合，
+最近邻放大后用 OpenCV 绘制矩形鱼缸中线与组名标签，可选在右侧附加紧凑色条，
+最后由 OpenCV 编码为 PNG 写出。
+write_contact_sheet() 把同一组的多张热图（如不同平滑核）横向拼成一张对比图，每张上方标注参数。
+
+用法（模块调用）：
+    from fast_render import render_fast
+    render_fast("out.png", heatmap_prob, "control", 12, "rectangle")
+    write_contact_sheet("control contact.png", ["k15/control.png", "k31/control.png"], ["kernel 15", "kernel 31"])
+"""
+
+import os
+
+import numpy as np
+import cv2
+
+# matplotlib 'jet' 的分段线性定义 (x, y0, y1)，按 N=256 采样得到查找表
+_JET_SEGMENTS = {
+    'red': ((0.0, 0, 0), (0.35, 0, 0), (0.66, 1, 1), (0.89, 1, 1), (1.0, 0.5, 0.5)),
+    'green': ((0.0, 0, 0), (0.125, 0, 0), (0.375, 1, 1), (0.64, 1, 1), (0.91, 0, 0), (1.0, 0, 0)),
+    'blue': ((0.0, 0.5, 0.5), (0.11, 1, 1), (0.34, 1, 1), (0.65, 0, 0), (1.0, 0, 0)),
+}
+
+
+def _build_jet_lut(n=256):
+    x = np.linspace(0.0, 1.0, n)
+    channels = []
+    for name in ('blue', 'green', 'red'):  # OpenCV 使用 BGR 顺序
+        points = np.asarray(_JET_SEGMENTS[name], dtype=np.float64)
+        channels.append(np.interp(x, points[:, 0], points[:, 1]))
+    return np.clip(np.round(np.stack(channels, axis=1) * 255), 0, 255).astype(np.uint8)
+
+
+JET_LUT = _build_jet_lut()
+
+TARGET_SIZE = 800      # 放大后热图长边的目标像素数
+COLORBAR_WIDTH = 24
+COLORBAR_MARGIN = 12
+LABEL_AREA = 96
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def colorize(heatmap_prob, vmin, vmax, heatmap_alpha=0.8):
+    """将热图映射为 BGR 图像并与白色背景按透明度混合"""
+    if vmax > vmin:
+        index = ((heatmap_prob - vmin) * (256.0 / (vmax - vmin))).astype(np.int32)
+        np.clip(index, 0, 255, out=index)
+    else:
+        index = np.zeros(heatmap_prob.shape, dtype=np.int32)
+    colors = JET_LUT[index].astype(np.float32)
+    return (colors * heatmap_alpha + 255.0 * (1.0 - heatmap_alpha)).astype(np.uint8)
+
+
+def _draw_center_line(image, y, dash=12, thickness=2):
+    """在第 y 行绘制红色虚线（向量化设置像素）"""
+    cols = (np.arange(image.shape[1]) // dash) % 2 == 0
+    y0 = max(0, y - thickness // 2)
+    image[y0:y0 + thickness, cols] = (0, 0, 255)
+
+
+def _draw_label(image, text, margin=10):
+    """在右下角绘制带半透明黑底的白色标签"""
+    scale, thickness = 0.6, 1
+    (tw, th), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+    x1, y1 = image.shape[1] - margin, image.shape[0] - margin
+    x0, y0 = max(0, x1 - tw - 8), max(0, y1 - th - baseline - 8)
+    region = image[y0:y1, x0:x1]
+    region[:] = (region.astype(np.uint16) // 2).astype(np.uint8)  # 与黑色 50% 混合
+    cv2.putText(image, text, (x0 + 4, y1 - baseline - 4), FONT, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+
+
+def _colorbar(height, vmin, vmax, heatmap_alpha):
+    """生成右侧色条（上为最大值），附最小 / 最大值刻度"""
+    strip = np.full((height, COLORBAR_MARGIN + COLORBAR_WIDTH + LABEL_AREA, 3), 255, dtype=np.uint8)
+    gradient = np.linspace(vmax, vmin, height, dtype=np.float64)[:, None]
+    strip[:, COLORBAR_MARGIN:COLORBAR_MARGIN + COLORBAR_WIDTH] = colorize(
+        np.repeat(gradient, COLORBAR_WIDTH, axis=1), vmin, vmax, heatmap_alpha)
+    x = COLORBAR_MARGIN + COLORBAR_WIDTH + 4
+    cv2.putText(strip, f"{vmax:.2e}", (x, 14), FONT, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    cv2.putText(strip, f"{vmin:.2e}", (x, height - 4), FONT, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    return strip
+
+
+def render_fast(output_file, heatmap_prob, group_name, sample_size, tank_shape, heatmap_alpha=0.8,
+                colorbar=True):
+    """用查找表 + OpenCV 渲染单组概率热图并保存，参数与 save_group_heatmap 一致"""
+    vmin, vmax = float(heatmap_prob.min()), float(heatmap_prob.max())
+    image = colorize(heatmap_prob, vmin, vmax, heatmap_alpha)
+
+    factor = max(1, TARGET_SIZE // max(heatmap_prob.shape))
+    if factor > 1:
+        image = cv2.resize(image, (image.shape[1] * factor, image.shape[0] * factor),
+                           interpolation=cv2.INTER_NEAREST)
+
+    # 矩形鱼缸中线（与 matplotlib 渲染一致，位于第 H//2 行像素中心）
+    if tank_shape == "rectangle":
+        _draw_center_line(image, (heatmap_prob.shape[0] // 2) * factor + factor // 2)
+
+    _draw_label(image, f"{group_name} (n={sample_size})")
+
+    if colorbar:
+        image = np.hstack([image, _colorbar(image.shape[0], vmin, vmax, heatmap_alpha)])
+
+    return _write_image(output_file, image)
+
+
+def _write_image(output_file, image):
+    # imencode + tofile 等价于 cv2.imwrite，并支持 Windows 下的非 ASCII 路径（组名可能为中文）
+    ok, encoded = cv2.imencode(os.path.splitext(output_file)[1] or '.png', image)
+    if not ok:
+        raise IOError(f"无法编码图像：{output_file}")
+    encoded.tofile(output_file)
+    return output_file
+
+
+def write_contact_sheet(output_file, image_files, labels):
+    """把 image_files 横向拼接（白底、顶部对齐），每张图上方写 labels 中对应的文字，保存并返回路径"""
+    images = [cv2.imdecode(np.fromfile(f, dtype=np.uint8), cv2.IMREAD_COLOR) for f in image_files]
+    # 标题栏高度与字号随图像大小缩放（matplotlib 输出约 2000 像素高，快速渲染约 500 像素）
+    max_height = max(image.shape[0] for image in images)
+    header = max(30, max_height // 20)
+    gap = header // 3
+    scale, thickness = header / 50.0, max(1, header // 30)
+    height = max_height + header
+    width = sum(image.shape[1] for image in images) + gap * (len(images) - 1)
+    sheet = np.full((height, width, 3), 255, dtype=np.uint8)
+    x = 0
+    for image, label in zip(images, labels):
+        h, w = image.shape[:2]
+        sheet[header:header + h, x:x + w] = image
+        cv2.putText(sheet, label, (x + gap, header - gap), FONT, scale, (0, 0, 0), thickness, cv2.LINE_AA)
+        x += w + gap
+    return _write_image(output_file, sheet)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+heatmap_cache.py
+
+合并热图缓存：把每组缩放、掩膜后尚未平滑的平均热图，连同样本数、平均总时长与鱼缸类型，
+保存为一个压缩的 .npz（默认 <输出文件夹>/merged_heatmaps.npz），并记录输入指纹。
+只改变显示参数（平滑核大小、透明度、快速渲染 / 色条）时，直接从缓存重新平滑与渲染，
+不再扫描、读取和掩膜样本。
+
+输入指纹由所有样本 .npy 文件的 (路径, 大小, mtime_ns)、影响合并结果的选项（模糊匹配、
+按时长归一化）与鱼缸预设计算；--from_cache 时指纹一致才使用缓存，否则重新合并并覆盖缓存，
+--render_only 不检查输入，直接使用缓存。
+
+用法（模块调用）：
+    from heatmap_cache import CachedGroup, save_merged, load_merged, input_fingerprint
+    fingerprint = input_fingerprint(samples, fuzzy_match=False, duration_weighted=False)
+    save_merged('merged_heatmaps.npz', groups, fingerprint, duration_weighted=False)
+    cache = load_merged('merged_heatmaps.npz')
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from tank_geometry import TANK_PRESETS
+
+CACHE_NAME = 'merged_heatmaps.npz'
+CACHE_VERSION = 1
+
+
+class CachedGroup:
+    """
+    已合并的组热图，提供与 HeatmapAccumulator 相同的接口（tank_shape、scale_factor、count、
+    avg_total_duration、merged()），可直接交给 group_render_tasks 平滑与渲染。
+    """
+    __slots__ = ('tank_shape', 'scale_factor', 'count', 'avg_total_duration', '_merged')
+
+    def __init__(self, merged, tank_shape, count, avg_total_duration, scale_factor=None):
+        self._merged = merged
+        self.tank_shape = tank_shape
+        self.scale_factor = scale_factor
+        self.count = count
+        self.avg_total_duration = avg_total_duration
+
+    @classmethod
+    def from_accumulator(cls, accumulator):
+        return cls(accumulator.merged(), accumulator.tank_shape, accumulator.count, accumulator.avg_total_duration,
+                   accumulator.scale_factor)
+
+    def merged(self):
+        return self._merged
+
+
+class MergedCache:
+    """load_merged() 的结果：groups 为 {组名: CachedGroup}（保持保存时的组顺序）"""
+    __slots__ = ('fingerprint', 'duration_weighted', 'groups')
+
+    def __init__(self, fingerprint, duration_weighted, groups):
+        self.fingerprint = fingerprint
+        self.duration_weighted = duration_weighted
+        self.groups = groups
+
+
+def cache_path(output_dir, cache_file=None):
+    """缓存文件路径：显式指定的 cache_file，否则为输出文件夹下的 merged_heatmaps.npz"""
+    return cache_file or os.path.join(output_dir, CACHE_NAME)
+
+
+def input_fingerprint(samples, fuzzy_match=False, duration_weighted=False):
+    """由样本文件签名与合并选项计算指纹；samples 为 discover_samples 的结果 {文件夹: [.npy 文件]}"""
+    digest = hashlib.sha1()
+    options = {'version': CACHE_VERSION, 'fuzzy_match': bool(fuzzy_match),
+               'duration_weighted': bool(duration_weighted), 'tanks': TANK_PRESETS}
+    digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+    for folder in sorted(samples):
+        for npy_file in samples[folder]:
+            try:
+                st = os.stat(npy_file)
+                signature = f"{npy_file}\0{st.st_size}\0{st.st_mtime_ns}\n"
+            except OSError:
+                signature = f"{npy_file}\0missing\n"
+            digest.update(signature.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def save_merged(path, groups, fingerprint, duration_weighted=False):
+    """保存 {组名: CachedGroup} 到 .npz（先写临时文件再原子替换），返回路径"""
+    meta = {
+        'version': CACHE_VERSION,
+        'fingerprint': fingerprint,
+        'duration_weighted': bool(duration_weighted),
+        'groups': [{'name': name, 'tank_shape': group.tank_shape, 'scale_factor': None if group.scale_factor is None else float(group.scale_factor),
+                    'count': int(group.count), 'avg_total_duration': float(group.avg_total_duration)}
+                   for name, group in groups.items()],
+    }
+    arrays = {f'merged_{i}': group.merged() for i, group in enumerate(groups.values())}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_merged(path):
+    """读取缓存，返回 MergedCache；文件不存在或版本不符时返回 None"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta.get('version') != CACHE_VERSION:
+            return None
+        groups = {entry['name']: CachedGroup(data[f'merged_{i}'], entry['tank_shape'], entry['count'],
+                                             entry['avg_total_duration'], entry.get('scale_factor'))
+                  for i, entry in enumerate(meta['groups'])}
+    return MergedCache(meta['fingerprint'], meta['duration_weighted'], groups)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+heatmap_gui.py
+
+Findex_Heatmap 的图形界面（HeatmapGUI）。单独成模块，使命令行运行无需导入 tkinter。
+
+用法：
+    python Findex_Heatmap.py                # 打开 GUI
+"""
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from datetime import datetime
+
+from gui_common import ToolTip
+from profiler import Profiler, NULL_PROFILER
+from Findex_Heatmap import FUZZY_AVAILABLE, merge_heatmaps, render_from_cache, resolve_folders
+
+# 语言字典
+LANGUAGES = {
+    '简中': {
+        'title': 'Findex_Heatmap_1.0.1',
+        'folder_label': '请选择样本文件夹（支持母文件夹，显示子文件夹）：',
+        'add_button': '添加文件夹',
+        'remove_button': '删除选中',
+        'fuzzy_check': '启用自动模糊匹配',
+        'fuzzy_tip': '提示：模糊匹配需要安装 fuzzywuzzy',
+        'fuzzy_info': '模糊检索文件夹的组命名，将名称相近的样本\n自动分为一组（如 "Caffiene" 和 "caffeine"）',
+        'kernel_label': '平滑核大小:',
+        'alpha_label': '热图透明度:',
+        'duration_check': '按样本时长归一化',
+        'profile_check': '性能报告',
+        'profile_status': '耗时 ',
+        'output_label': '输出文件夹：',
+        'browse_button': '浏览',
+        'generate_button': '生成合并热图',
+        'rerender_button': '重新渲染',
+        'no_cache_msg': '输出文件夹中没有合并热图缓存，请先生成合并热图',
+        'no_folders': '警告',
+        'no_folders_msg': '请先添加文件夹',
+        'no_output': '警告',
+        'no_output_msg': '请选择输出文件夹',
+        'no_fuzzy': '警告',
+        'no_fuzzy_msg': '模糊匹配需要安装 fuzzywuzzy',
+        'no_data': '提示',
+        'no_data_msg': '未找到有效 heatmap_data 或合并失败',
+        'success': '✅ 已保存 '
+    },
+    'EN': {
+        'title': 'Findex_Heatmap_1.0.1',
+        'folder_label': 'Please select sample folders (supports parent folders with subfolders):',
+        'add_button': 'Add Folder',
+        'remove_button': 'Remove Selected',
+        'fuzzy_check': 'Enable Fuzzy Matching',
+        'fuzzy_tip': 'Note: Fuzzy matching requires fuzzywuzzy',
+        'fuzzy_info': 'Fuzzy search the group naming of the folder,'
+                      '\n and automatically group the samples with similar'
+                      '\n names into one group. (e.g., "Caffiene" and "caffeine")',
+        'kernel_label': 'Kernel Size:',
+        'alpha_label': 'Heatmap Alpha:',
+        'duration_check': 'Per-sample duration weighting',
+        'profile_check': 'Profile',
+        'profile_status': 'Time ',
+        'output_label': 'Output Folder:',
+        'browse_button': 'Browse',
+        'generate_button': 'Generate Merged Heatmaps',
+        'rerender_button': 'Re-render',
+        'no_cache_msg': 'No merged heatmap cache in the output folder, please generate the merged heatmaps first',
+        'no_folders': 'Warning',
+        'no_folders_msg': 'Please add folders first',
+        'no_output': 'Warning',
+        'no_output_msg': 'Please select an output folder',
+        'no_fuzzy': 'Warning',
+        'no_fuzzy_msg': 'Fuzzy matching requires fuzzywuzzy',
+        'no_data': 'Info',
+        'no_data_msg': 'No valid heatmap_data found or merging failed',
+        'success': '✅ Saved '
+    }
+}
+
+class HeatmapGUI(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.language = 'EN'  # 默认英文
+        self.texts = LANGUAGES[self.language]
+        self.title(self.texts['title'])
+        self.geometry('600x500')
+        self.folders = []
+        self.fuzzy_match = tk.BooleanVar(value=False)
+        self.kernel_size = tk.IntVar(value=61)
+        self.heatmap_alpha = tk.DoubleVar(value=0.8)
+        self.duration_weighted = tk.BooleanVar(value=False)
+        self.profile = tk.BooleanVar(value=False)
+        self.build_ui()
+
+    def build_ui(self):
+        # 第一行：文件夹标签和语言选择
+        top_frame = tk.Frame(self)
+        top_frame.pack(fill='x', padx=10, pady=5)
+        self.folder_label = tk.Label(top_frame, text=self.texts['folder_label'])
+        self.folder_label.pack(side='left', anchor='w')
+        lang_frame = tk.Frame(top_frame)
+        lang_frame.pack(side='right')
+        tk.Label(lang_frame, text='Language:').pack(side='left')
+        self.lang_var = tk.StringVar(value=self.language)
+        self.lang_menu = ttk.Combobox(lang_frame, textvariable=self.lang_var, values=['简中', 'EN'], state='readonly', width=5)
+        self.lang_menu.pack(side='left')
+        self.lang_menu.bind('<<ComboboxSelected>>', self.switch_language)
+
+        self.lb = tk.Listbox(self, selectmode=tk.EXTENDED)
+        self.lb.pack(fill='both', expand=True, padx=10)
+
+        frame = tk.Frame(self)
+        frame.pack(fill='x', padx=10, pady=5)
+        self.add_button = tk.Button(frame, text=self.texts['add_button'], command=self.add_folder)
+        self.add_button.pack(side='left')
+        self.remove_button = tk.Button(frame, text=self.texts['remove_button'], command=self.remove_selected)
+        self.remove_button.pack(side='left', padx=5)
+        self.fuzzy_check = tk.Checkbutton(frame, text=self.texts['fuzzy_check'], variable=self.fuzzy_match,
+                                         state='disabled' if not FUZZY_AVAILABLE else 'normal')
+        self.fuzzy_check.pack(side='left', padx=5)
+        self.fuzzy_info = tk.Label(frame, text='ⓘ', font=('Arial', 8), fg='black')
+        self.fuzzy_info.pack(side='left', padx=2)
+        ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])
+
+        param_frame = tk.Frame(self)
+        param_frame.pack(fill='x', padx=10, pady=5)
+        self.kernel_label = tk.Label(param_frame, text=self.texts['kernel_label'])
+        self.kernel_label.pack(side='left')
+        tk.Entry(param_frame, textvariable=self.kernel_size, width=5).pack(side='left', padx=5)
+        self.alpha_label = tk.Label(param_frame, text=self.texts['alpha_label'])
+        self.alpha_label.pack(side='left')
+        tk.Entry(param_frame, textvariable=self.heatmap_alpha, width=5).pack(side='left', padx=5)
+        self.duration_check = tk.Checkbutton(param_frame, text=self.texts['duration_check'],
+                                             variable=self.duration_weighted)
+        self.duration_check.pack(side='left', padx=5)
+        self.profile_check = tk.Checkbutton(param_frame, text=self.texts['profile_check'], variable=self.profile)
+        self.profile_check.pack(side='left', padx=5)
+
+        out_frame = tk.Frame(self)
+        out_frame.pack(fill='x', padx=10, pady=5)
+        self.output_label = tk.Label(out_frame, text=self.texts['output_label'])
+        self.output_label.pack(side='left')
+        self.out_entry = tk.Entry(out_frame)
+        self.out_entry.pack(side='left', fill='x', expand=True, padx=5)
+        self.browse_button = tk.Button(out_frame, text=self.texts['browse_button'], command=self.choose_output)
+        self.browse_button.pack(side='left')
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=10)
+        self.generate_button = tk.Button(button_frame, text=self.texts['generate_button'], command=self.generate)
+        self.generate_button.pack(side='left', padx=5)
+        # 只修改平滑核大小 / 透明度时，从上次生成的合并热图缓存重新渲染；
+        # 文件夹列表或样本、按时长归一化选项已变化（缓存指纹不一致）时重新合并
+        self.rerender_button = tk.Button(button_frame, text=self.texts['rerender_button'], command=self.rerender)
+        self.rerender_button.pack(side='left', padx=5)
+        self.status = tk.Label(self, text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
+        self.status.pack()
+
+    def switch_language(self, event=None):
+        """Switch language and update UI"""
+        self.language = self.lang_var.get()
+        self.texts = LANGUAGES[self.language]
+        self.title(self.texts['title'])
+        self.folder_label.config(text=self.texts['folder_label'])
+        self.add_button.config(text=self.texts['add_button'])
+        self.remove_button.config(text=self.texts['remove_button'])
+        self.fuzzy_check.config(text=self.texts['fuzzy_check'])
+        self.fuzzy_info_tip = ToolTip(self.fuzzy_info, self.texts['fuzzy_info'])  # 更新提示文本
+        self.kernel_label.config(text=self.texts['kernel_label'])
+        self.alpha_label.config(text=self.texts['alpha_label'])
+        self.duration_check.config(text=self.texts['duration_check'])
+        self.profile_check.config(text=self.texts['profile_check'])
+        self.output_label.config(text=self.texts['output_label'])
+        self.browse_button.config(text=self.texts['browse_button'])
+        self.generate_button.config(text=self.texts['generate_button'])
+        self.rerender_button.config(text=self.texts['rerender_button'])
+        self.status.config(text=self.texts['fuzzy_tip'] if not FUZZY_AVAILABLE else '')
+
+    def add_folder(self):
+        path = filedialog.askdirectory(title='选择文件夹' if self.language == 'zh' else 'Select Folder')
+        if not path:
+            return
+        sub_folders = resolve_folders([path])
+        for folder in sub_folders:
+            if folder not in self.folders:
+                self.folders.append(folder)
+                self.lb.insert('end', folder)
+
+    def remove_selected(self):
+        for i in reversed(self.lb.curselection()):
+            self.folders.pop(i)
+            self.lb.delete(i)
+
+    def choose_output(self):
+        path = filedialog.askdirectory(title='选择输出文件夹' if self.language == 'zh' else 'Select Output Folder')
+        if path:
+            default_subfolder = f"Heatmaps_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            full_path = os.path.join(path, default_subfolder)
+            self.out_entry.delete(0, 'end')
+            self.out_entry.insert(0, full_path)
+
+    def generate(self):
+        out_dir = self.out_entry.get().strip()
+        if not self.folders:
+            return messagebox.showwarning(self.texts['no_folders'], self.texts['no_folders_msg'])
+        if not out_dir:
+            return messagebox.showwarning(self.texts['no_output'], self.texts['no_output_msg'])
+
+        fuzzy = self.fuzzy_match.get()
+        if fuzzy and not FUZZY_AVAILABLE:
+            return messagebox.showwarning(self.texts['no_fuzzy'], self.texts['no_fuzzy_msg'])
+
+        kernel = self.kernel_size.get()
+        heatmap_a = self.heatmap_alpha.get()
+
+        # 界面中只记录耗时与 RSS：tracemalloc 会明显拖慢渲染
+        profiler = Profiler(trace_memory=False) if self.profile.get() else NULL_PROFILER
+        results = merge_heatmaps(self.folders, out_dir, fuzzy_match=fuzzy,
+                                 kernel_size=kernel, heatmap_alpha=heatmap_a,
+                                 duration_weighted=self.duration_weighted.get(), profiler=profiler)
+        self.show_results(results, out_dir, profiler, self.texts['no_data_msg'])
+
+    def rerender(self):
+        out_dir = self.out_entry.get().strip()
+        if not out_dir:
+            return messagebox.showwarning(self.texts['no_output'], self.texts['no_output_msg'])
+        profiler = Profiler(trace_memory=False) if self.profile.get() else NULL_PROFILER
+        if self.folders:
+            # 缓存指纹与当前文件夹、选项一致时只重新平滑与渲染，否则重新合并并更新缓存
+            fuzzy = self.fuzzy_match.get() and FUZZY_AVAILABLE
+            results = merge_heatmaps(self.folders, out_dir, fuzzy_match=fuzzy, kernel_size=self.kernel_size.get(),
+                                     heatmap_alpha=self.heatmap_alpha.get(),
+                                     duration_weighted=self.duration_weighted.get(), profiler=profiler,
+                                     use_cache=True)
+            empty_msg = self.texts['no_data_msg']
+        else:
+            # 未添加文件夹时无从校验，直接使用输出文件夹中的缓存
+            results = render_from_cache(out_dir, kernel_size=self.kernel_size.get(),
+                                        heatmap_alpha=self.heatmap_alpha.get(), profiler=profiler)
+            empty_msg = self.texts['no_cache_msg']
+        self.show_results(results, out_dir, profiler, empty_msg)
+
+    def show_results(self, results, out_dir, profiler, empty_msg):
+        if results:
+            status = f"{self.texts['success']}{len(results)} 张热图至: {out_dir}"
+            if profiler.enabled:
+                profiler.write(os.path.join(out_dir, 'profile.json'))
+                status += f"  |  {self.texts['profile_status']}{profiler.summary()}"
+            self.status.config(text=status)
+        else:
+            messagebox.showinfo(self.texts['no_data'], empty_msg)
@@ -1,2 +1,6 @@
 from .heat_loader import HeatmapLoader
-from .beh_loader import BehaviorLoader
\ No newline at end of file
+from .beh_loader import BehaviorLoader
+from .sample_format import read_sample, read_metadata, convert_folder
+from .discovery import discover_samples
+from .batch import load_many, BehaviorBatch, BehaviorDataset
+from .prefetch import PrefetchReader, prefetch_samples
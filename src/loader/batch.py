@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+batch.py
+
+面向模型训练的批量行为数据加载。load_many() 一次读取多个样本，返回列式（struct-of-arrays）的
+BehaviorBatch，而不是为每个文件创建一个 BehaviorLoader 对象：
+- 标量字段为连续的 float32 列（缺失值为 NaN）；
+- speeds 拼接为一个 float32 数组 + 偏移量（speed_offsets），可按需转换为补零的二维数组；
+- top_times / freeze_times 区间（秒）同样拼接为 (m, 2) float32 数组 + 偏移量；
+- 组标签为 int32 编码（group_names 为对应的组名）。
+
+BehaviorDataset 按批迭代样本，可选每轮打乱顺序，由后台线程预取后续批次。
+
+用法（模块调用）：
+    from loader import load_many, BehaviorDataset
+    batch = load_many(paths)                       # .npy 文件或样本文件夹
+    X = batch.scalar_matrix()                      # (n, k) float32
+    speeds, lengths = batch.padded_speeds()        # (n, max_len) float32
+    for batch in BehaviorDataset(paths, batch_size=256, shuffle=True, seed=0):
+        ...
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from .beh_loader import BehaviorLoader
+    from .discovery import discover_samples
+    from .sample_format import read_sample
+except ImportError:  # 作为脚本直接运行
+    from beh_loader import BehaviorLoader
+    from discovery import discover_samples
+    from sample_format import read_sample
+
+# 标量列（顺序即 scalar_matrix() 的列顺序）；first_top_time / freeze_count 为派生值
+SCALAR_COLUMNS = ('avg_speed', 'total_displacement', 'top_time', 'top_frequency', 'freeze_time',
+                  'freeze_frequency', 'first_top_time', 'freeze_count', 'scale_factor')
+
+
+def group_label(path):
+    """由样本文件夹名（GroupName_Index）得到组名，与 Findex_Data 的非模糊匹配规则一致"""
+    folder = path if os.path.isdir(path) else os.path.dirname(path)
+    return os.path.basename(os.path.normpath(folder)).split('_')[0].lower()
+
+
+def resolve_sample_files(paths):
+    """将样本文件夹解析为其第一个 .npy 文件（按文件名排序），.npy 路径原样保留"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            npy_files = discover_samples([path], max_depth=0).get(path)
+            if not npy_files:
+                raise FileNotFoundError(f"文件夹中没有 .npy 文件：{path}")
+            files.append(npy_files[0])
+        else:
+            files.append(path)
+    return files
+
+
+def _intervals(data, key):
+    """读取 (m, 2) 区间数组，缺失或为空时返回 (0, 2)"""
+    value = data.get(key)
+    if value is None or len(value) == 0:
+        return np.empty((0, 2), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32).reshape(-1, 2)
+
+
+def _concat(arrays, shape=()):
+    """拼接为一个 float32 数组，返回 (数组, int64 偏移量)"""
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(a) for a in arrays], out=offsets[1:])
+    flat = np.empty((offsets[-1],) + shape, dtype=np.float32)
+    for i, array in enumerate(arrays):
+        flat[offsets[i]:offsets[i + 1]] = array
+    return flat, offsets
+
+
+def _scalar_row(data):
+    """从原始样本字典提取一行标量（float32 可表示的值，缺失为 NaN）与 speeds 数组"""
+    row = np.full(len(SCALAR_COLUMNS), np.nan, dtype=np.float32)
+    for j, name in enumerate(SCALAR_COLUMNS):
+        if name == 'first_top_time':
+            top_times = data.get('top_times')
+            if top_times is not None and len(top_times):
+                row[j] = np.asarray(top_times[0], dtype=np.float32)[0]
+        elif name == 'freeze_count':
+            row[j] = len(data.get('freeze_times', []))
+        else:
+            value = data.get(BehaviorLoader.FIELDS[name][0])
+            if value is not None:
+                row[j] = value
+    speeds = data.get(BehaviorLoader.FIELDS['speeds'][0])
+    return row, (np.asarray(speeds).reshape(-1) if speeds is not None else np.empty(0, dtype=np.float32))
+
+
+class BehaviorBatch:
+    """
+    BehaviorBatch 以列式存储一批样本：scalars 为 (n, k) float32 矩阵（列见 SCALAR_COLUMNS），
+    speeds 为拼接后的 float32 数组，第 i 个样本为 speeds[speed_offsets[i]:speed_offsets[i + 1]]；
+    top_times / freeze_times 为拼接后的 (m, 2) 区间数组，按 top_offsets / freeze_offsets 以同样方式切分。
+    """
+    __slots__ = ('paths', 'scalars', 'speeds', 'speed_offsets', 'top_times', 'top_offsets', 'freeze_times',
+                 'freeze_offsets', 'groups', 'group_names', 'tank_shapes')
+
+    def __init__(self, paths, scalars, speeds, speed_offsets, groups, group_names, tank_shapes,
+                 top_times=None, top_offsets=None, freeze_times=None, freeze_offsets=None):
+        self.paths = paths
+        self.scalars = scalars
+        self.speeds = speeds
+        self.speed_offsets = speed_offsets
+        self.top_times = top_times
+        self.top_offsets = top_offsets
+        self.freeze_times = freeze_times
+        self.freeze_offsets = freeze_offsets
+        self.groups = groups
+        self.group_names = group_names
+        self.tank_shapes = tank_shapes
+
+    def __len__(self):
+        return len(self.paths)
+
+    def column(self, name):
+        """返回一个标量列（连续的 float32 数组）"""
+        return self.scalars[:, SCALAR_COLUMNS.index(name)]
+
+    def scalar_matrix(self, columns=None):
+        """返回 (n, k) float32 标量矩阵，columns 指定列子集及顺序"""
+        if columns is None:
+            return self.scalars
+        return np.ascontiguousarray(self.scalars[:, [SCALAR_COLUMNS.index(c) for c in columns]])
+
+    @property
+    def speed_lengths(self):
+        return np.diff(self.speed_offsets)
+
+    def speeds_of(self, i):
+        """第 i 个样本的 speeds（视图，不复制）"""
+        return self.speeds[self.speed_offsets[i]:self.speed_offsets[i + 1]]
+
+    def padded_speeds(self, max_len=None, fill=0.0):
+        """返回 (补齐后的 (n, max_len) float32 数组, 各样本原始长度)；超过 max_len 的部分被截断"""
+        lengths = self.speed_lengths
+        max_len = int(lengths.max(initial=0)) if max_len is None else max_len
+        padded = np.full((len(self), max_len), fill, dtype=np.float32)
+        # 向量化散射：每个元素的行号与列号由偏移量计算
+        keep = np.minimum(lengths, max_len)
+        rows = np.repeat(np.arange(len(self)), keep)
+        cols = np.arange(keep.sum()) - np.repeat(np.cumsum(keep) - keep, keep)
+        src = np.repeat(self.speed_offsets[:-1], keep) + cols
+        padded[rows, cols] = self.speeds[src]
+        return padded, lengths
+
+
+def load_many(paths, group_names=None, labels=None, threads=4):
+    """
+    批量加载行为样本，返回 BehaviorBatch。
+
+    paths: .npy 文件或样本文件夹（文件夹取其第一个 .npy 文件）
+    group_names: 组名词表（决定标签编码），默认按出现的组名排序
+    labels: 每个样本的组名，默认由文件夹名推断
+    threads: 并行读取文件的线程数（文件读取与内存映射可并行）
+    """
+    paths = list(paths)
+    files = resolve_sample_files(paths)
+    labels = list(labels) if labels is not None else [group_label(p) for p in paths]
+    group_names = list(group_names) if group_names is not None else sorted(set(labels))
+    codes = {name: i for i, name in enumerate(group_names)}
+
+    def read(npy_file):
+        data = read_sample(npy_file)
+        row, speeds = _scalar_row(data)
+        return (row, speeds, _intervals(data, 'top_times'), _intervals(data, 'freeze_times'),
+                data.get('tank_shape', 'unknown'))
+
+    if threads and threads > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            rows = list(executor.map(read, files))
+    else:
+        rows = [read(f) for f in files]
+
+    columns = list(zip(*rows)) or [()] * 5
+    scalars = np.array(columns[0], dtype=np.float32).reshape(len(rows), len(SCALAR_COLUMNS))
+    speeds, offsets = _concat(columns[1])
+    top_times, top_offsets = _concat(columns[2], (2,))
+    freeze_times, freeze_offsets = _concat(columns[3], (2,))
+    groups = np.array([codes.get(label, -1) for label in labels], dtype=np.int32)
+    return BehaviorBatch(paths, scalars, speeds, offsets, groups, group_names, list(columns[4]),
+                         top_times, top_offsets, freeze_times, freeze_offsets)
+
+
+class BehaviorDataset:
+    """
+    BehaviorDataset 按 batch_size 迭代样本，每次产出一个 BehaviorBatch。
+    shuffle=True 时每轮按 seed 派生的顺序打乱；后台线程最多预取 prefetch 个批次，
+    读取与训练计算重叠。所有批次共用同一组名词表，标签编码在各批次间一致。
+    """
+    def __init__(self, paths, batch_size=64, shuffle=False, seed=None, prefetch=2, drop_last=False, threads=4,
+                 labels=None):
+        self.paths = list(paths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.prefetch = max(1, prefetch)
+        self.drop_last = drop_last
+        self.threads = threads
+        self.labels = list(labels) if labels is not None else [group_label(p) for p in self.paths]
+        self.group_names = sorted(set(self.labels))
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        n = len(self.paths)
+        return n // self.batch_size if self.drop_last else -(-n // self.batch_size)
+
+    def _batches(self):
+        order = self._rng.permutation(len(self.paths)) if self.shuffle else np.arange(len(self.paths))
+        for start in range(0, len(order), self.batch_size):
+            index = order[start:start + self.batch_size]
+            if self.drop_last and len(index) < self.batch_size:
+                break
+            yield index
+
+    def _load(self, index):
+        return load_many([self.paths[i] for i in index], self.group_names, [self.labels[i] for i in index],
+                         self.threads)
+
+    def __iter__(self):
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            """放入队列；消费者已停止迭代时返回 False"""
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def producer():
+            try:
+                for index in self._batches():
+                    if not put(self._load(index)):
+                        return
+                put(done)
+            except BaseException as e:  # 在消费者线程中重新抛出
+                put(e)
+
+        worker = threading.Thread(target=producer, name='BehaviorDataset-prefetch', daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()  # 提前结束迭代时通知后台线程退出
@@ -18,99 +18,170 @@ beh_loader.py
 
 import numpy as np
 import argparse
-import os
+
+try:
+    from .sample_format import read_sample
+except ImportError:  # 作为脚本直接运行
+    from sample_format import read_sample
+
+_MISSING = object()
+
+
+def _to_float32_array(value):
+    return np.array(value, dtype=np.float32)
+
+
+def _identity(value):
+    return value
+
 
 class BehaviorLoader:
     """
     BehaviorLoader 用于加载和预处理 .npy 文件中的鱼类行为数据，
     兼容老版本和新版本格式（忽略 'heatmap_data'），为神经网络训练提供输入。
+
+    各字段在首次访问时才进行类型转换并缓存；scalars_only=True 时只提取标量字段
+    （以及 first_top_time / freeze_count），随后释放原始字典，数组属性返回 None。
     """
-    def __init__(self, filepath):
-        """初始化加载器，加载并预处理 .npy 文件"""
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"文件不存在：{filepath}")
-        self.data = np.load(filepath, allow_pickle=True).item()
-        self._processed = self._preprocess()
-
-    def _preprocess(self):
-        """预处理数据，提取行为相关键并转换类型"""
-        processed = {}
-
-        # 速度相关数据
-        if 'speeds_mm_s' in self.data:
-            processed['speeds'] = np.array(self.data['speeds_mm_s'], dtype=np.float32)
-        if 'avg_speed_mm_s' in self.data:
-            processed['avg_speed'] = float(self.data['avg_speed_mm_s'])
-        if 'total_displacement_mm' in self.data:
-            processed['total_displacement'] = float(self.data['total_displacement_mm'])
-
-        # 顶部行为数据
-        if 'top_time' in self.data:
-            processed['top_time'] = float(self.data['top_time'])
-        if 'top_times' in self.data:
-            processed['top_times'] = np.array(self.data['top_times'], dtype=np.float32)
-        if 'top_frequency' in self.data:
-            processed['top_frequency'] = int(self.data['top_frequency'])
-
-        # 冻结行为数据
-        if 'freeze_time' in self.data:
-            processed['freeze_time'] = float(self.data['freeze_time'])
-        if 'freeze_times' in self.data:
-            processed['freeze_times'] = np.array(self.data['freeze_times'], dtype=np.float32)
-        if 'freeze_frequency' in self.data:
-            processed['freeze_frequency'] = int(self.data['freeze_frequency'])
-
-        # 鱼缸配置信息
-        for key in ['tank_shape', 'trapezoid_side', 'scale_factor']:
-            if key in self.data:
-                processed[key] = self.data[key]
-
-        return processed
+    __slots__ = ('filepath', 'data', 'scalars_only', '_fields', '_processed')
+
+    # 预处理后的键 -> (原始键, 转换函数)，顺序即 get_processed() 的键顺序
+    FIELDS = {
+        'speeds': ('speeds_mm_s', _to_float32_array),
+        'avg_speed': ('avg_speed_mm_s', float),
+        'total_displacement': ('total_displacement_mm', float),
+        'top_time': ('top_time', float),
+        'top_times': ('top_times', _to_float32_array),
+        'top_frequency': ('top_frequency', int),
+        'freeze_time': ('freeze_time', float),
+        'freeze_times': ('freeze_times', _to_float32_array),
+        'freeze_frequency': ('freeze_frequency', int),
+        'tank_shape': ('tank_shape', _identity),
+        'trapezoid_side': ('trapezoid_side', _identity),
+        'scale_factor': ('scale_factor', _identity),
+    }
+    ARRAY_FIELDS = ('speeds', 'top_times', 'freeze_times')
+
+    def __init__(self, filepath, scalars_only=False):
+        """初始化加载器，加载 .npy 文件（优先使用无 pickle 格式，字段转换延迟到首次访问）"""
+        self._setup(read_sample(filepath), filepath, scalars_only)
+
+    @classmethod
+    def from_dict(cls, data, filepath=None, scalars_only=False):
+        """从已加载的样本字典构造加载器（与其他加载器共享同一份反序列化结果，不修改 data）"""
+        loader = cls.__new__(cls)
+        loader._setup(data, filepath, scalars_only)
+        return loader
+
+    def _setup(self, data, filepath, scalars_only):
+        self.filepath = filepath
+        self.data = data
+        self.scalars_only = scalars_only
+        self._fields = {}
+        self._processed = None
+        if scalars_only:
+            self._extract_scalars()
+
+    def _extract_scalars(self):
+        """提取全部标量字段及派生值，然后释放原始字典"""
+        for name in self.FIELDS:
+            if name not in self.ARRAY_FIELDS:
+                self._field(name)
+        self._compute_derived()  # 派生值需在释放原始字典前计算
+        self.data = None
+
+    def _compute_derived(self):
+        """由原始字典计算并缓存派生值（first_top_time、freeze_count）"""
+        self._fields['first_top_time'] = self._first_top_time(self.data.get('top_times'))
+        self._fields['freeze_count'] = len(self.data.get('freeze_times', []))
+
+    @staticmethod
+    def _first_top_time(top_times):
+        if top_times is None or len(top_times) == 0:
+            return None
+        return np.asarray(top_times[0], dtype=np.float32)[0]
+
+    def _field(self, name):
+        """按需转换单个字段并缓存，缺失的键返回 _MISSING"""
+        value = self._fields.get(name, _MISSING)
+        if value is not _MISSING or name in self._fields:
+            return value
+        if self.data is None:  # scalars_only 模式下数组已被释放
+            return _MISSING
+        raw_key, convert = self.FIELDS[name]
+        value = convert(self.data[raw_key]) if raw_key in self.data else _MISSING
+        self._fields[name] = value
+        return value
+
+    def _get(self, name):
+        value = self._field(name)
+        return None if value is _MISSING else value
 
     # 属性访问方法
     @property
     def speeds(self):
-        return self._processed.get('speeds')
+        return self._get('speeds')
 
     @property
     def avg_speed(self):
-        return self._processed.get('avg_speed')
+        return self._get('avg_speed')
 
     @property
     def total_displacement(self):
-        return self._processed.get('total_displacement')
+        return self._get('total_displacement')
 
     @property
     def top_time(self):
-        return self._processed.get('top_time')
+        return self._get('top_time')
 
     @property
     def top_times(self):
-        return self._processed.get('top_times')
+        return self._get('top_times')
 
     @property
     def top_frequency(self):
-        return self._processed.get('top_frequency')
+        return self._get('top_frequency')
 
     @property
     def freeze_time(self):
-        return self._processed.get('freeze_time')
+        return self._get('freeze_time')
 
     @property
     def freeze_times(self):
-        return self._processed.get('freeze_times')
+        return self._get('freeze_times')
 
     @property
     def freeze_frequency(self):
-        return self._processed.get('freeze_frequency')
+        return self._get('freeze_frequency')
+
+    @property
+    def first_top_time(self):
+        """首次进入顶部的时间（top_times 第一个区间的起点），无记录时为 None"""
+        if 'first_top_time' not in self._fields:
+            self._compute_derived()
+        return self._fields['first_top_time']
+
+    @property
+    def freeze_count(self):
+        """freeze_times 中的区间数量"""
+        if 'freeze_count' not in self._fields:
+            self._compute_derived()
+        return self._fields['freeze_count']
 
     @property
     def tank_info(self):
         keys = ['tank_shape', 'scale_factor', 'trapezoid_side']
-        return {k: self._processed.get(k) for k in keys if k in self._processed}
+        return {k: self._get(k) for k in keys if self._field(k) is not _MISSING}
 
     def get_processed(self):
-        """返回预处理后的数据字典"""
+        """返回预处理后的数据字典（scalars_only 模式下不含数组字段）"""
+        if self._processed is None:
+            processed = {}
+            for name in self.FIELDS:
+                value = self._field(name)
+                if value is not _MISSING:
+                    processed[name] = value
+            self._processed = processed
         return self._processed
 
 def main():
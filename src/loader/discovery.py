@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+discovery.py
+
+Findex_Data 与 Findex_Heatmap 共用的样本文件夹发现模块。用 os.scandir 单次遍历目录树
+（每个目录只列举一次，不再对每个候选目录调用 glob），返回 {样本文件夹: [.npy 文件]}，
+加载器可直接使用其中的文件列表而无需再次 glob。
+
+规则（与旧版 resolve_folders 一致）：
+- 给定路径本身含有 .npy 文件时，它就是样本文件夹，不再向下搜索；
+- 否则在其子目录中搜索，最多向下 max_depth 层（默认 1，即只看直接子目录）；
+- 含有 .npy 的目录视为样本文件夹，不再进入其子目录（如 *.arrays）。
+include / exclude 为 fnmatch 通配符（如 "control_*"）：exclude 匹配的目录会被整体跳过，
+include 只作用于样本文件夹名。threads > 0 时按层并行列举目录，适用于高延迟的网络存储。
+
+用法（模块调用）：
+    from loader import discover_samples
+    samples = discover_samples(["path/to/parent"], max_depth=2, exclude=["*_bad"])
+    for folder, npy_files in samples.items():
+        ...
+"""
+
+import os
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _scan_dir(path):
+    """列举一个目录，返回 (排序后的 .npy 文件列表, 子目录列表)"""
+    npy_files, sub_dirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        sub_dirs.append(entry.name)
+                    elif entry.name.endswith('.npy') and entry.is_file():
+                        npy_files.append(os.path.join(path, entry.name))
+                except OSError:
+                    continue
+    except OSError:
+        return [], []
+    return sorted(npy_files), sorted(sub_dirs)
+
+
+def _matches(name, patterns):
+    return any(fnmatch(name, pattern) for pattern in patterns)
+
+
+def discover_samples(paths, max_depth=1, include=None, exclude=None, threads=0):
+    """
+    发现样本文件夹，返回按路径排序的 {文件夹: [.npy 文件]}。
+
+    max_depth: 在不含 .npy 的给定路径下最多向下搜索的层数
+    include / exclude: 文件夹名通配符列表
+    threads: 并行列举目录的线程数（0 为单线程）
+    """
+    include = list(include or [])
+    exclude = list(exclude or [])
+    found = {}
+    # 逐层广度优先：(目录, 剩余可下探层数)
+    level = [(p, max_depth) for p in paths if os.path.isdir(p)]
+    executor = ThreadPoolExecutor(max_workers=threads) if threads and threads > 0 else None
+    try:
+        while level:
+            dirs = [d for d, _ in level]
+            scans = executor.map(_scan_dir, dirs) if executor else map(_scan_dir, dirs)
+            next_level = []
+            for (path, depth), (npy_files, sub_dirs) in zip(level, scans):
+                name = os.path.basename(os.path.normpath(path))
+                if npy_files:
+                    if not include or _matches(name, include):
+                        found[path] = npy_files
+                    continue
+                if depth <= 0:
+                    continue
+                for sub in sub_dirs:
+                    if not _matches(sub, exclude):
+                        next_level.append((os.path.join(path, sub), depth - 1))
+            level = next_level
+    finally:
+        if executor:
+            executor.shutdown()
+    return {folder: found[folder] for folder in sorted(found)}
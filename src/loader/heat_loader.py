@@ -17,7 +17,11 @@ heat_loader.py
 
 import numpy as np
 import argparse
-import os
+
+try:
+    from .sample_format import read_sample
+except ImportError:  # 作为脚本直接运行
+    from sample_format import read_sample
 
 class HeatmapLoader:
     """
@@ -25,19 +29,19 @@ class HeatmapLoader:
     返回原始数组及其他配置信息，为后期绘制叠加热图提供输入。
     """
     def __init__(self, filepath):
-        """初始化加载器，加载并预处理 .npy 文件"""
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"文件不存在：{filepath}")
-        self.data = np.load(filepath, allow_pickle=True)
-        # 检查是否为字典，否则假设是纯数组（旧版兼容）
-        if isinstance(self.data, dict):
-            self.data = self.data
-        elif self.data.ndim == 0:  # 处理 .item() 的情况
-            self.data = self.data.item()
-        else:
-            self.data = {'heatmap_data': self.data}  # 旧版纯数组
+        """初始化加载器，加载并预处理 .npy 文件（优先使用无 pickle 格式）"""
+        # read_sample 兼容 pickle 字典、旧版纯数组及无 pickle 格式
+        self.data = read_sample(filepath)
         self._processed = self._preprocess()
 
+    @classmethod
+    def from_dict(cls, data):
+        """从已加载的样本字典构造加载器（与其他加载器共享同一份反序列化结果，不修改 data）"""
+        loader = cls.__new__(cls)
+        loader.data = data
+        loader._processed = loader._preprocess()
+        return loader
+
     def _preprocess(self):
         """预处理数据，提取所有可用键并转换为标准格式"""
         processed = {}
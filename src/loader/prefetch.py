@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+prefetch.py
+
+网络存储（SMB / NFS）上的样本预读。逐个 np.load 时，读取受网络延迟限制，CPU 等待网络，
+随后网络又等待反序列化。PrefetchReader 用线程池提前把后续 prefetch 个样本文件的内容读入内存，
+主线程反序列化当前样本的同时，后续文件已在读取中：
+- 按输入顺序产出 (路径, 文件内容 bytes)，结果与逐个读取完全一致；
+- 最多 prefetch 个文件在读取中或已读完等待消费（有界窗口），内存占用与样本数无关；
+- 已转换为无 pickle 格式的样本（sidecar 有效）不预读，数组仍按需内存映射，内容为 None；
+- 读取失败（文件不存在、权限等）时内容为 None，read_sample 随后按路径读取并报告原来的错误。
+
+文件内容交给 read_sample(npy_file, data=内容) 反序列化。
+
+用法（模块调用）：
+    from loader import PrefetchReader, read_sample
+    for npy_file, data in PrefetchReader(npy_files, prefetch=8):
+        sample = read_sample(npy_file, data=data)
+    for folder, npy_files, contents in prefetch_samples(samples, prefetch=8):   # samples: {文件夹: [.npy]}
+        sample = read_sample(npy_files[0], data=contents[npy_files[0]])
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+try:
+    from .sample_format import _read_sidecar
+except ImportError:  # 作为脚本直接运行
+    from sample_format import _read_sidecar
+
+
+def fetch_sample_bytes(npy_file):
+    """读取样本文件的全部内容；有有效 sidecar（数组按需内存映射）或读取失败时返回 None"""
+    if _read_sidecar(npy_file) is not None:
+        return None
+    try:
+        with open(npy_file, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class PrefetchReader:
+    """
+    按顺序迭代 (路径, 文件内容)；prefetch 个后台线程最多提前读取 prefetch 个文件。
+    prefetch <= 0 时不预读，内容全部为 None（read_sample 直接按路径读取）。
+    """
+    def __init__(self, paths, prefetch=4):
+        self.paths = paths
+        self.prefetch = max(0, prefetch or 0)
+
+    def __iter__(self):
+        if self.prefetch <= 0:
+            for path in self.paths:
+                yield path, None
+            return
+        paths = iter(self.paths)
+        executor = ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix='findex-prefetch')
+        window = deque((path, executor.submit(fetch_sample_bytes, path)) for path in islice(paths, self.prefetch))
+        try:
+            while window:
+                path, future = window.popleft()
+                data = future.result()
+                # 取走一个结果后才提交下一个文件，窗口大小不超过 prefetch
+                for next_path in islice(paths, 1):
+                    window.append((next_path, executor.submit(fetch_sample_bytes, next_path)))
+                yield path, data
+        finally:
+            # 提前结束迭代时丢弃尚未开始的读取
+            for _, future in window:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+def prefetch_samples(samples, prefetch=4):
+    """
+    按文件夹迭代 discover_samples 的结果 {文件夹: [.npy 文件]}，产出 (文件夹, 文件列表, {文件: 内容})；
+    所有文件夹的文件连续预读，窗口跨越文件夹边界
+    """
+    reader = iter(PrefetchReader([f for npy_files in samples.values() for f in npy_files], prefetch))
+    for folder, npy_files in samples.items():
+        yield folder, npy_files, dict(islice(reader, len(npy_files)))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sample_format.py
+
+zebrAI_fish 将每个样本保存为 0 维 object 数组中的 pickle 字典（.npy），读取任意一个标量
+都必须反序列化整个文件。本模块提供无 pickle 的样本格式及转换工具：
+
+    behavior_data.npy            原始文件（保留，作为数据源）
+    behavior_data.json           元数据 sidecar：标量字段 + 数组文件索引 + 源文件签名
+    behavior_data.arrays/*.npy   每个数组字段一个普通 .npy 文件，可用 mmap_mode='r' 打开
+
+加载器通过 read_sample() 读取样本：若存在与源文件签名（大小、mtime）一致的 sidecar，
+则只解析 JSON 并以内存映射方式打开数组；否则回退到 pickle 加载。
+read_sample(npy_file, data=...) 可直接反序列化已读入内存的文件内容（见 prefetch.py）。
+read_metadata() 只返回标量元数据（tank_shape、scale_factor、total_duration 等）。
+
+用法（脚本运行，转换样本文件夹）：
+    python sample_format.py --folders path/to/Group_Index [path/to/parent ...] [--force]
+
+用法（模块调用）：
+    from loader import read_sample, read_metadata
+    data = read_sample("path/to/behavior_data.npy")
+    meta = read_metadata("path/to/heatmap_data.npy")
+"""
+
+import io
+import os
+import json
+import argparse
+
+import numpy as np
+
+try:
+    from .discovery import discover_samples
+except ImportError:  # 作为脚本直接运行
+    from discovery import discover_samples
+
+FORMAT_NAME = 'findex-sample'
+FORMAT_VERSION = 1
+ARRAYS_SUFFIX = '.arrays'
+
+
+def sidecar_path(npy_file):
+    """返回 .npy 文件对应的 JSON sidecar 路径"""
+    return os.path.splitext(npy_file)[0] + '.json'
+
+
+def _source_signature(npy_file):
+    try:
+        st = os.stat(npy_file)
+    except OSError:
+        return None
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _read_sidecar(npy_file):
+    """读取与源文件一致的 sidecar，不存在或已过期时返回 None"""
+    path = sidecar_path(npy_file)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if sidecar.get('format') != FORMAT_NAME or sidecar.get('version') != FORMAT_VERSION:
+        return None
+    signature = _source_signature(npy_file)
+    # 源文件已被重新写入时 sidecar 失效；源文件被删除时仍可单独使用 sidecar
+    if signature is not None and signature != sidecar.get('source'):
+        return None
+    return sidecar
+
+
+def _load_pickled(npy_file, content=None):
+    """以 pickle 方式加载原始 .npy（content 为已读入的文件内容），旧版纯数组包装为 {'heatmap_data': array}"""
+    data = np.load(io.BytesIO(content) if content is not None else npy_file, allow_pickle=True)
+    if isinstance(data, dict):
+        return data
+    if data.ndim == 0:
+        return data.item()
+    return {'heatmap_data': data}
+
+
+def read_sample(npy_file, mmap_mode='r', data=None):
+    """读取样本字典，优先使用无 pickle 格式（数组以 mmap_mode 打开）；
+    data 为已预读的文件内容（bytes，见 PrefetchReader），给定时不再从磁盘读取 .npy"""
+    if data is not None:
+        return _load_pickled(npy_file, data)
+    if not os.path.exists(npy_file) and not os.path.exists(sidecar_path(npy_file)):
+        raise FileNotFoundError(f"文件不存在：{npy_file}")
+    sidecar = _read_sidecar(npy_file)
+    if sidecar is None:
+        return _load_pickled(npy_file)
+    base_dir = os.path.dirname(npy_file)
+    data = dict(sidecar['meta'])
+    for key, rel_path in sidecar['arrays'].items():
+        data[key] = np.load(os.path.join(base_dir, rel_path), mmap_mode=mmap_mode)
+    return data
+
+
+def read_metadata(npy_file):
+    """只读取标量元数据；有 sidecar 时仅解析 JSON，不打开任何数组"""
+    sidecar = _read_sidecar(npy_file)
+    if sidecar is not None:
+        return dict(sidecar['meta'])
+    data = read_sample(npy_file)
+    return {k: v for k, v in data.items() if not isinstance(v, np.ndarray) or v.ndim == 0}
+
+
+def _split_fields(data):
+    """将样本字典拆分为 JSON 元数据与数值数组，无法表示的值抛出 ValueError"""
+    meta, arrays = {}, {}
+    for key, value in data.items():
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, (list, tuple)):
+            converted = np.asarray(value)
+            if converted.dtype != object and converted.dtype.kind in 'biuf':
+                value = converted
+        if isinstance(value, np.ndarray):
+            if value.ndim == 0 and value.dtype != object:
+                meta[key] = value.item()
+            elif value.dtype.kind in 'biufc':
+                arrays[key] = value
+            else:
+                raise ValueError(f"字段 '{key}' 的 dtype {value.dtype} 无法转换为无 pickle 格式")
+            continue
+        try:
+            json.dumps(value)
+        except TypeError:
+            raise ValueError(f"字段 '{key}' 的类型 {type(value).__name__} 无法写入 JSON")
+        meta[key] = value
+    return meta, arrays
+
+
+def convert_file(npy_file, force=False):
+    """将单个 pickle .npy 转换为 sidecar + 数组目录，返回是否写入了新文件"""
+    if not force and _read_sidecar(npy_file) is not None:
+        return False
+    signature = _source_signature(npy_file)
+    meta, arrays = _split_fields(_load_pickled(npy_file))
+
+    stem = os.path.splitext(os.path.basename(npy_file))[0]
+    base_dir = os.path.dirname(npy_file)
+    array_dir = stem + ARRAYS_SUFFIX
+    os.makedirs(os.path.join(base_dir, array_dir), exist_ok=True)
+    index = {}
+    for key, value in arrays.items():
+        rel_path = os.path.join(array_dir, f"{key}.npy")
+        np.save(os.path.join(base_dir, rel_path), np.ascontiguousarray(value), allow_pickle=False)
+        index[key] = rel_path
+
+    # sidecar 最后写入，存在即表示转换完整
+    sidecar = {'format': FORMAT_NAME, 'version': FORMAT_VERSION, 'source': signature,
+               'meta': meta, 'arrays': index}
+    path = sidecar_path(npy_file)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return True
+
+
+def convert_folder(folder, force=False):
+    """转换文件夹内所有 .npy 文件，返回 (已转换, 已跳过, 失败) 计数"""
+    converted = skipped = failed = 0
+    for npy_file in discover_samples([folder], max_depth=0).get(folder, []):
+        try:
+            if convert_file(npy_file, force=force):
+                converted += 1
+            else:
+                skipped += 1
+        except Exception as e:
+            print(f"  ! {npy_file}: {e}")
+            failed += 1
+    return converted, skipped, failed
+
+
+def main():
+    """脚本运行入口，将样本文件夹转换为无 pickle 格式"""
+    parser = argparse.ArgumentParser(description="将 zebrAI_fish 样本 .npy 转换为无 pickle、可内存映射的格式")
+    parser.add_argument('--folders', nargs='+', required=True, help='样本文件夹或母文件夹')
+    parser.add_argument('--force', action='store_true', help='即使已有最新的 sidecar 也重新转换')
+    args = parser.parse_args()
+
+    folders = list(discover_samples(args.folders))
+
+    totals = [0, 0, 0]
+    for folder in folders:
+        counts = convert_folder(folder, force=args.force)
+        totals = [t + c for t, c in zip(totals, counts)]
+    print(f"已转换 {totals[0]} 个文件，跳过 {totals[1]} 个（已是最新），失败 {totals[2]} 个")
+
+if __name__ == '__main__':
+    main()
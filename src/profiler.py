@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+profiler.py
+
+Findex 流水线的计时与内存统计（--profile）。按阶段（扫描目录、加载样本、缩放与掩膜、平滑、
+渲染、写出表格等）记录墙钟时间、调用次数、tracemalloc 峰值与进程 RSS 峰值，
+并记录耗时最长的 N 个样本文件夹，最终写出 JSON 报告。
+
+未开启 --profile 时使用 NULL_PROFILER，各阶段只是空的上下文管理器，不产生额外开销。
+注意：tracemalloc 只统计当前进程，并行加载 / 渲染时子进程的内存体现在 rss_children_peak_mb 中；
+tracemalloc 会使导入与渲染明显变慢，只关心耗时时可用 trace_memory=False（命令行 --profile_no_trace）。
+
+用法（模块调用）：
+    from profiler import Profiler
+    profiler = Profiler(top_n=10)
+    with profiler.stage('load'):
+        ...
+    profiler.record_sample(folder, seconds)
+    profiler.write('summary.profile.json')
+    print(profiler.summary())
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块，不记录 RSS
+    resource = None
+
+
+def _rss_peak_mb(children=False):
+    """返回当前进程（或已结束子进程中最大）的 RSS 峰值（MB），不支持时返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def stop_worker_tracing():
+    """进程池 initializer：fork 出的子进程会继承父进程的 tracemalloc 状态，在子进程中关闭以免拖慢工作"""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class _NullProfiler:
+    """未开启 --profile 时的空实现"""
+    enabled = False
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def record_sample(self, folder, seconds):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class Profiler:
+    """
+    Profiler 按阶段汇总耗时、调用次数与内存峰值。同名阶段可多次进入（如逐样本加载），
+    耗时累加、内存取各次的最大值。
+    """
+    enabled = True
+
+    def __init__(self, top_n=10, trace_memory=True):
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.samples = []
+        self._start = time.perf_counter()
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @contextmanager
+    def stage(self, name):
+        """统计一个阶段：with profiler.stage('blur'): ..."""
+        entry = self.stages.setdefault(name, {'wall_s': 0.0, 'calls': 0, 'tracemalloc_peak_mb': None,
+                                              'rss_peak_mb': None})
+        if self.trace_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['wall_s'] += time.perf_counter() - start
+            entry['calls'] += 1
+            if self.trace_memory:
+                peak = (tracemalloc.get_traced_memory()[1] - base) / (1024 * 1024)
+                entry['tracemalloc_peak_mb'] = max(entry['tracemalloc_peak_mb'] or 0.0, peak)
+            rss = _rss_peak_mb()
+            if rss is not None:
+                entry['rss_peak_mb'] = max(entry['rss_peak_mb'] or 0.0, rss)
+
+    def record_sample(self, folder, seconds):
+        """记录单个样本文件夹的加载耗时"""
+        self.samples.append((seconds, folder))
+
+    def slowest_samples(self):
+        return [{'folder': folder, 'seconds': seconds}
+                for seconds, folder in sorted(self.samples, reverse=True)[:self.top_n]]
+
+    def report(self):
+        """返回报告字典"""
+        total = time.perf_counter() - self._start
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'total_wall_s': total,
+            # 未归入任何阶段的时间（模块导入、参数解析等）
+            'unattributed_s': total - sum(s['wall_s'] for s in self.stages.values()),
+            'stages': self.stages,
+            'samples_timed': len(self.samples),
+            'slowest_samples': self.slowest_samples(),
+            'rss_peak_mb': _rss_peak_mb(),
+            'rss_children_peak_mb': _rss_peak_mb(children=True),
+        }
+        if self.trace_memory and tracemalloc.is_tracing():
+            report['tracemalloc_peak_mb'] = max(
+                [s['tracemalloc_peak_mb'] or 0.0 for s in self.stages.values()] or [0.0])
+        return report
+
+    def write(self, path):
+        """写出 JSON 报告，返回路径"""
+        report = self.report()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return path
+
+    def summary(self, n=3):
+        """一行摘要（总耗时 + 最耗时的 n 个阶段），用于命令行输出与 GUI 状态栏"""
+        top = sorted(self.stages.items(), key=lambda kv: kv[1]['wall_s'], reverse=True)[:n]
+        parts = ', '.join(f"{name} {entry['wall_s']:.2f}s" for name, entry in top)
+        return f"{time.perf_counter() - self._start:.2f}s ({parts})"
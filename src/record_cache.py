@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+record_cache.py
+
+Findex_Data 的持久化样本记录缓存。以 .npy 文件的绝对路径为键，
+同时记录文件大小与修改时间（mtime_ns），文件未变化时直接复用上次提取的
+统计记录，跳过 np.load；文件大小或修改时间变化时条目自动失效。
+记录的字段列表（fields）与缓存文件一起保存：字段列表或 VERSION 与缓存文件不一致时整个缓存失效，
+记录格式变化后不会复用缺少字段或含过期字段的旧记录。
+
+用法（模块调用）：
+    from record_cache import RecordCache
+    cache = RecordCache(fields=RECORD_FIELDS)   # 默认位置 ~/.findex/record_cache.json
+    record = cache.lookup(npy_file)     # 命中返回记录字典，否则返回 None
+    cache.store(npy_file, record)
+    cache.save()
+"""
+
+import os
+import json
+import logging
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.findex', 'record_cache.json')
+
+logger = logging.getLogger('findex.cache')
+
+
+def _to_builtin(value):
+    """将 numpy 标量转换为 JSON 可序列化的 Python 内置类型（不导入 numpy）"""
+    if type(value).__module__ == 'numpy':
+        return value.item()
+    return value
+
+
+def _file_signature(path):
+    """返回 (size, mtime_ns)，文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class RecordCache:
+    """
+    RecordCache 以 (路径, 大小, mtime) 为键缓存每个样本的统计记录，
+    使增量重跑只需加载新增或修改过的样本。
+    """
+    # 记录的存储格式变化时递增
+    VERSION = 2
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, rebuild=False, fields=None):
+        """加载缓存文件；rebuild=True 时忽略已有内容并重新生成；
+        fields 为记录的字段列表，与缓存文件中保存的不一致时忽略已有内容"""
+        self.path = path
+        self.fields = list(fields) if fields is not None else None
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._seen = set()
+        if not rebuild:
+            self._load()
+        else:
+            self._dirty = True
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(content, dict) and content.get('version') == self.VERSION \
+                and content.get('fields') == self.fields:
+            self.entries = content.get('entries', {})
+
+    @staticmethod
+    def _key(npy_file):
+        return os.path.abspath(npy_file)
+
+    def lookup(self, npy_file):
+        """返回未过期的缓存记录，文件变化或未缓存时返回 None"""
+        key = self._key(npy_file)
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        signature = _file_signature(npy_file)
+        if entry is not None and signature is not None and \
+                (entry.get('size'), entry.get('mtime_ns')) == signature:
+            self.hits += 1
+            return dict(entry['record'])
+        self.misses += 1
+        return None
+
+    def store(self, npy_file, record):
+        """写入（或覆盖）一个样本记录"""
+        signature = _file_signature(npy_file)
+        if signature is None:
+            return
+        key = self._key(npy_file)
+        self._seen.add(key)
+        self.entries[key] = {
+            'size': signature[0],
+            'mtime_ns': signature[1],
+            'record': {k: _to_builtin(v) for k, v in record.items()},
+        }
+        self._dirty = True
+
+    def prune(self):
+        """删除本次未访问且源文件已不存在的条目"""
+        for key in [k for k in self.entries if k not in self._seen and not os.path.exists(k)]:
+            del self.entries[key]
+            self._dirty = True
+
+    def save(self):
+        """原子写回缓存文件（先写临时文件再替换）；缓存只用于加速，写入失败时只记录警告"""
+        self.prune()
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'fields': self.fields, 'entries': self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write record cache %s: %s", self.path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._dirty = False
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+table_writers.py
+
+Findex_Data 汇总表的输出（命令行与 GUI 共用），按扩展名选择格式：
+- .xlsx：用 xlsxwriter 逐行写出，写入时同步记录每列最长的文本长度，最后一次性设置列宽，
+  不再对整张表做 astype(str)；streaming=True 时使用 constant_memory 模式，已写完的行立即刷到
+  临时文件，内存占用与行数无关（适合 10 万行以上的表）；
+- .csv（以及其他未知扩展名，与以前的行为一致）：pandas to_csv；
+- .parquet / .feather：列式格式，需要可选依赖 pyarrow。
+所有格式都先写临时文件再原子替换，写出失败时不会留下半个文件。
+
+额外的表（sheets，如 Statistics）在 .xlsx 中为额外的工作表，其他格式写到 <output>.<名称小写>.<扩展名>。
+
+用法（模块调用）：
+    from table_writers import write_table
+    write_table(df, 'summary.xlsx', sheets={'Statistics': stats_df}, streaming=True)
+"""
+
+import os
+import math
+
+# 扩展名 -> 格式名（GUI 的文件类型列表与命令行帮助共用）
+OUTPUT_FORMATS = {
+    '.xlsx': 'Excel',
+    '.csv': 'CSV',
+    '.parquet': 'Parquet',
+    '.feather': 'Feather',
+}
+
+# 与 pandas to_excel 的默认表头样式一致
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+# 每次从 DataFrame 取出的行数（逐块转换为 Python 对象，避免一次性复制整张表）
+ROW_CHUNK = 10000
+
+
+def _require_pyarrow(fmt):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"{fmt} output requires pyarrow (pip install pyarrow)") from None
+
+
+def iter_rows(df):
+    """按块逐行产出 DataFrame 的值（元组）"""
+    for start in range(0, len(df), ROW_CHUNK):
+        yield from df.iloc[start:start + ROW_CHUNK].itertuples(index=False, name=None)
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def write_xlsx_sheet(workbook, sheet_name, columns, rows):
+    """
+    把 rows（可迭代的行元组，可以是生成器）写入一个工作表，返回写出的行数。
+    列宽在写入过程中增量统计（文本长度的最大值 + 2，与 astype(str) 的结果一致），写完后设置。
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    header = workbook.add_format(HEADER_FORMAT)
+    widths = [len(str(col)) for col in columns]
+    for j, col in enumerate(columns):
+        worksheet.write_string(0, j, str(col), header)
+    n = 0
+    for n, row in enumerate(rows, start=1):
+        for j, value in enumerate(row):
+            text_len = len(str(value))
+            if text_len > widths[j]:
+                widths[j] = text_len
+            if type(value).__module__ == 'numpy':  # object 列中的 numpy 标量
+                value = value.item()
+            if _is_blank(value):
+                continue
+            if isinstance(value, str):
+                worksheet.write_string(n, j, value)
+            elif isinstance(value, float) and math.isinf(value):
+                # xlsxwriter 拒绝写入 inf；与 to_excel 的默认 inf_rep 一致，写为文本 'inf' / '-inf'
+                worksheet.write_string(n, j, str(value))
+            elif isinstance(value, (int, float)):
+                worksheet.write_number(n, j, value)
+            else:
+                worksheet.write(n, j, value)
+    for j, width in enumerate(widths):
+        worksheet.set_column(j, j, width + 2)
+    return n
+
+
+def write_xlsx(path, sheets, streaming=False):
+    """sheets 为 {工作表名: DataFrame}；streaming=True 时使用 xlsxwriter 的 constant_memory 模式"""
+    import xlsxwriter
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': streaming})
+    try:
+        for sheet_name, df in sheets.items():
+            write_xlsx_sheet(workbook, sheet_name, list(df.columns), iter_rows(df))
+    finally:
+        workbook.close()
+
+
+def _write_single(df, path, ext):
+    if ext == '.parquet':
+        _require_pyarrow('Parquet')
+        df.to_parquet(path, index=False)
+    elif ext == '.feather':
+        _require_pyarrow('Feather')
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+
+
+def write_table(df, output, sheets=None, streaming=False):
+    """
+    写出汇总表并原子替换 output。
+
+    sheets: {名称: DataFrame}，.xlsx 中为额外的工作表，其他格式写到 <output>.<名称小写>.<扩展名>
+    streaming: .xlsx 使用 constant_memory 模式逐行写出
+    """
+    base, ext = os.path.splitext(output)
+    ext = ext.lower()
+    tmp_path = f"{base}.{os.getpid()}.tmp{ext}"
+    try:
+        if ext == '.xlsx':
+            write_xlsx(tmp_path, {'Sheet1': df, **(sheets or {})}, streaming)
+        else:
+            _write_single(df, tmp_path, ext)
+            for sheet_name, table in (sheets or {}).items():
+                write_table(table, f"{base}.{sheet_name.lower()}{ext}")
+        os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+tank_geometry.py
+
+鱼缸几何引擎：维护鱼缸预设（TANK_PRESETS），计算给定 scale_factor 下的热图尺寸，
+并将鱼缸轮廓栅格化为布尔掩膜。掩膜按 (鱼缸类型, scale_factor, 热图尺寸) 缓存，
+每种组合只栅格化一次，之后对热图的掩膜只是一次原地 np.multiply。
+
+内置鱼缸：
+- rectangle: width=200mm, height=200mm（无需掩膜）
+- trapezoid: top_width=270mm, bottom_width=220mm, height=145mm（两侧斜边外为缸外区域）
+
+可通过 JSON 配置文件注册自定义多边形鱼缸（坐标单位 mm，原点在左上角，y 轴向下）：
+    {
+        "shapes": {
+            "hexagon": {"polygon_mm": [[50, 0], [150, 0], [200, 100], [150, 200], [50, 200], [0, 100]],
+                        "scale_factor": 5}
+        }
+    }
+
+区域（zone_masks，供区域停留分析使用）：每种鱼缸默认有 Top Half / Bottom Half / Left Half / Right Half
+（外接矩形的上下、左右两半）与 Center（外接矩形中间 50% × 50%）/ Periphery（Center 以外）。
+同一配置文件的 "zones" 可为任意鱼缸（含内置鱼缸）追加或覆盖命名区域，坐标与 TANK_PRESETS 相同
+（mm，原点为鱼缸外接矩形左上角，y 轴向下），"invert": true 表示多边形以外的区域：
+    {
+        "zones": {
+            "rectangle": {
+                "Top Left": {"polygon_mm": [[0, 0], [100, 0], [100, 100], [0, 100]]},
+                "Outer Ring": {"polygon_mm": [[20, 20], [180, 20], [180, 180], [20, 180]], "invert": true}
+            }
+        }
+    }
+区域按像素中心是否在多边形内栅格化，共用边的相邻区域互不重叠；区域掩膜再与鱼缸掩膜取交集。
+
+用法（模块调用）：
+    from tank_geometry import load_tank_config, apply_tank_mask, zone_masks
+    load_tank_config("tank_shapes.json")
+    apply_tank_mask(heatmap, "hexagon", 5)
+    names, matrix = zone_masks("rectangle", 5, (40, 40))   # matrix: (像素数, 区域数) float32
+"""
+
+import os
+import json
+from functools import lru_cache
+
+import numpy as np
+
+# 鱼缸预设
+TANK_PRESETS = {
+    "rectangle": {"real_width_mm": 200, "real_height_mm": 200, "scale_factor": 5},
+    "trapezoid": {"real_width_top_mm": 270, "real_width_bottom_mm": 220, "real_height_mm": 145, "scale_factor": 5}
+}
+
+# 由配置文件注册的命名区域：鱼缸类型 -> {区域名: {"polygon_mm": [...], "invert": bool}}，
+# 与 default_zones() 的默认区域合并（同名时覆盖默认区域）
+TANK_ZONES = {}
+
+# 未指定 --tank_config 时自动加载的用户配置
+DEFAULT_TANK_CONFIG = os.path.join(os.path.expanduser('~'), '.findex', 'tank_shapes.json')
+
+
+def register_tank_shape(name, polygon_mm, scale_factor=5):
+    """注册一个多边形鱼缸（mm 坐标），尺寸取多边形外接矩形"""
+    polygon = np.asarray(polygon_mm, dtype=np.float64)
+    if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+        raise ValueError(f"鱼缸 '{name}' 的 polygon_mm 必须是至少 3 个 [x, y] 点")
+    polygon = polygon - polygon.min(axis=0)
+    width, height = polygon.max(axis=0)
+    TANK_PRESETS[name] = {
+        "real_width_mm": float(width),
+        "real_height_mm": float(height),
+        "scale_factor": scale_factor,
+        "polygon_mm": polygon.tolist(),
+    }
+    _tank_mask.cache_clear()
+    _zone_masks.cache_clear()
+
+
+def register_zones(tank_shape, zones):
+    """为鱼缸注册命名区域：zones 为 {区域名: {"polygon_mm": [[x, y], ...], "invert": bool}}"""
+    registered = TANK_ZONES.setdefault(tank_shape, {})
+    for name, spec in zones.items():
+        polygon = np.asarray(spec['polygon_mm'], dtype=np.float64)
+        if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+            raise ValueError(f"区域 '{name}' 的 polygon_mm 必须是至少 3 个 [x, y] 点")
+        registered[name] = {"polygon_mm": polygon.tolist(), "invert": bool(spec.get('invert', False))}
+    _zone_masks.cache_clear()
+
+
+def load_tank_config(path):
+    """从 JSON 配置文件注册自定义鱼缸，返回注册的名称列表"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    names = []
+    for name, spec in config.get('shapes', {}).items():
+        register_tank_shape(name, spec['polygon_mm'], spec.get('scale_factor', 5))
+        names.append(name)
+    for tank_shape, zones in config.get('zones', {}).items():
+        register_zones(tank_shape, zones)
+    return names
+
+
+def get_preset(tank_shape):
+    """返回鱼缸预设，未知类型抛出 ValueError"""
+    preset = TANK_PRESETS.get(tank_shape)
+    if not preset:
+        raise ValueError(f"未知的鱼缸类型: {tank_shape}")
+    return preset
+
+
+def tank_size(tank_shape, scale_factor):
+    """返回鱼缸在给定 scale_factor（mm/像素）下的热图尺寸 (height, width)"""
+    preset = get_preset(tank_shape)
+    if "real_width_mm" in preset:
+        width_mm = preset["real_width_mm"]
+    else:  # trapezoid
+        width_mm = max(preset["real_width_top_mm"], preset["real_width_bottom_mm"])
+    return int(preset["real_height_mm"] / scale_factor), int(width_mm / scale_factor)
+
+
+def _rasterize_trapezoid(preset, scale_factor):
+    """逐行计算梯形宽度并居中（向量化），与 zebrAI_fish 的梯形判定一致"""
+    height, width = int(preset["real_height_mm"] / scale_factor), \
+        int(max(preset["real_width_top_mm"], preset["real_width_bottom_mm"]) / scale_factor)
+    top_width = int(preset["real_width_top_mm"] / scale_factor)
+    bottom_width = int(preset["real_width_bottom_mm"] / scale_factor)
+    y = np.arange(height)
+    width_at_y = (top_width + y * (bottom_width - top_width) / max(height - 1, 1)).astype(int)
+    offset = (width - width_at_y) // 2
+    cols = np.arange(width)
+    return (cols >= offset[:, None]) & (cols < (offset + width_at_y)[:, None])
+
+
+def _rasterize_polygon(preset, scale_factor):
+    """用 cv2.fillPoly 栅格化多边形（8 位亚像素精度）"""
+    import cv2
+    height, width = int(preset["real_height_mm"] / scale_factor), int(preset["real_width_mm"] / scale_factor)
+    inside = np.zeros((height, width), dtype=np.uint8)
+    points = np.round(np.asarray(preset["polygon_mm"]) / scale_factor * 256).astype(np.int32)
+    cv2.fillPoly(inside, [points], 1, lineType=cv2.LINE_8, shift=8)
+    return inside.astype(bool)
+
+
+@lru_cache(maxsize=None)
+def _tank_mask(tank_shape, scale_factor, size):
+    preset = TANK_PRESETS.get(tank_shape)
+    if preset is None or ("polygon_mm" not in preset and "real_width_top_mm" not in preset):
+        return None  # 矩形或未知鱼缸：整幅热图都在缸内
+    if "polygon_mm" in preset:
+        inside = _rasterize_polygon(preset, scale_factor)
+    else:
+        inside = _rasterize_trapezoid(preset, scale_factor)
+    # 放入实际热图尺寸，超出鱼缸尺寸的区域视为缸外
+    mask = np.zeros(size, dtype=bool)
+    h, w = min(size[0], inside.shape[0]), min(size[1], inside.shape[1])
+    mask[:h, :w] = inside[:h, :w]
+    mask.setflags(write=False)
+    return mask
+
+
+def tank_mask(tank_shape, scale_factor, size):
+    """返回缓存的只读布尔掩膜（True 为缸内），无需掩膜的鱼缸返回 None"""
+    return _tank_mask(tank_shape, scale_factor, tuple(size))
+
+
+def apply_tank_mask(heatmap, tank_shape, scale_factor=None):
+    """原地将缸外区域置零并返回热图；scale_factor 默认取预设值"""
+    preset = TANK_PRESETS.get(tank_shape)
+    if preset is None:
+        return heatmap
+    if scale_factor is None:
+        scale_factor = preset["scale_factor"]
+    mask = tank_mask(tank_shape, scale_factor, heatmap.shape)
+    if mask is not None:
+        np.multiply(heatmap, mask, out=heatmap)
+    return heatmap
+
+
+def _bounding_box_mm(preset):
+    """鱼缸外接矩形的 (宽, 高)，单位 mm"""
+    if "real_width_mm" in preset:
+        return preset["real_width_mm"], preset["real_height_mm"]
+    return max(preset["real_width_top_mm"], preset["real_width_bottom_mm"]), preset["real_height_mm"]
+
+
+def _rect(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def default_zones(tank_shape):
+    """鱼缸的默认区域（由外接矩形划分的上下 / 左右两半与中心 / 外周）"""
+    width, height = _bounding_box_mm(get_preset(tank_shape))
+    center = _rect(width / 4, height / 4, width * 3 / 4, height * 3 / 4)
+    return {
+        "Top Half": {"polygon_mm": _rect(0, 0, width, height / 2), "invert": False},
+        "Bottom Half": {"polygon_mm": _rect(0, height / 2, width, height), "invert": False},
+        "Left Half": {"polygon_mm": _rect(0, 0, width / 2, height), "invert": False},
+        "Right Half": {"polygon_mm": _rect(width / 2, 0, width, height), "invert": False},
+        "Center": {"polygon_mm": center, "invert": False},
+        "Periphery": {"polygon_mm": center, "invert": True},
+    }
+
+
+def tank_zones(tank_shape):
+    """鱼缸的全部命名区域（默认区域 + 配置文件注册的区域），保持定义顺序"""
+    return {**default_zones(tank_shape), **TANK_ZONES.get(tank_shape, {})}
+
+
+def _polygon_mask(polygon_mm, scale_factor, size):
+    """判断每个像素中心是否在多边形内（射线法，逐边向量化）"""
+    polygon = np.asarray(polygon_mm, dtype=np.float64) / scale_factor
+    y = np.arange(size[0], dtype=np.float64)[:, None] + 0.5
+    x = np.arange(size[1], dtype=np.float64)[None, :] + 0.5
+    inside = np.zeros(size, dtype=bool)
+    for (x0, y0), (x1, y1) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        if y0 == y1:
+            continue  # 水平边不与水平射线相交
+        crosses = (y0 > y) != (y1 > y)
+        x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+@lru_cache(maxsize=None)
+def _zone_masks(tank_shape, scale_factor, size):
+    tank = _tank_mask(tank_shape, scale_factor, size)
+    names, columns = [], []
+    for name, spec in tank_zones(tank_shape).items():
+        mask = _polygon_mask(spec["polygon_mm"], scale_factor, size)
+        if spec["invert"]:
+            mask = ~mask
+        if tank is not None:
+            mask &= tank
+        names.append(name)
+        columns.append(mask.ravel())
+    matrix = np.stack(columns, axis=1).astype(np.float32)
+    matrix.setflags(write=False)
+    return tuple(names), matrix
+
+
+def zone_masks(tank_shape, scale_factor, size):
+    """
+    返回缓存的 (区域名元组, 区域矩阵)：区域矩阵形状为 (size[0] * size[1], 区域数) 的只读 float32 0/1 矩阵，
+    第 j 列为第 j 个区域按行展开的掩膜（已与鱼缸掩膜取交集）；未知鱼缸抛出 ValueError
+    """
+    return _zone_masks(tank_shape, scale_factor, tuple(size))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+timecourse.py
+
+Findex_Data 的时间进程模式（--timecourse）：把每条鱼的速度序列（speeds_mm_s）与
+top_times / freeze_times 区间按固定时间窗（如每 60 s）分箱，得到每个样本的速度、顶部占比与
+冻结占比曲线，再按组计算均值 ± SEM，输出长格式表（每行一个 组 × 指标 × 时间窗）。
+
+所有样本一次性向量化处理，不逐样本循环：
+- 速度：所有样本的 speeds 拼接为一个数组，按 (样本, 时间窗) 的起点做一次 np.add.reduceat；
+- 区间：把第 i 个样本的时间整体平移 i * span 后合并为一条时间轴，累计占用时间在各时间窗边界处
+  用一次 searchsorted 求值，相邻边界相减即为每个时间窗内的占用时间；
+- 组统计：组的 one-hot 矩阵与 (样本, 时间窗) 矩阵做矩阵乘法，得到各组的和、平方和与样本数。
+样本按批读取（BehaviorDataset，后台线程预取），内存只与批大小和曲线矩阵大小有关。
+
+样本文件不记录帧率，帧时间按 fps 换算（默认 30）；时间窗长度取整到整数帧。
+超出样本时长的时间窗为 NaN，不计入组统计；最后一个不完整的时间窗按实际时长计算。
+
+用法（模块调用）：
+    from timecourse import sample_curves, group_curves
+    curves, bin_seconds = sample_curves(npy_files, bin_seconds=60, fps=30)
+    df = group_curves(curves, groups, bin_seconds)
+"""
+
+import numpy as np
+
+# 输出的指标名（Metric 列）
+METRICS = ('Speed', 'Top Occupancy', 'Freeze Occupancy')
+
+
+def bin_series(values, offsets, bin_frames):
+    """
+    对拼接后的逐帧序列按 bin_frames 帧分箱求均值。
+
+    values: 所有样本拼接的一维数组，第 i 个样本为 values[offsets[i]:offsets[i + 1]]
+    返回 (n, n_bins) float64 数组，超出样本长度的时间窗为 NaN（非有限值不计入均值）
+    """
+    lengths = np.diff(offsets)
+    n = len(lengths)
+    bins_each = -(-lengths // bin_frames)
+    n_bins = int(bins_each.max(initial=0))
+    result = np.full((n, n_bins), np.nan)
+    total = int(bins_each.sum())
+    if total == 0:
+        return result
+    # 每个 (样本, 时间窗) 的起始下标；各样本的时间窗首尾相接覆盖整个数组，reduceat 的分段恰好对应
+    sample = np.repeat(np.arange(n), bins_each)
+    k = np.arange(total) - np.repeat(np.cumsum(bins_each) - bins_each, bins_each)
+    starts = offsets[sample] + k * bin_frames
+    finite = np.isfinite(values)
+    if finite.all():  # 常见情况：无需复制数组，每段帧数由相邻起点直接得到
+        sums = np.add.reduceat(values, starts, dtype=np.float64)
+        counts = np.diff(starts, append=len(values))
+    else:
+        sums = np.add.reduceat(np.where(finite, values, 0.0), starts, dtype=np.float64)
+        counts = np.add.reduceat(finite, starts, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result[sample, k] = np.where(counts > 0, sums / counts, np.nan)
+    return result
+
+
+def bin_intervals(intervals, offsets, durations, bin_seconds, n_bins):
+    """
+    计算各样本在每个时间窗内被区间覆盖的时间占比。
+
+    intervals: 所有样本拼接的 (m, 2) 区间（秒），第 i 个样本为 intervals[offsets[i]:offsets[i + 1]]，
+               同一样本内的区间互不重叠
+    durations: 各样本时长（秒），区间与时间窗均截断到该时长
+    返回 (n, n_bins) float64 数组，超出样本时长的时间窗为 NaN
+    """
+    n = len(durations)
+    durations = np.asarray(durations, dtype=np.float64)
+    edges = np.minimum(np.arange(n_bins + 1) * bin_seconds, durations[:, None])
+    widths = np.diff(edges, axis=1)
+    if len(intervals) == 0:
+        return np.where(widths > 0, 0.0, np.nan)
+    # 把各样本平移到互不重叠的时间段，合并为一条时间轴
+    span = float(durations.max(initial=0.0)) + bin_seconds
+    shift = np.arange(n) * span
+    sample = np.repeat(np.arange(n), np.diff(offsets))
+    limit = durations[sample]
+    start = np.clip(intervals[:, 0].astype(np.float64), 0.0, limit)
+    end = np.clip(intervals[:, 1].astype(np.float64), start, limit)
+    start += shift[sample]
+    order = np.argsort(start, kind='stable')
+    start = start[order]
+    length = (end + shift[sample])[order] - start
+    covered = np.concatenate(([0.0], np.cumsum(length)))
+
+    # 累计覆盖时间 C(t)：最后一个起点 <= t 的区间之前的总长度，加上该区间在 t 之前的部分
+    t = edges + shift[:, None]
+    j = np.searchsorted(start, t, side='right') - 1
+    jj = np.maximum(j, 0)
+    at_edges = np.where(j >= 0, covered[jj] + np.minimum(t - start[jj], length[jj]), 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(widths > 0, np.diff(at_edges, axis=1) / widths, np.nan)
+
+
+def batch_curves(batch, bin_frames, fps):
+    """计算一个 BehaviorBatch 的 {指标: (n, n_bins) 数组}"""
+    bin_seconds = bin_frames / fps
+    speed = bin_series(batch.speeds, batch.speed_offsets, bin_frames)
+    durations = batch.speed_lengths / fps
+    n_bins = speed.shape[1]
+    return {
+        'Speed': speed,
+        'Top Occupancy': bin_intervals(batch.top_times, batch.top_offsets, durations, bin_seconds, n_bins),
+        'Freeze Occupancy': bin_intervals(batch.freeze_times, batch.freeze_offsets, durations, bin_seconds, n_bins),
+    }
+
+
+def _pad_columns(matrix, n_bins):
+    if matrix.shape[1] == n_bins:
+        return matrix
+    padded = np.full((matrix.shape[0], n_bins), np.nan)
+    padded[:, :matrix.shape[1]] = matrix
+    return padded
+
+
+def sample_curves(npy_files, bin_seconds=60.0, fps=30.0, batch_size=256, threads=4):
+    """
+    读取行为样本并分箱，返回 ({指标: (n, n_bins) 数组}, 实际时间窗长度（秒，已取整到整数帧）)。
+    样本按 batch_size 分批读取，后台线程预取下一批。
+    """
+    from loader import BehaviorDataset
+    bin_frames = max(1, int(round(bin_seconds * fps)))
+    parts = {metric: [] for metric in METRICS}
+    dataset = BehaviorDataset(npy_files, batch_size=batch_size, threads=threads, labels=[''] * len(npy_files))
+    for batch in dataset:
+        for metric, matrix in batch_curves(batch, bin_frames, fps).items():
+            parts[metric].append(matrix)
+    n_bins = max((m.shape[1] for matrices in parts.values() for m in matrices), default=0)
+    curves = {metric: (np.vstack([_pad_columns(m, n_bins) for m in matrices]) if matrices
+                       else np.empty((0, n_bins)))
+              for metric, matrices in parts.items()}
+    return curves, bin_frames / fps
+
+
+def group_curves(curves, groups, bin_seconds):
+    """
+    按组计算每个时间窗的均值、SEM 与样本数，返回长格式 DataFrame：
+    Group, Metric, Bin, Start (s), End (s), Mean, SEM, N（没有样本的时间窗不输出）
+    """
+    import pandas as pd
+    group_names, codes = np.unique(np.asarray(groups, dtype=str), return_inverse=True)
+    one_hot = np.zeros((len(group_names), len(codes)))
+    one_hot[codes, np.arange(len(codes))] = 1.0
+
+    frames = []
+    for metric in METRICS:
+        matrix = curves[metric]
+        n_bins = matrix.shape[1]
+        valid = np.isfinite(matrix)
+        values = np.where(valid, matrix, 0.0)
+        n = one_hot @ valid
+        sums = one_hot @ values
+        squares = one_hot @ (values * values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / n
+            var = (squares - sums * mean) / (n - 1)
+            sem = np.where(n > 1, np.sqrt(np.maximum(var, 0.0) / n), np.nan)
+        bins = np.tile(np.arange(n_bins), len(group_names))
+        frames.append(pd.DataFrame({
+            'Group': np.repeat(group_names, n_bins),
+            'Metric': metric,
+            'Bin': bins + 1,
+            'Start (s)': bins * bin_seconds,
+            'End (s)': (bins + 1) * bin_seconds,
+            'Mean': mean.ravel(),
+            'SEM': sem.ravel(),
+            'N': n.ravel().astype(np.int64),
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df['N'] > 0]
+    # 稳定排序：组内保持 METRICS 与时间窗顺序
+    return df.sort_values('Group', kind='stable', ignore_index=True)
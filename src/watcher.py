@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+watcher.py
+
+Findex_Data / Findex_Heatmap 的 --watch 模式：定期轮询给定根目录（discover_samples），
+只报告新增、修改或删除的样本文件夹，由调用方增量更新汇总表与受影响组的热图。
+
+轮询使用标准库实现（不依赖 inotify，Windows / 网络存储上同样可用）。
+以文件夹内 .npy 文件的 (路径, 大小, mtime_ns) 作为签名；为避免读取仍在写入的文件，
+文件夹内最新的 .npy 修改时间距今不足 settle 秒、或存在空文件时暂不报告，下一轮再检查。
+
+用法（模块调用）：
+    from watcher import SampleWatcher
+    watcher = SampleWatcher(["path/to/parent"], settle=2.0)
+    watcher.watch(lambda changed, removed: ..., interval=5.0)
+"""
+
+import os
+import time
+import logging
+
+from loader import discover_samples
+
+logger = logging.getLogger('findex.watch')
+
+
+def _folder_signature(npy_files):
+    """返回 (签名, 最新 mtime 秒, 是否有空文件)，文件在扫描期间消失时返回 None"""
+    signature, newest, empty = [], 0.0, False
+    for npy_file in npy_files:
+        try:
+            st = os.stat(npy_file)
+        except OSError:
+            return None
+        signature.append((npy_file, st.st_size, st.st_mtime_ns))
+        newest = max(newest, st.st_mtime)
+        empty = empty or st.st_size == 0
+    return tuple(signature), newest, empty
+
+
+class SampleWatcher:
+    """
+    SampleWatcher 记录每个已报告样本文件夹的签名，poll() 返回自上次以来
+    已稳定的新增 / 修改文件夹（{文件夹: [.npy 文件]}）及已删除的文件夹列表。
+    """
+    def __init__(self, paths, settle=2.0, **discover_options):
+        self.paths = list(paths)
+        self.settle = settle
+        self.discover_options = discover_options
+        self._known = {}  # 文件夹 -> 已报告的签名
+
+    def poll(self):
+        """扫描一次，返回 (changed, removed)"""
+        samples = discover_samples(self.paths, **self.discover_options)
+        now = time.time()
+        changed = {}
+        for folder, npy_files in samples.items():
+            state = _folder_signature(npy_files)
+            if state is None:
+                continue
+            signature, newest, empty = state
+            if self._known.get(folder) == signature:
+                continue
+            if empty or now - newest < self.settle:
+                logger.debug("Waiting for %s to settle", folder)
+                continue
+            self._known[folder] = signature
+            changed[folder] = npy_files
+        removed = [folder for folder in self._known if folder not in samples]
+        for folder in removed:
+            del self._known[folder]
+        return changed, removed
+
+    def watch(self, callback, interval=5.0, max_polls=None):
+        """循环轮询，有变化时调用 callback(changed, removed)；Ctrl+C 或达到 max_polls 次后返回"""
+        polls = 0
+        try:
+            while True:
+                changed, removed = self.poll()
+                if changed or removed:
+                    logger.info("%d changed, %d removed sample folders", len(changed), len(removed))
+                    callback(changed, removed)
+                polls += 1
+                if max_polls is not None and polls >= max_polls:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
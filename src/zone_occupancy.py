@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+zone_occupancy.py
+
+Findex_Data 的区域停留分析（--zones）：由每个样本的热图计算其在各命名区域（见 tank_geometry.zone_masks）
+的停留比例 = 区域内热图之和 / 鱼缸内热图之和。
+
+按 (鱼缸类型, scale_factor, 热图尺寸) 分桶，每个桶的样本热图展开为 (样本数, 像素数) 矩阵 X，
+区域掩膜为 (像素数, 区域数) 矩阵 Z，所有样本、所有区域的区域和为一次矩阵乘法 X @ Z；
+鱼缸内总和为 X @ 鱼缸掩膜。不同鱼缸的区域名取并集，样本所在鱼缸没有的区域为 NaN。
+
+用法（模块调用）：
+    from zone_occupancy import zone_fractions, zone_table
+    names, fractions = zone_fractions(heatmaps, 'rectangle', 5)     # fractions: (样本数, 区域数)
+    columns, values = zone_table(heatmaps, tank_shapes, scale_factors)
+"""
+
+import numpy as np
+
+from tank_geometry import tank_mask, zone_masks
+
+
+def zone_fractions(heatmaps, tank_shape, scale_factor, zones=None):
+    """
+    heatmaps 为相同尺寸、同一鱼缸的热图列表，返回 (区域名列表, (样本数, 区域数) float64 停留比例)；
+    zones 给定时只计算其中存在的区域（保持 zones 的顺序）
+    """
+    shape = heatmaps[0].shape
+    names, matrix = zone_masks(tank_shape, scale_factor, shape)
+    if zones is not None:
+        keep = [names.index(name) for name in zones if name in names]
+        names, matrix = tuple(names[i] for i in keep), matrix[:, keep]
+    stack = np.stack([np.asarray(h, dtype=np.float32).ravel() for h in heatmaps]).astype(np.float64)
+    inside = tank_mask(tank_shape, scale_factor, shape)
+    totals = stack.sum(axis=1) if inside is None else stack @ inside.ravel().astype(np.float64)
+    sums = stack @ matrix.astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fractions = np.where(totals[:, None] > 0, sums / totals[:, None], np.nan)
+    return list(names), fractions
+
+
+def zone_table(heatmaps, tank_shapes, scale_factors, zones=None):
+    """
+    计算任意鱼缸、尺寸混合的样本的停留比例，返回 (区域名列表, (样本数, 区域数) 矩阵)，行顺序与输入一致；
+    区域名为各鱼缸区域的并集（按首次出现的顺序），zones 给定时只保留其中的区域
+    """
+    buckets = {}  # (鱼缸, scale_factor, 尺寸) -> [样本序号]
+    for i, (heatmap, tank_shape, scale_factor) in enumerate(zip(heatmaps, tank_shapes, scale_factors)):
+        buckets.setdefault((tank_shape, scale_factor, heatmap.shape), []).append(i)
+
+    columns, results = [], []
+    for (tank_shape, scale_factor, _), indices in buckets.items():
+        names, fractions = zone_fractions([heatmaps[i] for i in indices], tank_shape, scale_factor, zones)
+        columns.extend(name for name in names if name not in columns)
+        results.append((indices, names, fractions))
+
+    values = np.full((len(heatmaps), len(columns)), np.nan)
+    for indices, names, fractions in results:
+        values[np.ix_(indices, [columns.index(name) for name in names])] = fractions
+    return columns, values